@@ -0,0 +1,194 @@
+"""
+Декодирование аудио через ffmpeg напрямую в NumPy-массив (16 кГц, моно, float32) — формат входа faster-whisper.
+Позволяет декодировать только нужный диапазон файла без временных WAV и без загрузки всего файла в память.
+DecodedAudio — декодированное аудио одного задания очереди, общее для транскрибации и экспорта MP3.
+"""
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from config import FULL_VIDEO_SEGMENT_EPS_S, WHISPER_SAMPLE_RATE
+
+# Размер блока чтения из stdout ffmpeg (байт)
+_READ_CHUNK_BYTES = 1 << 20
+
+
+def _no_window_kwargs():
+    if sys.platform == "win32":
+        return {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)}
+    return {}
+
+
+def import_audio_segment():
+    """
+    pydub.AudioSegment с импортом при первом использовании (MP3, запасное определение длительности), а не при запуске.
+    На Windows pydub запускает ffmpeg/ffprobe через subprocess.Popen — вызов патчится, чтобы не открывались консоли.
+    """
+    from pydub import AudioSegment
+    if sys.platform == "win32":
+        import pydub.audio_segment as pydub_audio_segment
+        if not getattr(pydub_audio_segment, "_wf_no_window_patch", False):
+            orig_popen = pydub_audio_segment.subprocess.Popen
+
+            def popen_no_window(*args, **kwargs):
+                kwargs["creationflags"] = kwargs.get("creationflags", 0) | getattr(subprocess, "CREATE_NO_WINDOW", 0)
+                return orig_popen(*args, **kwargs)
+
+            pydub_audio_segment.subprocess.Popen = popen_no_window
+            pydub_audio_segment._wf_no_window_patch = True
+    return AudioSegment
+
+
+def decode_audio_range(path, start_sec, end_sec=None, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Декодирует отрезок [start_sec, end_sec] файла path в np.ndarray float32 (моно, sample_rate Гц).
+    ffmpeg ищет начало через -ss до -i (быстрый seek по контейнеру) и выдаёт только окно длиной end_sec - start_sec,
+    поэтому память пропорциональна длине окна, а не файла. end_sec=None — до конца файла (без -t): длительность
+    из ffprobe или из очереди не нужна и не может обрезать результат. При ошибке ffmpeg — OSError.
+    """
+    start_sec = max(0.0, float(start_sec))
+    span = None if end_sec is None else max(0.0, float(end_sec) - start_sec)
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-ss", f"{start_sec:.3f}"]
+    if span is not None:
+        cmd += ["-t", f"{span:.3f}"]
+    cmd += ["-i", path, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_no_window_kwargs())
+    try:
+        if span is None:
+            # Длина заранее неизвестна: буфер растёт по мере чтения
+            data = bytearray()
+            while True:
+                chunk = proc.stdout.read(_READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                data += chunk
+            del data[len(data) - len(data) % 4:]
+            buf, filled = np.frombuffer(data, dtype=np.float32), len(data)
+        else:
+            # Буфер под всё окно выделяется один раз; +1 с запаса на округление длительности
+            buf = np.empty(int((span + 1.0) * sample_rate), dtype=np.float32)
+            view = memoryview(buf).cast("B")
+            filled = 0
+            while filled < len(view):
+                n = proc.stdout.readinto(view[filled:filled + _READ_CHUNK_BYTES])
+                if not n:
+                    break
+                filled += n
+            # Лишние байты сверх окна (если ffmpeg выдал больше ожидаемого) отбрасываем
+            while proc.stdout.read(_READ_CHUNK_BYTES):
+                pass
+        stderr = proc.stderr.read()
+        proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+    if proc.returncode != 0:
+        err = stderr.decode("utf-8", errors="replace").strip()
+        raise OSError(f"ffmpeg: {err or proc.returncode}")
+    return buf[:filled // buf.itemsize]
+
+
+# Формат ffmpeg для сырых PCM-данных pydub по ширине сэмпла (байт)
+_SAMPLE_FORMATS = {1: "u8", 2: "s16le", 4: "s32le"}
+
+
+def _pcm_from_segment(segment, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Переводит уже декодированный pydub.AudioSegment во вход модели (float32, моно, sample_rate)
+    ресемплингом через ffmpeg из памяти — без повторного декодирования исходного файла.
+    """
+    fmt = _SAMPLE_FORMATS.get(segment.sample_width)
+    if fmt is None:
+        segment = segment.set_sample_width(2)
+        fmt = _SAMPLE_FORMATS[2]
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-f", fmt, "-ar", str(segment.frame_rate), "-ac", str(segment.channels), "-i", "-",
+        "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-",
+    ]
+    result = subprocess.run(cmd, input=segment.raw_data, capture_output=True, **_no_window_kwargs())
+    if result.returncode != 0:
+        err = result.stderr.decode("utf-8", errors="replace").strip()
+        raise OSError(f"ffmpeg: {err or result.returncode}")
+    return np.frombuffer(result.stdout, dtype=np.float32).copy()
+
+
+class DecodedAudio:
+    """
+    Аудио одного задания очереди: окно [start_sec, end_sec] файла декодируется не более одного раза
+    и используется и как вход модели (pcm), и для экспорта MP3 (segment). release() освобождает память.
+    Окно, доходящее до конца файла (to_end), декодируется без ограничения длины: устаревшая или неизвестная
+    длительность (end_sec=None) не обрезает аудио, а end_sec после декодирования — фактический конец.
+    decode_sec и peak_bytes — суммарное время декодирования и пиковый объём буферов задания (для лога).
+    """
+
+    def __init__(self, path, start_sec, end_sec, duration):
+        self.path = path
+        self.start_sec = start_sec
+        self.end_sec = end_sec
+        self.duration = duration
+        self.decode_sec = 0.0
+        self.peak_bytes = 0
+        self._pcm = None
+        self._segment = None
+
+    @property
+    def to_end(self):
+        """True, если окно идёт до конца файла: конец неизвестен или совпадает с длительностью."""
+        return self.end_sec is None or (self.duration > 0 and self.duration - self.end_sec < FULL_VIDEO_SEGMENT_EPS_S)
+
+    @property
+    def span_sec(self):
+        return max(0.0, (self.end_sec or self.start_sec) - self.start_sec)
+
+    def _decoded_to(self, seconds):
+        """Фактическая длина окна до конца файла становится его концом (end_sec) и длительностью файла."""
+        if self.to_end:
+            self.end_sec = self.duration = self.start_sec + seconds
+
+    def _track_memory(self):
+        held = 0
+        if self._pcm is not None:
+            held += self._pcm.nbytes
+        if self._segment is not None:
+            held += len(self._segment.raw_data)
+        self.peak_bytes = max(self.peak_bytes, held)
+
+    def segment(self):
+        """pydub.AudioSegment окна в исходном качестве (для MP3); декодируется один раз."""
+        if self._segment is None:
+            AudioSegment = import_audio_segment()
+            t0 = time.time()
+            self._segment = AudioSegment.from_file(
+                self.path, start_second=self.start_sec, duration=None if self.to_end else self.span_sec
+            )
+            self._decoded_to(len(self._segment) / 1000.0)
+            self.decode_sec += time.time() - t0
+            self._track_memory()
+        return self._segment
+
+    def pcm(self):
+        """
+        Вход модели: float32, моно, 16 кГц. Если окно уже декодировано для MP3 — только ресемплинг из памяти,
+        иначе — декодирование окна ffmpeg (decode_audio_range).
+        """
+        if self._pcm is None:
+            t0 = time.time()
+            if self._segment is not None:
+                self._pcm = _pcm_from_segment(self._segment)
+            else:
+                self._pcm = decode_audio_range(self.path, self.start_sec, None if self.to_end else self.end_sec)
+                self._decoded_to(len(self._pcm) / WHISPER_SAMPLE_RATE)
+            self.decode_sec += time.time() - t0
+            self._track_memory()
+        return self._pcm
+
+    def release(self):
+        """Освобождает декодированные буферы (вызывается сразу по завершении задания)."""
+        self._pcm = None
+        self._segment = None
@@ -0,0 +1,161 @@
+"""
+Автонастройка параметров загрузки модели под конкретную машину: compute_type, cpu_threads и num_workers
+(по умолчанию CTranslate2 выбирает их сам, независимо от железа).
+
+    python -m whisperfast tune [-m модель] [-d AUTO|GPU|CPU] [--clip файл] [--seconds N]
+
+Выбранная модель прогоняется на эталонном фрагменте при каждой комбинации сетки; самая быстрая сохраняется
+в settings.json (autotune_profiles) по ключу «модель|устройство|отпечаток машины».
+WhisperModelSingleton.get применяет сохранённую настройку автоматически (tuned_load_options).
+"""
+import gc
+import hashlib
+import os
+import platform
+import sys
+import time
+
+from config import (
+    WHISPER_SAMPLE_RATE, AUTOTUNE_COMPUTE_TYPES, AUTOTUNE_NUM_WORKERS, AUTOTUNE_TOLERANCE,
+)
+from lang_manager import load_app_settings, save_app_settings
+
+SETTINGS_KEY = "autotune_profiles"
+
+# Сохранённые профили читаются из settings.json один раз за запуск; run_tuning обновляет их при сохранении
+_profiles = None
+
+
+def machine_fingerprint(device):
+    """Короткий отпечаток машины: ОС, имя хоста, процессор, число ядер и (для cuda) имя видеокарты."""
+    parts = [platform.system(), platform.node(), platform.machine(), platform.processor(), str(os.cpu_count())]
+    if device == "cuda":
+        torch = sys.modules.get("torch")
+        try:
+            parts.append(torch.cuda.get_device_name(0))
+        except Exception:
+            pass
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def profile_key(model_name, device):
+    return f"{model_name}|{device}|{machine_fingerprint(device)}"
+
+
+def tuned_load_options(model_name, device):
+    """
+    Сохранённая настройка для модели на этой машине: (compute_type, {"cpu_threads": .., "num_workers": ..})
+    или (None, {}), если автонастройка не запускалась.
+    """
+    entry = saved_profiles().get(profile_key(model_name, device))
+    if not isinstance(entry, dict) or not entry.get("compute_type"):
+        return None, {}
+    options = {}
+    for name in ("cpu_threads", "num_workers"):
+        try:
+            value = int(entry.get(name) or 0)
+        except (TypeError, ValueError):
+            value = 0
+        if value > 0:
+            options[name] = value
+    return entry["compute_type"], options
+
+
+def saved_profiles():
+    """Профили автонастройки из settings.json (dict ключ -> настройка); читаются при первом обращении."""
+    global _profiles
+    if _profiles is None:
+        profiles = load_app_settings().get(SETTINGS_KEY)
+        _profiles = dict(profiles) if isinstance(profiles, dict) else {}
+    return _profiles
+
+
+def thread_grid(total_cores=None):
+    """Число потоков CTranslate2 для перебора: четверть, половина и все ядра."""
+    total = total_cores or os.cpu_count() or 1
+    return sorted({max(1, total // 4), max(1, total // 2), total})
+
+
+def candidate_grid(device, compute_types=None, threads=None, workers=None):
+    """Комбинации (compute_type, cpu_threads, num_workers); на GPU cpu_threads не перебирается (0 — по умолчанию)."""
+    compute_types = compute_types or AUTOTUNE_COMPUTE_TYPES.get(device, AUTOTUNE_COMPUTE_TYPES["cpu"])
+    threads = threads or (thread_grid() if device == "cpu" else [0])
+    workers = workers or AUTOTUNE_NUM_WORKERS
+    return [(c, th, w) for c in compute_types for th in threads for w in workers]
+
+
+def pick_best(results):
+    """
+    Самая быстрая комбинация; среди результатов в пределах AUTOTUNE_TOLERANCE от лучшего берётся
+    самая «дешёвая» (меньше воркеров и потоков) — разница меньше допуска считается шумом замера.
+    """
+    ok = [r for r in results if r.get("speed")]
+    if not ok:
+        return None
+    best_speed = max(r["speed"] for r in ok)
+    close = [r for r in ok if r["speed"] >= best_speed * (1.0 - AUTOTUNE_TOLERANCE)]
+    return min(close, key=lambda r: (r["num_workers"], r["cpu_threads"] or 0, -r["speed"]))
+
+
+def run_tuning(model_name, device_mode, clip_path, clip_sec, on_result=None,
+               compute_types=None, threads=None, workers=None):
+    """
+    Замер каждой комбинации сетки: загрузка модели и транскрибация первых clip_sec сек файла clip_path
+    (декодируется один раз). on_result(dict) вызывается после каждой комбинации.
+    Лучшая настройка сохраняется в settings.json. Возвращает (best, results); best = None, если всё упало.
+    """
+    global _profiles
+    from faster_whisper import WhisperModel
+    from audio_io import decode_audio_range
+    from model_manager import WhisperModelSingleton
+    from transcriber import VAD_OPTIONS
+
+    on_result = on_result or (lambda result: None)
+    name = WhisperModelSingleton.resolve_model_name(model_name)
+    device, _ = WhisperModelSingleton.resolve_device(device_mode)
+    audio = decode_audio_range(clip_path, 0.0, clip_sec)
+    audio_sec = len(audio) / float(WHISPER_SAMPLE_RATE)
+    if audio_sec <= 0:
+        raise ValueError(f"empty reference clip: {clip_path}")
+
+    results = []
+    for compute, cpu_threads, num_workers in candidate_grid(device, compute_types, threads, workers):
+        result = {"compute_type": compute, "cpu_threads": cpu_threads, "num_workers": num_workers}
+        model = None
+        try:
+            started = time.time()
+            model = WhisperModel(name, device=device, compute_type=compute,
+                                 cpu_threads=cpu_threads, num_workers=num_workers)
+            result["load_sec"] = round(time.time() - started, 3)
+            started = time.time()
+            segments, _ = model.transcribe(audio, **VAD_OPTIONS)
+            for _ in segments:
+                pass
+            elapsed = max(time.time() - started, 1e-6)
+            result["transcribe_sec"] = round(elapsed, 3)
+            result["speed"] = round(audio_sec / elapsed, 2)
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            model = None
+            gc.collect()
+        results.append(result)
+        on_result(result)
+
+    best = pick_best(results)
+    if best is not None:
+        saved = load_app_settings()
+        profiles = saved.get(SETTINGS_KEY)
+        profiles = dict(profiles) if isinstance(profiles, dict) else {}
+        profiles[profile_key(name, device)] = {
+            "compute_type": best["compute_type"],
+            "cpu_threads": best["cpu_threads"],
+            "num_workers": best["num_workers"],
+            "speed": best["speed"],
+            "clip": os.path.basename(clip_path),
+            "clip_sec": round(audio_sec, 1),
+            "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        save_app_settings({SETTINGS_KEY: profiles})
+        _profiles = profiles
+    return best, results
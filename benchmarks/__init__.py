@@ -0,0 +1,8 @@
+"""
+Воспроизводимые замеры производительности (запуск из каталога программы):
+
+    python -m benchmarks.rtf       — скорость моделей и движков на наборе фрагментов (уже загруженные модели, CPU)
+    python -m benchmarks.pipeline_overhead — накладные расходы очереди и конвейера на тысячах файлов (модель-заглушка)
+
+Отчёты пишутся парой JSON + Markdown в BENCHMARK_DIR (в BASE_DIR), чтобы их можно было сравнивать между версиями.
+"""
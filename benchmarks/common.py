@@ -0,0 +1,91 @@
+"""Общие части замеров: сведения о машине, пиковая память процесса, запись отчёта JSON + Markdown."""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+from config import APP_VERSION, BASE_DIR, BENCHMARK_DIR
+from utils import process_memory_mb
+
+
+def library_versions(names=("faster_whisper", "ctranslate2", "numpy")):
+    """Версии библиотек, влияющих на результат (без импорта отсутствующих)."""
+    from importlib import metadata
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = metadata.version(name.replace("_", "-"))
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def machine_info():
+    return {
+        "app_version": APP_VERSION,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "libraries": library_versions(),
+    }
+
+
+class PeakMemorySampler:
+    """Пиковая резидентная память процесса (МБ) за время блока with: опрос process_memory_mb в фоновом потоке."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        value = process_memory_mb()
+        if value is not None and (self.peak_mb is None or value > self.peak_mb):
+            self.peak_mb = value
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+def markdown_table(headers, rows):
+    lines = ["| " + " | ".join(headers) + " |", "|" + "|".join("---" for _ in headers) + "|"]
+    for row in rows:
+        lines.append("| " + " | ".join("" if v is None else str(v) for v in row) + " |")
+    return "\n".join(lines)
+
+
+def write_report(name, data, markdown, output_dir=None):
+    """Пишет <name>.json и <name>.md в output_dir (по умолчанию BENCHMARK_DIR в BASE_DIR). -> (json_path, md_path)."""
+    output_dir = output_dir or os.path.join(BASE_DIR, BENCHMARK_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, name + ".json")
+    md_path = os.path.join(output_dir, name + ".md")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(markdown.rstrip("\n") + "\n")
+    return json_path, md_path
+
+
+def report_name(suite):
+    """Имя отчёта: набор + версия программы + дата (отчёты разных версий лежат рядом для сравнения)."""
+    return f"{suite}_{APP_VERSION}_{time.strftime('%Y%m%d-%H%M%S')}"
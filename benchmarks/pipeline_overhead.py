@@ -0,0 +1,355 @@
+"""
+Накладные расходы конвейера без настоящей модели:
+
+    python -m benchmarks.pipeline_overhead [--files 1000] [--duration 2] [--segment-sec 5] [--speed 0]
+                                           [--baseline отчёт.json]
+
+Вместо faster_whisper подставляется FakeWhisperModel (sys.modules до импорта конвейера): сегменты с заданным шагом,
+при --speed > 0 — с задержкой, как у модели с такой скоростью (x реального времени).
+Генерируются тысячи коротких WAV; замеряются добавление в очередь (ffprobe / кэш метаданных), запись и чтение
+request_queue.json, перестройка таблицы очереди (если есть дисплей) и TranscriptionPipeline.run по этапам:
+определение длительности, хэш содержимого, декодирование ffmpeg, кэш результатов, открытие и запись TXT/SRT,
+контрольные точки, обратные вызовы интерфейса. Время модели вычитается — остаются накладные расходы.
+С --baseline этапы сравниваются с прошлым отчётом: замедление больше BENCH_REGRESSION_TOLERANCE даёт код выхода 1.
+Кэши (метаданные, результаты, контрольные точки) на время замера перенаправляются во временный каталог.
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import types
+import wave
+from functools import wraps
+
+from config import (
+    LANG_AUTO_VALUE, WHISPER_SAMPLE_RATE, MEDIA_CACHE_MAX_ENTRIES, DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_TARGET_S,
+    BENCH_REGRESSION_TOLERANCE, BENCH_REGRESSION_MIN_MS,
+)
+from i18n import t
+from benchmarks.common import PeakMemorySampler, machine_info, markdown_table, write_report, report_name
+
+
+class FakeWhisperModel:
+    """
+    Замена faster_whisper.WhisperModel: сегменты длиной segment_sec по всей длительности входного массива.
+    speed > 0 — задержка (длина сегмента / speed) на каждый сегмент. busy_sec — суммарное время «модели».
+    """
+    segment_sec = 5.0
+    speed = 0.0
+    busy_sec = 0.0
+
+    def __init__(self, model_size_or_path=None, device="cpu", compute_type="default", **kwargs):
+        self.model_size_or_path = model_size_or_path
+
+    def transcribe(self, audio, language=None, **kwargs):
+        duration = len(audio) / float(WHISPER_SAMPLE_RATE)
+        info = types.SimpleNamespace(duration=duration, language=language or "en", language_probability=1.0)
+        return self._segments(duration), info
+
+    def _segments(self, duration):
+        cls = type(self)
+        start = 0.0
+        index = 0
+        while start < duration:
+            started = time.perf_counter()
+            end = min(duration, start + cls.segment_sec)
+            if cls.speed > 0:
+                time.sleep((end - start) / cls.speed)
+            segment = types.SimpleNamespace(start=start, end=end, text=f" synthetic segment {index}", words=None)
+            cls.busy_sec += time.perf_counter() - started
+            yield segment
+            start = end
+            index += 1
+
+
+class FakeBatchedInferencePipeline:
+    def __init__(self, model, **kwargs):
+        self.model = model
+
+    def transcribe(self, audio, batch_size=None, **kwargs):
+        return self.model.transcribe(audio, **kwargs)
+
+
+def install_fake_model(segment_sec, speed):
+    """Подменяет модуль faster_whisper до первого импорта конвейера."""
+    FakeWhisperModel.segment_sec = max(0.1, segment_sec)
+    FakeWhisperModel.speed = max(0.0, speed)
+    module = types.ModuleType("faster_whisper")
+    module.WhisperModel = FakeWhisperModel
+    module.BatchedInferencePipeline = FakeBatchedInferencePipeline
+    sys.modules["faster_whisper"] = module
+
+
+class StageTimer:
+    """Суммарное время и число вызовов по этапам; wrap() оборачивает атрибут объекта (модуля или класса)."""
+
+    def __init__(self):
+        self.stages = {}
+        self._patched = []
+
+    def add(self, stage, seconds, calls=1):
+        entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += calls
+        entry["seconds"] += seconds
+
+    def wrap(self, owner, attr, stage):
+        original = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+        func = original.__func__ if isinstance(original, (staticmethod, classmethod)) else original
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+
+        replacement = type(original)(timed) if isinstance(original, (staticmethod, classmethod)) else timed
+        setattr(owner, attr, replacement)
+        self._patched.append((owner, attr, original))
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched.clear()
+
+
+def generate_files(directory, count, duration_sec):
+    """count коротких WAV (16 кГц, моно, тихий тон) — разные по содержимому, чтобы хэши не совпадали."""
+    frames = int(duration_sec * WHISPER_SAMPLE_RATE)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"bench_{i:05d}.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(WHISPER_SAMPLE_RATE)
+            w.writeframes(struct.pack("<h", i % 32768) + b"\x00\x00" * (frames - 1))
+        paths.append(path)
+    return paths
+
+
+def _isolate_caches(work_dir):
+    """Кэш метаданных и контрольные точки — во временном каталоге (файлы программы не меняются)."""
+    import media_cache
+    import checkpoints
+    media_cache._cache = media_cache.MediaMetadataCache(os.path.join(work_dir, "media_cache.json"),
+                                                        MEDIA_CACHE_MAX_ENTRIES)
+    checkpoints._checkpoint_dir = os.path.join(work_dir, "checkpoints")
+
+
+def _timed(timer, stage, func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    timer.add(stage, time.perf_counter() - started)
+    return result
+
+
+def measure_queue(timer, paths, work_dir):
+    """Добавление в очередь (без кэша и с кэшем метаданных), запись/чтение request_queue.json, таблица очереди."""
+    from utils import make_queue_item, save_queue_file, load_queue_file
+    from media_cache import flush_media_cache
+
+    rows = [_timed(timer, "queue_add_cold", make_queue_item, path) for path in paths]
+    for path in paths:
+        _timed(timer, "queue_add_warm", make_queue_item, path)
+    _timed(timer, "media_cache_flush", flush_media_cache)
+    queue_path = os.path.join(work_dir, "request_queue.json")
+    _timed(timer, "queue_save", save_queue_file, queue_path, rows)
+    rows = _timed(timer, "queue_load", load_queue_file, queue_path)
+    measure_treeview(timer, rows)
+    return rows
+
+
+def measure_treeview(timer, rows):
+    """Полная перестройка таблицы очереди (как _refresh_queue_treeview); пропускается без дисплея."""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+    except Exception:
+        return
+    try:
+        from input_files import queue_row_values
+        tree = ttk.Treeview(root, columns=tuple(range(7)), show="headings")
+        for _ in range(2):
+            started = time.perf_counter()
+            tree.delete(*tree.get_children())
+            for i, item in enumerate(rows):
+                tree.insert("", "end", values=queue_row_values(i + 1, item))
+            root.update_idletasks()
+            timer.add("treeview_rebuild", time.perf_counter() - started)
+    finally:
+        root.destroy()
+
+
+def measure_pipeline(timer, rows, work_dir, batch_size):
+    """TranscriptionPipeline.run по всем строкам; этапы оборачиваются StageTimer, обратные вызовы идут в очередь."""
+    import pipeline
+    from audio_io import DecodedAudio
+    from output_writers import TranscriptWriter
+    from result_cache import TranscriptionResultCache
+
+    timer.wrap(pipeline, "get_audio_duration_seconds", "probe_duration")
+    timer.wrap(pipeline, "get_content_hash", "content_hash")
+    timer.wrap(DecodedAudio, "pcm", "decode")
+    timer.wrap(DecodedAudio, "segment", "pydub_segment")
+    timer.wrap(TranscriptionResultCache, "get", "result_cache")
+    timer.wrap(TranscriptionResultCache, "put", "result_cache")
+    timer.wrap(pipeline.TranscriptionPipeline, "_open_job_output", "open_outputs")
+    timer.wrap(TranscriptWriter, "write", "write_segment")
+    timer.wrap(TranscriptWriter, "finish", "finish_outputs")
+    for name in ("load_checkpoint", "save_checkpoint", "remove_checkpoint"):
+        timer.wrap(pipeline, name, "checkpoint")
+
+    # Обратные вызовы интерфейса: в GUI это root.after в главный поток, здесь — такая же передача через очередь
+    ui_events = queue.Queue()
+    callback_counts = {}
+
+    def callback(kind):
+        def handler(*args, **kwargs):
+            started = time.perf_counter()
+            ui_events.put((kind, args))
+            callback_counts[kind] = callback_counts.get(kind, 0) + 1
+            timer.add("ui_callbacks", time.perf_counter() - started)
+        return handler
+
+    pipe = pipeline.TranscriptionPipeline(
+        log=callback("log"), on_progress=callback("progress"), on_file_done=callback("file_done"),
+        on_file_start=callback("file_start"), on_file_progress=callback("file_progress"),
+        on_segment=callback("segment"), on_file_error=callback("file_error"),
+        result_cache=TranscriptionResultCache(directory=os.path.join(work_dir, "result_cache")),
+    )
+    opts = {
+        "device_mode": "CPU", "whisper_model": "tiny", "lang_mode": LANG_AUTO_VALUE, "save_audio_mp3": False,
+        "output_dir": os.path.join(work_dir, "out"), "parallel_workers": 1, "engine_mode": "sequential",
+        "batch_size": batch_size, "chunk_long_files": False, "chunk_target_sec": DEFAULT_CHUNK_TARGET_S,
+    }
+    FakeWhisperModel.busy_sec = 0.0
+    try:
+        with PeakMemorySampler() as memory:
+            started = time.perf_counter()
+            done, skipped = pipe.run(rows, opts)
+            wall = time.perf_counter() - started
+    finally:
+        timer.restore()
+    timer.add("model (fake)", FakeWhisperModel.busy_sec, calls=0)
+    return {"files_done": done, "files_skipped": len(skipped), "wall_sec": round(wall, 3),
+            "model_sec": round(FakeWhisperModel.busy_sec, 3),
+            "overhead_sec": round(wall - FakeWhisperModel.busy_sec, 3),
+            "overhead_ms_per_file": round((wall - FakeWhisperModel.busy_sec) * 1000.0 / max(1, len(rows)), 3),
+            "peak_rss_mb": memory.peak_mb, "ui_callbacks": callback_counts, "ui_events_queued": ui_events.qsize()}
+
+
+def stage_rows(timer):
+    rows = {}
+    for stage, entry in sorted(timer.stages.items()):
+        calls = entry["calls"]
+        rows[stage] = {"calls": calls, "total_sec": round(entry["seconds"], 4),
+                       "ms_per_call": round(entry["seconds"] * 1000.0 / calls, 4) if calls else None}
+    return rows
+
+
+def find_regressions(stages, summary, baseline):
+    """Этапы, ставшие медленнее базового отчёта больше чем на BENCH_REGRESSION_TOLERANCE (и на BENCH_REGRESSION_MIN_MS)."""
+    regressions = []
+    pairs = [(name, entry.get("ms_per_call"), (baseline.get("stages") or {}).get(name, {}).get("ms_per_call"))
+             for name, entry in stages.items()]
+    pairs.append(("overhead_ms_per_file", summary["overhead_ms_per_file"],
+                  (baseline.get("pipeline") or {}).get("overhead_ms_per_file")))
+    for name, current, previous in pairs:
+        if current is None or previous is None:
+            continue
+        if current > previous * (1.0 + BENCH_REGRESSION_TOLERANCE) and current - previous > BENCH_REGRESSION_MIN_MS:
+            regressions.append({"stage": name, "baseline_ms": previous, "current_ms": current,
+                                "change_pct": round((current / previous - 1.0) * 100.0, 1) if previous else None})
+    return regressions
+
+
+def to_markdown(data):
+    machine = data["machine"]
+    summary = data["pipeline"]
+    stage_table = markdown_table(
+        ["stage", "calls", "total s", "ms per call"],
+        [(name, e["calls"], e["total_sec"], e["ms_per_call"]) for name, e in data["stages"].items()],
+    )
+    lines = [
+        f"# Pipeline overhead benchmark — WhisperFastGUI {machine['app_version']}",
+        "",
+        f"- Platform: {machine['platform']}, CPU cores: {machine['cpu_count']}, Python {machine['python']}",
+        f"- Files: {data['settings']['files']} × {data['settings']['duration_sec']} s, fake model: segment "
+        f"{data['settings']['segment_sec']} s, speed {data['settings']['speed'] or 'unlimited'}",
+        f"- Pipeline: {summary['wall_sec']} s wall, {summary['model_sec']} s model, "
+        f"**{summary['overhead_ms_per_file']} ms overhead per file**, peak RSS {summary['peak_rss_mb']} MB",
+        "- UI callbacks: " + ", ".join(f"{k} {v}" for k, v in sorted(summary["ui_callbacks"].items())),
+        "",
+        stage_table,
+    ]
+    if data.get("regressions") is not None:
+        lines += ["", "## Regressions vs baseline", ""]
+        if data["regressions"]:
+            lines.append(markdown_table(["stage", "baseline ms", "current ms", "change %"],
+                                        [(r["stage"], r["baseline_ms"], r["current_ms"], r["change_pct"])
+                                         for r in data["regressions"]]))
+        else:
+            lines.append("None.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline_overhead",
+                                     description=t("bench_overhead_description"))
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=2.0, help=t("bench_duration_help"))
+    parser.add_argument("--segment-sec", type=float, default=5.0)
+    parser.add_argument("--speed", type=float, default=0.0, help=t("bench_speed_help"))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--baseline", help=t("bench_baseline_help"))
+    parser.add_argument("-o", "--output-dir", help=t("bench_output_help"))
+    parser.add_argument("--keep", action="store_true", help=t("bench_keep_help"))
+    args = parser.parse_args(argv)
+
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        print(t("bench_ffmpeg_missing"))
+        return 2
+    install_fake_model(args.segment_sec, args.speed)
+    work_dir = tempfile.mkdtemp(prefix="whisperfast_bench_")
+    try:
+        _isolate_caches(work_dir)
+        timer = StageTimer()
+        paths = _timed(timer, "generate_files", generate_files, work_dir, max(1, args.files), max(0.1, args.duration))
+        rows = measure_queue(timer, paths, work_dir)
+        summary = measure_pipeline(timer, rows, work_dir, max(1, args.batch_size))
+    finally:
+        if args.keep:
+            print(work_dir)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    stages = stage_rows(timer)
+    data = {
+        "suite": "pipeline_overhead",
+        "machine": machine_info(),
+        "settings": {"files": args.files, "duration_sec": args.duration, "segment_sec": args.segment_sec,
+                     "speed": args.speed, "batch_size": args.batch_size},
+        "pipeline": summary,
+        "stages": stages,
+        "regressions": None,
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            data["regressions"] = find_regressions(stages, summary, json.load(f))
+    json_path, md_path = write_report(report_name("pipeline_overhead"), data, to_markdown(data), args.output_dir)
+    print(t("bench_report_written", json=json_path, md=md_path))
+    for r in data["regressions"] or []:
+        print(t("bench_regression", stage=r["stage"], baseline=r["baseline_ms"], current=r["current_ms"]))
+    return 1 if data["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
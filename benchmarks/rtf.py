@@ -0,0 +1,189 @@
+"""
+Скорость моделей и движков на фиксированном наборе фрагментов:
+
+    python -m benchmarks.rtf [--models ...] [--engines ...] [-d CPU] [--lengths 10 60 300]
+
+Фрагменты: звук из каталога программы (m.mp3), синтетический речеподобный сигнал и тишина заданных длин
+(генерируются детерминированно, без файлов). Берутся только модели, уже лежащие в кэше Hugging Face
+(загрузка с local_files_only — без сети). Для каждой модели и движка: время загрузки, время до первого сегмента,
+коэффициент реального времени (RTF = время работы / длительность звука), пиковая память процесса, сегментов в секунду.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+import numpy as np
+
+from config import (
+    WHISPER_MODELS, DEVICE_MODES, ENGINE_MODES, DEFAULT_BATCH_SIZE, WHISPER_SAMPLE_RATE, BENCH_CLIP_LENGTHS_S,
+    get_whisper_cache_dir, find_whisper_model_cache_path,
+)
+from utils import bundled_sound_path, get_audio_duration_seconds
+from i18n import t
+from benchmarks.common import PeakMemorySampler, machine_info, markdown_table, write_report, report_name
+
+
+def synthetic_speech(seconds, sample_rate=WHISPER_SAMPLE_RATE, seed=0):
+    """
+    Речеподобный сигнал: гармоники основного тона ~120 Гц с плавающей высотой, огибающая ~4 слога/с,
+    паузы между «фразами» и слабый шум. Не настоящая речь — нагрузка на VAD и декодер, а не на точность.
+    """
+    rng = np.random.default_rng(seed)
+    t_axis = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 120.0 + 20.0 * np.sin(2 * np.pi * 0.5 * t_axis)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4.0 * t_axis), 0.0, None) ** 2
+    phrases = np.sin(2 * np.pi * 0.2 * t_axis) > -0.6
+    signal = 0.3 * voiced * envelope * phrases + 0.02 * rng.standard_normal(len(t_axis)) * envelope
+    peak = float(np.max(np.abs(signal))) or 1.0
+    return (signal / peak * 0.5).astype(np.float32)
+
+
+def silence(seconds, sample_rate=WHISPER_SAMPLE_RATE, seed=0):
+    """Тишина с едва заметным шумом (как у реальной записи без речи)."""
+    rng = np.random.default_rng(seed)
+    return (1e-4 * rng.standard_normal(int(seconds * sample_rate))).astype(np.float32)
+
+
+def build_clips(lengths):
+    """[(имя, массив)] — m.mp3 (если есть и ffmpeg его читает), затем синтетическая речь и тишина каждой длины."""
+    clips = []
+    sound = bundled_sound_path()
+    if sound:
+        from audio_io import decode_audio_range
+        duration = get_audio_duration_seconds(sound)
+        if duration > 0:
+            try:
+                clips.append((os.path.basename(sound), decode_audio_range(sound, 0.0, duration)))
+            except OSError:
+                pass
+    for seconds in lengths:
+        clips.append((f"speech_{int(seconds)}s", synthetic_speech(seconds)))
+    for seconds in lengths:
+        clips.append((f"silence_{int(seconds)}s", silence(seconds)))
+    return clips
+
+
+def cached_models(names=None):
+    """Модели из WHISPER_MODELS (или names), уже загруженные в кэш Hugging Face."""
+    cache_root = get_whisper_cache_dir()
+    return [name for name in (names or WHISPER_MODELS) if find_whisper_model_cache_path(cache_root, name)]
+
+
+def measure_clip(model, audio, engine_mode, language, batch_size):
+    """Один прогон: время до первого сегмента, общее время, число сегментов, пиковая память."""
+    from transcriber import transcribe_array, resolve_engine
+
+    audio_sec = len(audio) / float(WHISPER_SAMPLE_RATE)
+    engine = resolve_engine(engine_mode, audio_sec)
+    count = 0
+    first_segment = None
+    with PeakMemorySampler() as memory:
+        started = time.perf_counter()
+        segments, _ = transcribe_array(model, audio, language, engine=engine, batch_size=batch_size)
+        for _ in segments:
+            if first_segment is None:
+                first_segment = time.perf_counter() - started
+            count += 1
+        elapsed = max(time.perf_counter() - started, 1e-6)
+    return {
+        "engine": engine,
+        "audio_sec": round(audio_sec, 2),
+        "first_segment_sec": None if first_segment is None else round(first_segment, 3),
+        "elapsed_sec": round(elapsed, 3),
+        "rtf": round(elapsed / audio_sec, 4) if audio_sec else None,
+        "segments": count,
+        "segments_per_sec": round(count / elapsed, 2),
+        "peak_rss_mb": memory.peak_mb,
+    }
+
+
+def run(models, engines, device_mode, lengths, language, batch_size, log=print):
+    """Прогоняет все фрагменты через каждую модель и движок; возвращает данные отчёта (dict)."""
+    from faster_whisper import WhisperModel
+    from model_manager import WhisperModelSingleton
+
+    clips = build_clips(lengths)
+    results, skipped = [], []
+    for name in models:
+        device, compute, load_options = WhisperModelSingleton.resolve_load_options(device_mode, name)
+        model = None
+        try:
+            with PeakMemorySampler() as memory:
+                started = time.perf_counter()
+                model = WhisperModel(name, device=device, compute_type=compute, local_files_only=True, **load_options)
+                load_sec = time.perf_counter() - started
+            # Короткий прогон до замеров: первая транскрибация включает ленивую инициализацию
+            list(model.transcribe(silence(1.0), language=language)[0])
+        except Exception as e:
+            skipped.append({"model": name, "reason": str(e)})
+            log(t("bench_model_skipped", model=name, error=str(e)))
+            continue
+        for engine_mode in engines:
+            for clip_name, audio in clips:
+                result = measure_clip(model, audio, engine_mode, language, batch_size)
+                result.update({"model": name, "device": device, "compute_type": compute, "engine_mode": engine_mode,
+                               "clip": clip_name, "load_sec": round(load_sec, 3), "load_peak_rss_mb": memory.peak_mb})
+                results.append(result)
+                log(f"{name:16} {engine_mode:10} {clip_name:14} RTF {result['rtf']}  "
+                    f"first {result['first_segment_sec']} s  {result['segments_per_sec']} seg/s")
+        model = None
+        gc.collect()
+    return {
+        "suite": "rtf",
+        "machine": machine_info(),
+        "settings": {"device_mode": device_mode, "engines": list(engines), "lengths_sec": list(lengths),
+                     "language": language, "batch_size": batch_size},
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def to_markdown(data):
+    headers = ["model", "engine", "clip", "audio s", "load s", "first segment s", "elapsed s", "RTF",
+               "segments/s", "peak RSS MB"]
+    # Движок: выбранный режим и, если отличается, фактический (фрагменты короче BATCHED_MIN_DURATION_S — последовательно)
+    rows = [(r["model"], r["engine_mode"] if r["engine"] == r["engine_mode"] else f"{r['engine_mode']} → {r['engine']}",
+             r["clip"], r["audio_sec"], r["load_sec"], r["first_segment_sec"],
+             r["elapsed_sec"], r["rtf"], r["segments_per_sec"], r["peak_rss_mb"]) for r in data["results"]]
+    machine = data["machine"]
+    lines = [
+        f"# RTF benchmark — WhisperFastGUI {machine['app_version']}",
+        "",
+        f"- Platform: {machine['platform']}, CPU cores: {machine['cpu_count']}, Python {machine['python']}",
+        "- Libraries: " + ", ".join(f"{k} {v}" for k, v in machine["libraries"].items()),
+        f"- Device mode: {data['settings']['device_mode']}, language: {data['settings']['language']}",
+        "",
+        markdown_table(headers, rows),
+    ]
+    if data["skipped"]:
+        lines += ["", "Skipped: " + ", ".join(f"{s['model']} ({s['reason']})" for s in data["skipped"])]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.rtf", description=t("bench_rtf_description"))
+    parser.add_argument("--models", nargs="+", choices=WHISPER_MODELS, help=t("bench_models_help"))
+    parser.add_argument("--engines", nargs="+", choices=ENGINE_MODES, default=list(ENGINE_MODES))
+    parser.add_argument("-d", "--device", default="CPU", type=str.upper, choices=DEVICE_MODES)
+    parser.add_argument("--lengths", nargs="+", type=float, default=list(BENCH_CLIP_LENGTHS_S))
+    parser.add_argument("-l", "--language", default="en")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("-o", "--output-dir", help=t("bench_output_help"))
+    args = parser.parse_args(argv)
+
+    models = cached_models(args.models)
+    if not models:
+        print(t("bench_no_models", cache_dir=get_whisper_cache_dir()))
+        return 2
+    data = run(models, args.engines, args.device, args.lengths, args.language, max(1, args.batch_size))
+    json_path, md_path = write_report(report_name("rtf"), data, to_markdown(data), args.output_dir)
+    print(t("bench_report_written", json=json_path, md=md_path))
+    return 0 if data["results"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Контрольные точки заданий для продолжения транскрибации после отмены или перезапуска.
+Для файла в работе хранится JSON в каталоге checkpoints рядом с request_queue.json (BASE_DIR):
+путь и диапазон задания, размер и время изменения исходного файла, параметры (модель, устройство, точность,
+язык, движок, VAD), момент конца последнего записанного сегмента и состояние писателя TXT/SRT
+(output_writers.TranscriptWriter.state). Файл удаляется после успешного завершения.
+"""
+import hashlib
+import json
+import os
+import time
+
+from config import BASE_DIR, CHECKPOINT_DIR
+from output_writers import PART_SUFFIX
+
+_checkpoint_dir = os.path.join(BASE_DIR, CHECKPOINT_DIR)
+
+
+def _checkpoint_path(path, start_sec, end_sec):
+    job = f"{os.path.normcase(os.path.abspath(path))}|{round(start_sec, 3)}|{round(end_sec, 3)}"
+    return os.path.join(_checkpoint_dir, hashlib.sha256(job.encode("utf-8")).hexdigest() + ".json")
+
+
+def _source_signature(path):
+    """Размер и время изменения исходного файла: замена или правка файла по тому же пути делает точку устаревшей."""
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_checkpoint(path, start_sec, end_sec, options, txt_path, srt_path):
+    """
+    Контрольная точка задания, если по ней можно продолжить: тот же исходный файл (размер и mtime),
+    те же параметры options, те же выходные файлы и файлы *.part не короче сохранённых позиций.
+    Иначе None (устаревшая точка удаляется).
+    """
+    ckpt_path = _checkpoint_path(path, start_sec, end_sec)
+    try:
+        with open(ckpt_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        writer = data["writer"]
+        valid = (
+            data.get("source") == _source_signature(path)
+            and data.get("options") == options
+            and data.get("txt_path") == txt_path
+            and data.get("srt_path") == srt_path
+            and os.path.getsize(txt_path + PART_SUFFIX) >= writer["txt_bytes"]
+            and os.path.getsize(srt_path + PART_SUFFIX) >= writer["srt_bytes"]
+            and start_sec <= data["resume_sec"] < end_sec
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        valid = False
+        data = None
+    if not valid:
+        if data is not None:
+            remove_checkpoint(path, start_sec, end_sec)
+        return None
+    return data
+
+
+def save_checkpoint(path, start_sec, end_sec, options, writer):
+    """Записывает контрольную точку по текущему состоянию писателя (через временный файл и os.replace)."""
+    state = writer.state()
+    if not state["count"]:
+        return
+    try:
+        source = _source_signature(path)
+    except OSError:
+        return
+    data = {
+        "path": path,
+        "source": source,
+        "start_sec": start_sec,
+        "end_sec": end_sec,
+        "options": options,
+        "txt_path": writer.txt_path,
+        "srt_path": writer.srt_path,
+        "resume_sec": state["last_end"],
+        "writer": state,
+        "updated": time.time(),
+    }
+    ckpt_path = _checkpoint_path(path, start_sec, end_sec)
+    tmp_path = ckpt_path + ".tmp"
+    try:
+        os.makedirs(_checkpoint_dir, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, ckpt_path)
+    except OSError:
+        pass
+
+
+def remove_checkpoint(path, start_sec, end_sec):
+    try:
+        os.remove(_checkpoint_path(path, start_sec, end_sec))
+    except OSError:
+        pass
@@ -0,0 +1,118 @@
+"""
+Разбиение длинного файла на части для параллельной транскрибации несколькими воркерами.
+Границы частей ставятся в паузах речи рядом с целевой длиной части, чтобы не резать слова:
+вокруг каждой целевой границы декодируется короткое окно и в нём ищутся паузы (Silero VAD из faster-whisper,
+при его отсутствии — по энергии сигнала). Сегменты частей затем сшиваются со смещением начала части.
+"""
+import numpy as np
+
+from config import WHISPER_SAMPLE_RATE, CHUNK_SEARCH_WINDOW_S, CHUNK_MIN_SILENCE_S
+from audio_io import decode_audio_range
+
+# Длина кадра (сек) для поиска пауз по энергии, если VAD недоступен
+_ENERGY_FRAME_S = 0.03
+
+
+def _speech_regions_vad(audio):
+    """Участки речи [(start, end), ...] в секундах через Silero VAD faster-whisper; None — VAD недоступен."""
+    try:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+    except ImportError:
+        return None
+    stamps = get_speech_timestamps(audio, VadOptions())
+    return [(s["start"] / WHISPER_SAMPLE_RATE, s["end"] / WHISPER_SAMPLE_RATE) for s in stamps]
+
+
+def _speech_regions_energy(audio):
+    """Участки «речи» по энергии кадров: всё, что громче 10% медианной энергии окна."""
+    frame = max(1, int(_ENERGY_FRAME_S * WHISPER_SAMPLE_RATE))
+    n = len(audio) // frame
+    if n == 0:
+        return []
+    energy = np.sqrt(np.mean(audio[:n * frame].reshape(n, frame) ** 2, axis=1))
+    threshold = max(float(np.median(energy)) * 0.1, 1e-4)
+    regions = []
+    start = None
+    for i, loud in enumerate(energy > threshold):
+        if loud and start is None:
+            start = i
+        elif not loud and start is not None:
+            regions.append((start * _ENERGY_FRAME_S, i * _ENERGY_FRAME_S))
+            start = None
+    if start is not None:
+        regions.append((start * _ENERGY_FRAME_S, n * _ENERGY_FRAME_S))
+    return regions
+
+
+def silence_gaps(speech, length_sec):
+    """Паузы [(start, end), ...] между участками речи speech в окне длиной length_sec."""
+    gaps = []
+    pos = 0.0
+    for s, e in sorted(speech):
+        if s > pos:
+            gaps.append((pos, s))
+        pos = max(pos, e)
+    if pos < length_sec:
+        gaps.append((pos, length_sec))
+    return gaps
+
+
+def pick_cut(gaps, center_sec, min_silence_sec=CHUNK_MIN_SILENCE_S):
+    """
+    Точка разреза в окне: середина паузы не короче min_silence_sec, ближайшей к center_sec;
+    если таких нет — середина самой длинной паузы; без пауз — center_sec.
+    """
+    long_gaps = [g for g in gaps if g[1] - g[0] >= min_silence_sec]
+    if long_gaps:
+        gap = min(long_gaps, key=lambda g: abs((g[0] + g[1]) / 2 - center_sec))
+    elif gaps:
+        gap = max(gaps, key=lambda g: g[1] - g[0])
+    else:
+        return center_sec
+    return (gap[0] + gap[1]) / 2
+
+
+def find_cut_point(path, target_sec, window_sec=CHUNK_SEARCH_WINDOW_S):
+    """Момент (сек от начала файла) в паузе речи рядом с target_sec; декодируется только окно ±window_sec."""
+    win_start = max(0.0, target_sec - window_sec)
+    audio = decode_audio_range(path, win_start, target_sec + window_sec)
+    length = len(audio) / WHISPER_SAMPLE_RATE
+    if length <= 0:
+        return target_sec
+    speech = _speech_regions_vad(audio)
+    if speech is None:
+        speech = _speech_regions_energy(audio)
+    return win_start + pick_cut(silence_gaps(speech, length), target_sec - win_start)
+
+
+def plan_chunks(path, start_sec, end_sec, target_sec):
+    """
+    Части [(start, end), ...] диапазона [start_sec, end_sec] длиной около target_sec с границами в паузах.
+    Диапазон короче двух целевых длин не делится. OSError — ffmpeg не смог декодировать окно.
+    """
+    span = end_sec - start_sec
+    parts = int(round(span / target_sec)) if target_sec > 0 else 1
+    if parts < 2:
+        return [(start_sec, end_sec)]
+    step = span / parts
+    cuts = []
+    for k in range(1, parts):
+        cut = find_cut_point(path, start_sec + k * step)
+        # Границы строго возрастают и не выходят за диапазон, даже если пауза нашлась у края окна
+        low = cuts[-1] if cuts else start_sec
+        if low < cut < end_sec:
+            cuts.append(cut)
+    bounds = [start_sec] + cuts + [end_sec]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def stitch_segments(parts, range_start_sec):
+    """
+    Сшивает сегменты частей: parts — [(chunk_start_sec, [(start, end, text), ...]), ...] (времена относительно
+    начала части). Возвращает один список сегментов с временами относительно range_start_sec.
+    """
+    stitched = []
+    for chunk_start, segments in sorted(parts, key=lambda p: p[0]):
+        offset = chunk_start - range_start_sec
+        stitched.extend((s + offset, e + offset, text) for s, e, text in segments)
+    return stitched
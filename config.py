@@ -19,13 +19,98 @@ WHISPER_MODELS = [
     "large-v1", "large-v2", "large-v3", "large-v3-turbo",
     "distil-large-v3",
 ]
+# Постоянный кэш метаданных медиафайлов (в BASE_DIR) и его предельный размер (записей)
+MEDIA_CACHE_FILE = "media_cache.json"
+MEDIA_CACHE_MAX_ENTRIES = 20000
+# Кэш результатов транскрибации (каталог в BASE_DIR) и его предельный размер по умолчанию (МБ; 0 — выключен)
+RESULT_CACHE_DIR = "result_cache"
+DEFAULT_RESULT_CACHE_MAX_MB = 500
+# Контрольные точки заданий (каталог в BASE_DIR рядом с request_queue.json) и период их записи (сек)
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_INTERVAL_S = 10.0
+# Телеметрия обработки (metrics.py): журнал по файлам в BASE_DIR рядом с request_queue.json, его предельный размер
+# (байт) и число старых частей при ротации (metrics.jsonl.1 … .N)
+METRICS_LOG_FILE = "metrics.jsonl"
+METRICS_LOG_MAX_BYTES = 5 * 1024 * 1024
+METRICS_LOG_BACKUPS = 3
+# Файл метрик Prometheus для textfile collector node_exporter (metrics_textfile в settings.json): период перезаписи (сек)
+METRICS_TEXTFILE_INTERVAL_S = 15
+# Прогрев модели при предзагрузке (preload_model в settings.json): длина фрагмента звука из каталога программы (сек)
+PRELOAD_WARMUP_S = 2.0
+# Кэш загруженных моделей (model_manager): бюджет памяти по умолчанию (МБ; model_cache_max_mb в settings.json,
+# 0 — одна модель). Память модели оценивается как число параметров (млн) × байт на параметр при данной точности
+DEFAULT_MODEL_CACHE_MAX_MB = 6144
+WHISPER_MODEL_PARAMS_M = {
+    "tiny": 39, "base": 74, "small": 244, "medium": 769,
+    "large-v1": 1550, "large-v2": 1550, "large-v3": 1550, "large-v3-turbo": 809,
+    "distil-large-v3": 756,
+}
+COMPUTE_TYPE_BYTES = {"float32": 4, "float16": 2, "int8_float32": 1, "int8_float16": 1, "int8": 1}
+# Пул воркеров на GPU: каждый воркер держит в видеопамяти свою копию модели; к её оценке добавляется запас
+# на активации и буферы CTranslate2 (МБ) — столько воркеров, сколько копий помещается в свободную видеопамять
+GPU_WORKER_OVERHEAD_MB = 1024
+# Автонастройка (autotune.py, python -m whisperfast tune): точности для перебора по устройству, варианты num_workers,
+# длина эталонного фрагмента (сек) и допуск, в пределах которого выбирается более «дешёвая» комбинация
+AUTOTUNE_COMPUTE_TYPES = {"cpu": ("int8", "int8_float32", "float32"), "cuda": ("float16", "int8_float16", "int8")}
+AUTOTUNE_NUM_WORKERS = (1, 2)
+AUTOTUNE_CLIP_S = 30.0
+AUTOTUNE_TOLERANCE = 0.03
+# Замеры производительности (пакет benchmarks): каталог отчётов (в BASE_DIR) и длины синтетических фрагментов (сек)
+BENCHMARK_DIR = "benchmark_results"
+BENCH_CLIP_LENGTHS_S = (10.0, 60.0, 300.0)
+# Сравнение с базовым отчётом (benchmarks.pipeline_overhead --baseline): этап считается замедлившимся, если стал
+# медленнее больше чем на долю BENCH_REGRESSION_TOLERANCE и больше чем на BENCH_REGRESSION_MIN_MS мс на вызов (шум)
+BENCH_REGRESSION_TOLERANCE = 0.25
+BENCH_REGRESSION_MIN_MS = 0.05
+# Выгрузка моделей после простоя: минут без обработки очереди по умолчанию (model_idle_unload_min в settings.json,
+# 0 — не выгружать) и период проверки (сек)
+DEFAULT_MODEL_IDLE_UNLOAD_MIN = 30
+MODEL_IDLE_CHECK_INTERVAL_S = 60
+# Модули, которые GUI не импортирует при запуске, а догружает в фоновом потоке после показа окна
+DEFERRED_IMPORT_MODULES = ("pipeline", "faster_whisper", "torch")
+# Зависимости, наличие которых проверяется при запуске по метаданным импорта (importlib.util.find_spec), без импорта
+REQUIRED_MODULES = ("pydub", "faster_whisper", "torch")
+# Бюджет запуска для main.py --profile-startup: время до первого простоя главного цикла (сек) и модули,
+# которых не должно быть в sys.modules к этому моменту; отчёт пишется в STARTUP_PROFILE_FILE (в BASE_DIR)
+STARTUP_BUDGET_S = 1.5
+STARTUP_FORBIDDEN_MODULES = ("pipeline", "faster_whisper", "ctranslate2", "torch", "numpy", "pydub", "pygame")
+STARTUP_PROFILE_FILE = "startup_profile.json"
+# Локальный HTTP API заданий (job_server.py): адрес по умолчанию, каталог загруженных файлов (в BASE_DIR),
+# предельный размер загрузки (МБ) и число завершённых заданий, которые хранятся в памяти для запросов статуса
+DEFAULT_API_HOST = "127.0.0.1"
+DEFAULT_API_PORT = 8765
+API_UPLOAD_DIR = "api_uploads"
+API_MAX_UPLOAD_MB = 2048
+API_MAX_FINISHED_JOBS = 500
+# Фоновое определение длительности при добавлении файлов: число потоков ffprobe
+# (готовые результаты применяются к таблице пачкой раз в тик выборки событий UI)
+PROBE_MAX_WORKERS = min(8, os.cpu_count() or 1)
 # Значение по умолчанию для поля «Начало» в очереди
 DEFAULT_START_TIMESTAMP = "00:00:00,000"
 # Ключи элемента очереди (единая схема для gui и input_files)
-QUEUE_ITEM_KEYS = ("path", "start", "end_segment_1", "end_segment_2", "end", "processed")
+QUEUE_ITEM_KEYS = ("path", "start", "end_segment_1", "end_segment_2", "end", "duration", "processed")
 # Интервалы обновления UI в process_queue (секунды)
 PROGRESS_UPDATE_INTERVAL_S = 0.1
 LOG_UPDATE_INTERVAL_S = 0.5
+# Частота дискретизации входа модели Whisper (Гц); отрезки декодируются ffmpeg сразу в этот формат
+WHISPER_SAMPLE_RATE = 16000
+# Режимы выбора устройства (переключатель в GUI, --device в консольном режиме)
+DEVICE_MODES = ("AUTO", "GPU", "CPU")
+# Режимы движка транскрибации: последовательный декодер WhisperModel или BatchedInferencePipeline
+ENGINE_MODES = ("sequential", "batched")
+DEFAULT_ENGINE_MODE = "sequential"
+DEFAULT_BATCH_SIZE = 8
+# Файлы (отрезки) короче порога (сек) в режиме «batched» обрабатываются последовательно — батчинг не даёт выигрыша
+BATCHED_MIN_DURATION_S = 60.0
+# Параллельная обработка очереди: число процессов-воркеров по умолчанию (1 — последовательно, одна модель)
+DEFAULT_PARALLEL_WORKERS = 1
+# Деление длинного файла на части между воркерами: целевая длина части (сек), полуширина окна поиска паузы
+# вокруг каждой границы (сек) и минимальная длина паузы (сек), в которой можно резать
+DEFAULT_CHUNK_TARGET_S = 600.0
+CHUNK_SEARCH_WINDOW_S = 30.0
+CHUNK_MIN_SILENCE_S = 0.3
+# Интервал (сек) сводной строки лога о прогрессе воркеров
+WORKER_STATUS_LOG_INTERVAL_S = 5.0
 # Порог (сек): считаем обработку «отрезком» файла, если start >= EPS или (duration - end) >= EPS
 FULL_VIDEO_SEGMENT_EPS_S = 0.5
 # Пакети, для которых проверяются обновления при нажатии кнопки «Обновления»
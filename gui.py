@@ -1,96 +1,44 @@
-import json
+import importlib
 import os
-import re
 import subprocess
 import sys
-import tempfile
 import threading
 import time
 import traceback
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 
-# Импорт pydub с обработкой ошибок для Python 3.13+
-try:
-    from pydub import AudioSegment
-except ImportError as e:
-    if "audioop" in str(e) or "pyaudioop" in str(e):
-        # Импортируем lang_manager для перевода (если доступен)
-        try:
-            from lang_manager import t
-            error_msg = (
-                f"{t('error')}: Не удалось импортировать pydub.\n\n"
-                f"Для Python {sys.version_info.major}.{sys.version_info.minor} требуется pyaudioop.\n\n"
-                f"Установите его командой:\n"
-                f"pip install pyaudioop\n\n"
-                f"Или используйте кнопку [{t('dependencies')}] для автоматической установки."
-            )
-            error_title = t("error")
-        except ImportError:
-            from i18n_fallback import t
-            error_msg = (
-                f"{t('error')}: Не удалось импортировать pydub.\n\n"
-                f"Для Python {sys.version_info.major}.{sys.version_info.minor} требуется pyaudioop.\n\n"
-                f"Установите его командой:\n pip install pyaudioop\n\n"
-                f"Или используйте кнопку [{t('dependencies')}] для автоматической установки."
-            )
-            error_title = t("error")
-        from tkinter import messagebox as mb
-        mb.showerror(error_title, error_msg)
-        sys.exit(1)
-    else:
-        raise
-
-# На Windows pydub запускает ffmpeg/ffprobe через subprocess.Popen.
-# Патчим вызов, чтобы дочерние процессы не открывали консольные окна.
-if sys.platform == "win32":
-    try:
-        import pydub.audio_segment as _pydub_audio_segment
-        if not getattr(_pydub_audio_segment, "_wf_no_window_patch", False):
-            _orig_pydub_popen = _pydub_audio_segment.subprocess.Popen
-
-            def _pydub_popen_no_window(*args, **kwargs):
-                kwargs["creationflags"] = kwargs.get("creationflags", 0) | getattr(subprocess, "CREATE_NO_WINDOW", 0)
-                return _orig_pydub_popen(*args, **kwargs)
-
-            _pydub_audio_segment.subprocess.Popen = _pydub_popen_no_window
-            _pydub_audio_segment._wf_no_window_patch = True
-    except Exception:
-        pass
-
 # Импорт модулей проекта
 from config import (
     APP_VERSION, APP_DATE, BASE_DIR, load_help_text,
     LANG_AUTO_VALUE, SUPPORTED_LANGUAGES, VALID_EXTS,
-    AUDIO_EXTENSIONS, DEFAULT_START_TIMESTAMP, DEFAULT_MODEL,
+    DEFAULT_START_TIMESTAMP, DEFAULT_MODEL,
     WHISPER_MODELS, get_whisper_cache_dir, find_whisper_model_cache_path,
-    PROGRESS_UPDATE_INTERVAL_S, LOG_UPDATE_INTERVAL_S, FULL_VIDEO_SEGMENT_EPS_S,
-)
-from utils import (
-    format_timestamp, format_timestamp_srt, format_timestamp_filename,
-    play_finish_sound, get_audio_duration_seconds, parse_timestamp_to_seconds,
-    make_queue_item, normalize_queue_path,
+    DEFAULT_PARALLEL_WORKERS, DEVICE_MODES,
+    ENGINE_MODES, DEFAULT_ENGINE_MODE, DEFAULT_BATCH_SIZE, DEFAULT_RESULT_CACHE_MAX_MB,
+    DEFAULT_CHUNK_TARGET_S, DEFAULT_API_HOST, DEFAULT_API_PORT, DEFERRED_IMPORT_MODULES,
+    DEFAULT_MODEL_IDLE_UNLOAD_MIN, MODEL_IDLE_CHECK_INTERVAL_S, METRICS_LOG_FILE, METRICS_TEXTFILE_INTERVAL_S,
 )
+from utils import play_finish_sound, make_queue_item, load_queue_file, save_queue_file, bundled_sound_path
 from model_manager import WhisperModelSingleton
+from result_cache import TranscriptionResultCache
+from metrics import prometheus_registry, write_prometheus_textfile
+from ui_events import UiEventChannel
+from startup_profile import phase as startup_phase, mark as startup_mark
 from installer import install_dependencies, check_system, check_updates
 from input_files import (
     add_multiple_files,
     add_directory,
     process_dropped_files,
-    add_files_to_queue_controller
+    add_files_to_queue_controller,
+    queue_row_values,
+    revalidate_queue_async,
 )
 from i18n import t, set_language, get_language
 from lang_manager import load_app_settings, save_app_settings
 
 
-class _SegmentOffset:
-    """Сегмент с полями start, end, text (для смещения времени при обработке куска файла)."""
-    __slots__ = ("start", "end", "text")
-    def __init__(self, start, end, text):
-        self.start = start
-        self.end = end
-        self.text = text
-
 # Попытка импорта Drag & Drop
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD
@@ -118,6 +66,7 @@ UI_DESIGN_WIDTH = 1050
 UI_MIN_SCALE = 0.5
 UI_BASE_FONT_SIZE = 9
 LOG_MAX_LINES = 10000  # ограничение размера лога для длинных сессий
+UI_POLL_INTERVAL_MS = 100  # период выборки событий фоновых потоков и вывода накопленных строк лога
 
 
 class Tooltip:
@@ -186,6 +135,7 @@ class Tooltip:
 
 class WhisperGUI:
     def __init__(self, root, on_close_request=None, on_close_factory=None):
+        self._init_started = time.time()  # для строки лога «время до готовности интерфейса»
         self.root = root
         # callback для закрытия из трея или по X; можно задать напрямую или через factory(root, app)
         if on_close_factory is not None:
@@ -211,6 +161,10 @@ class WhisperGUI:
         self._request_queue_file = os.path.join(BASE_DIR, "request_queue.json")
         self.cancel_requested = False
         self._process_queue_lock = threading.Lock()  # только одна обработка очереди одновременно
+        # Строки лога из любых потоков — в кольцевой буфер, остальные обновления интерфейса — в канал событий;
+        # и то и другое раз в UI_POLL_INTERVAL_MS забирает главный поток (_poll_ui_events)
+        self._log_buffer = deque(maxlen=LOG_MAX_LINES)
+        self._ui_events = UiEventChannel()
         
         # Переменные интерфейса
         self.device_mode = tk.StringVar(value="AUTO")
@@ -226,6 +180,17 @@ class WhisperGUI:
         self.save_audio_mp3 = tk.BooleanVar(value=False)  # Сохранять извлечённое аудио в MP3
         self.tray_mode = tk.StringVar(value="panel")  # "panel" | "tray" | "panel_tray"
         self.whisper_model = tk.StringVar(value=DEFAULT_MODEL)
+        self.parallel_workers = DEFAULT_PARALLEL_WORKERS  # число процессов-воркеров (только settings.json)
+        self.engine_mode = tk.StringVar(value=DEFAULT_ENGINE_MODE)  # "sequential" | "batched"
+        self.batch_size = tk.IntVar(value=DEFAULT_BATCH_SIZE)
+        self.queue_revalidate_on_start = True  # фоновая проверка файлов очереди при запуске (только settings.json)
+        self.chunk_long_files = False  # делить длинные файлы на части между воркерами (только settings.json)
+        self.chunk_target_sec = DEFAULT_CHUNK_TARGET_S
+        self.preload_model = False  # загрузка модели в фоне после показа окна (только settings.json)
+        self.model_idle_unload_min = DEFAULT_MODEL_IDLE_UNLOAD_MIN  # выгрузка модели после простоя (только settings.json)
+        self.metrics_log_enabled = True  # телеметрия по файлам в metrics.jsonl (только settings.json)
+        self.metrics_textfile = ""  # файл метрик Prometheus для node_exporter (только settings.json)
+        self._metrics_textfile_failed = False
         
         # Загружаем сохранённые налаштування з settings.json
         saved = load_app_settings()
@@ -238,6 +203,37 @@ class WhisperGUI:
         self.save_audio_mp3.set(bool(saved.get("save_audio_mp3", False)))
         self.tray_mode.set(saved.get("tray_mode", "panel"))
         self.whisper_model.set(saved.get("whisper_model", DEFAULT_MODEL) or DEFAULT_MODEL)
+        try:
+            self.parallel_workers = max(1, int(saved.get("parallel_workers", DEFAULT_PARALLEL_WORKERS)))
+        except (TypeError, ValueError):
+            self.parallel_workers = DEFAULT_PARALLEL_WORKERS
+        engine_mode = saved.get("engine_mode", DEFAULT_ENGINE_MODE)
+        self.engine_mode.set(engine_mode if engine_mode in ENGINE_MODES else DEFAULT_ENGINE_MODE)
+        try:
+            self.batch_size.set(max(1, int(saved.get("batch_size", DEFAULT_BATCH_SIZE))))
+        except (TypeError, ValueError):
+            self.batch_size.set(DEFAULT_BATCH_SIZE)
+        self.queue_revalidate_on_start = bool(saved.get("queue_revalidate_on_start", True))
+        self.chunk_long_files = bool(saved.get("chunk_long_files", False))
+        self.preload_model = bool(saved.get("preload_model", False))
+        self.metrics_log_enabled = bool(saved.get("metrics_log_enabled", True))
+        textfile = (saved.get("metrics_textfile") or "").strip()
+        self.metrics_textfile = os.path.join(BASE_DIR, textfile) if textfile else ""
+        # Бюджет памяти кэша загруженных моделей (только settings.json)
+        WhisperModelSingleton.configure(saved.get("model_cache_max_mb"))
+        try:
+            self.model_idle_unload_min = max(0, int(saved.get("model_idle_unload_min", DEFAULT_MODEL_IDLE_UNLOAD_MIN)))
+        except (TypeError, ValueError):
+            self.model_idle_unload_min = DEFAULT_MODEL_IDLE_UNLOAD_MIN
+        try:
+            self.chunk_target_sec = max(60.0, float(saved.get("chunk_target_sec", DEFAULT_CHUNK_TARGET_S)))
+        except (TypeError, ValueError):
+            self.chunk_target_sec = DEFAULT_CHUNK_TARGET_S
+        # Кэш результатов транскрибации (лимит размера — только settings.json)
+        self.result_cache = TranscriptionResultCache(max_mb=saved.get("result_cache_max_mb", DEFAULT_RESULT_CACHE_MAX_MB))
+        # Локальный HTTP API заданий (включается только в settings.json: api_enabled, api_host, api_port)
+        self.api_jobs = None
+        self.job_server = None
         
         # Загружаем сохраненный язык или используем EN по умолчанию
         self.ui_language = tk.StringVar(value=saved_language)  # Язык интерфейса
@@ -275,13 +271,37 @@ class WhisperGUI:
         if not DND_OK:
             self.log(t("warning_dnd"))
 
-        # Загрузка очереди из request_queue.json; при первом запуске создаём пустой файл
-        self._load_queue_from_file()
+        # Загрузка очереди из request_queue.json (без ffprobe); при первом запуске создаём пустой файл
+        queue_load_started = time.time()
+        with startup_phase("load_queue"):
+            self._load_queue_from_file()
+        queue_load_sec = time.time() - queue_load_started
         if not os.path.exists(self._request_queue_file):
             self._save_queue_to_file()
+        # Строка лога со временем до готовности — когда главный цикл Tk впервые простаивает
+        self.root.after_idle(lambda: self._log_startup_time(queue_load_sec))
+        # Библиотеки транскрибации догружаются в фоне, когда окно уже на экране
+        self.root.after_idle(self._import_deferred_modules_async)
+        self.root.after(UI_POLL_INTERVAL_MS, self._poll_ui_events)
+        if self.preload_model:
+            self.root.after_idle(self._preload_model_async)
+        if self.model_idle_unload_min > 0:
+            self.root.after(MODEL_IDLE_CHECK_INTERVAL_S * 1000, self._check_model_idle)
+
+        # Датчики Prometheus, которые вычисляются при каждом чтении метрик (GET /metrics, файл для node_exporter)
+        registry = prometheus_registry()
+        registry.set_function("whisperfast_queue_depth",
+                              lambda: sum(1 for item in list(self.queue) if not item.get("processed")))
+        registry.set_function("whisperfast_processing", lambda: int(self._process_queue_lock.locked()))
+        if self.metrics_textfile:
+            self.root.after_idle(self._write_metrics_textfile)
+
+        if saved.get("api_enabled"):
+            self._start_job_server(saved.get("api_host"), saved.get("api_port"))
 
         # Иконка в системном трее (зависит от переключателя Панель / Трей / Панель + Трей)
-        self._apply_tray_mode()
+        with startup_phase("tray_setup"):
+            self._apply_tray_mode()
 
     TRAY_MODE_KEYS = ("panel", "tray", "panel_tray")
 
@@ -310,10 +330,10 @@ class WhisperGUI:
             img = Image.new("RGBA", (width, height), (80, 80, 80, 255))
 
         def show_window(icon, item):
-            self.root.after(0, self._tray_show_window)
+            self._ui_events.post("tray_show")
 
         def quit_app(icon, item):
-            self.root.after(0, self._tray_quit)
+            self._ui_events.post("tray_quit")
 
         menu = pystray.Menu(
             TrayMenuItem(t("tray_show_window"), show_window, default=True),
@@ -355,40 +375,88 @@ class WhisperGUI:
             self._on_close_request()
 
     def _load_queue_from_file(self):
-        """Загружает очередь из request_queue.json и заполняет таблицу (использует make_queue_item и normalize_queue_path)."""
+        """
+        Загружает очередь из request_queue.json (utils.load_queue_file) и заполняет таблицу.
+        Строки строятся из сохранённых полей без ffprobe; элементы без сохранённого конца дозаполняются в фоне.
+        Если включено queue_revalidate_on_start — в фоне проверяются файлы, изменившиеся на диске.
+        """
         if not os.path.exists(self._request_queue_file):
             return
         try:
-            with open(self._request_queue_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not isinstance(data, list):
-                return
-            self.queue.clear()
-            for item in data:
-                path = normalize_queue_path(item.get("path"))
-                if not path or not os.path.isfile(path):
-                    continue
-                overrides = {
-                    "start": item.get("start") or DEFAULT_START_TIMESTAMP,
-                    "end_segment_1": item.get("end_segment_1") or "",
-                    "end_segment_2": item.get("end_segment_2") or "",
-                    "processed": item.get("processed", False),
-                }
-                if item.get("end"):
-                    overrides["end"] = item.get("end")
-                self.queue.append(make_queue_item(path, **overrides))
-            self._refresh_queue_treeview()
-        except (json.JSONDecodeError, OSError):
-            pass
+            queue = load_queue_file(self._request_queue_file)
+        except (ValueError, OSError):
+            return
+        self.queue[:] = queue
+        self._refresh_queue_treeview()
+        # Без проверки при запуске — в фоне определяется длительность только у элементов без сохранённого конца
+        revalidate_queue_async(self.queue, self.queue_list, self._ui_events, on_update=self._save_queue_to_file,
+                               log_func=self.log, only_missing=not self.queue_revalidate_on_start)
+
+    def _import_deferred_modules_async(self):
+        """
+        Импорт тяжёлых модулей (конвейер с numpy, faster-whisper, torch) в фоновом потоке после показа окна:
+        при запуске они не загружаются, а к первому «Старт» уже готовы. Ошибки импорта здесь не показываются —
+        отсутствующие зависимости проявятся при запуске обработки.
+        """
+        def worker():
+            for name in DEFERRED_IMPORT_MODULES:
+                try:
+                    importlib.import_module(name)
+                except Exception:
+                    pass
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _preload_model_async(self):
+        """
+        Предзагрузка (preload_model в settings.json): выбранная модель загружается и прогревается на m.mp3
+        в фоновом потоке, пока окно простаивает, — первый «Старт» сразу начинает распознавание.
+        Сэкономленное время пишется в лог при первом использовании модели (WhisperModelSingleton.get).
+        """
+        mode, name = self.device_mode.get(), self.whisper_model.get()
+        warmup_path = bundled_sound_path()
+
+        def worker():
+            try:
+                load_sec, warmup_sec = WhisperModelSingleton.preload(self.log, mode, name, warmup_path)
+            except Exception:
+                return  # ошибка уже в логе; при «Старт» модель загрузится заново
+            if load_sec:
+                self.log(t("model_preloaded", model=WhisperModelSingleton.resolve_model_name(name),
+                           load=f"{load_sec:.1f}", warmup=f"{warmup_sec:.1f}"))
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _check_model_idle(self):
+        """
+        Раз в MODEL_IDLE_CHECK_INTERVAL_S сек: если очередь не обрабатывается и модели не использовались
+        model_idle_unload_min минут — выгрузка в фоновом потоке (сбор мусора и очистка CUDA не блокируют окно).
+        """
+        if not self._process_queue_lock.locked():
+            threading.Thread(target=WhisperModelSingleton.unload_if_idle,
+                             args=(self.log, self.model_idle_unload_min * 60), daemon=True).start()
+        self.root.after(MODEL_IDLE_CHECK_INTERVAL_S * 1000, self._check_model_idle)
+
+    def _write_metrics_textfile(self):
+        """Раз в METRICS_TEXTFILE_INTERVAL_S сек перезаписывает файл метрик Prometheus (metrics_textfile в settings.json)."""
+        try:
+            write_prometheus_textfile(self.metrics_textfile)
+            self._metrics_textfile_failed = False
+        except OSError as e:
+            # Ошибка пишется в лог один раз, пока запись снова не получится
+            if not self._metrics_textfile_failed:
+                self.log(t("metrics_textfile_failed", path=self.metrics_textfile, error=str(e)))
+            self._metrics_textfile_failed = True
+        self.root.after(METRICS_TEXTFILE_INTERVAL_S * 1000, self._write_metrics_textfile)
+
+    def _log_startup_time(self, queue_load_sec):
+        """Пишет в лог время до готовности интерфейса и время восстановления очереди."""
+        startup_mark("first_idle")  # до фонового импорта: профиль запуска проверяет набор модулей на этот момент
+        self.log(t("startup_time", seconds=f"{time.time() - self._init_started:.2f}",
+                   count=len(self.queue), queue_ms=int(queue_load_sec * 1000)))
 
     def _save_queue_to_file(self):
         """Сохраняет очередь в request_queue.json."""
         try:
-            data = [{"path": q["path"], "start": q["start"], "end_segment_1": q.get("end_segment_1", ""),
-                    "end_segment_2": q.get("end_segment_2", ""), "end": q["end"],
-                    "processed": q.get("processed", False)} for q in self.queue]
-            with open(self._request_queue_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            save_queue_file(self._request_queue_file, self.queue)
         except OSError:
             pass
 
@@ -396,11 +464,7 @@ class WhisperGUI:
         """Перестраивает таблицу очереди по self.queue. Статус обработано/необработано — в отдельном столбце."""
         self.queue_list.delete(*self.queue_list.get_children())
         for i, q in enumerate(self.queue):
-            name = os.path.basename(q["path"])
-            status_text = t("status_processed") if q.get("processed") else t("status_not_processed")
-            self.queue_list.insert("", "end", values=(
-                i + 1, name, q["start"], q.get("end_segment_1", ""), q.get("end_segment_2", ""), q["end"], status_text
-            ))
+            self.queue_list.insert("", "end", values=queue_row_values(i + 1, q))
 
     def _on_queue_row_double_click(self, event):
         """Редактирование диапазона времени по двойному клику по строке."""
@@ -576,7 +640,7 @@ class WhisperGUI:
         ttk.Label(log_center, text=" | ").pack(side="left", padx=5)
         self.dev_f = ttk.LabelFrame(log_center, text=t("device_label"))
         self.dev_f.pack(side="left", padx=5)
-        for device in ["AUTO", "GPU", "CPU"]:
+        for device in DEVICE_MODES:
             ttk.Radiobutton(self.dev_f, text=device, variable=self.device_mode, value=device).pack(side="left", padx=5)
         self.system_btn = ttk.Button(log_center, text=t("system_check"), command=lambda: check_system(self.log))
         self.system_btn.pack(side="left", padx=2)
@@ -797,11 +861,13 @@ class WhisperGUI:
         if self.queue:
             self.start_thread(mode="all")
 
-    def start_thread(self, mode, target_idx=None):
+    def start_thread(self, mode, target_idx=None, target_paths=None):
         if not self._process_queue_lock.acquire(blocking=False):
             self.log("⚠ " + t("already_processing"))
             return
         self.cancel_requested = False
+        # Обработка (кнопка, каталог слежения, задания API) — активность: время простоя для выгрузки модели сбрасывается
+        WhisperModelSingleton.touch()
         self.start_btn.config(state="disabled")
         self.cancel_btn.config(state="normal")
         # Читаем Tk-переменные только в главном потоке и передаём в воркер
@@ -812,131 +878,60 @@ class WhisperGUI:
             "save_audio_mp3": self.save_audio_mp3.get(),
             "play_sound_on_finish": self.play_sound_on_finish.get(),
             "output_dir": (self.output_dir.get() or "").strip(),
+            "parallel_workers": self.parallel_workers,
+            "engine_mode": self.engine_mode.get(),
+            "batch_size": self._batch_size_value(),
+            "chunk_long_files": self.chunk_long_files,
+            "chunk_target_sec": self.chunk_target_sec,
         }
 
         def run_and_release():
             try:
-                self.process_queue(mode, target_idx, options)
+                self.process_queue(mode, target_idx, options, target_paths=target_paths)
             finally:
+                WhisperModelSingleton.touch()  # простой отсчитывается от конца обработки
                 self._process_queue_lock.release()
+                # Задания API, пришедшие во время обработки, запускаются следующим проходом
+                if self.api_jobs is not None:
+                    self._ui_events.post("api_run_finished")
         threading.Thread(target=run_and_release, daemon=True).start()
 
-    def process_queue(self, mode, target_idx, options=None):
+    def process_queue(self, mode, target_idx, options=None, target_paths=None):
+        """
+        Обработка очереди в фоновом потоке. mode: "single" (строка target_idx), "only_new", "all"
+        или "paths" (строки с путями target_paths — задания API).
+        """
         opts = options or {}
+        run_paths = []
         try:
-            model = WhisperModelSingleton.get(self.log, opts.get("device_mode", "AUTO"), opts.get("whisper_model", DEFAULT_MODEL))
             # Снимок очереди, чтобы индексы не выходили за границы при изменении очереди в GUI
             queue_snapshot = list(self.queue)
             if mode == "single":
                 indices = [target_idx]
             elif mode == "only_new":
                 indices = [i for i in range(len(queue_snapshot)) if not queue_snapshot[i].get("processed")]
+            elif mode == "paths":
+                wanted = set(target_paths or ())
+                indices = [i for i in range(len(queue_snapshot)) if queue_snapshot[i].get("path") in wanted]
             else:
                 indices = list(range(len(queue_snapshot)))
 
-            done = 0
             to_do = len(indices)
-            skipped_paths = []
-
-            for idx in indices:
+            rows = [queue_snapshot[i] for i in indices if 0 <= i < len(queue_snapshot)]
+            run_paths = [r.get("path") for r in rows]
+            if mode == "paths" and self.api_jobs is not None:
+                # Файл задания убрали из очереди до запуска — задание завершается с ошибкой
+                missing = set(target_paths or ()) - set(run_paths)
+                self.api_jobs.finish_unfinished(missing, "failed", error=t("api_job_not_in_queue"), include_queued=True)
+            done, skipped_paths = self._make_pipeline().run(rows, opts)
+            if self.api_jobs is not None:
                 if self.cancel_requested:
-                    break
-                if idx < 0 or idx >= len(queue_snapshot):
-                    continue
-                row = queue_snapshot[idx]
-                path = normalize_queue_path(row.get("path"))
-                if not path:
-                    continue
-                name = os.path.basename(path)
-                if not os.path.isfile(path):
-                    self.log(f"\n{t('processing', current=done + 1, total=to_do, name=name)}")
-                    self.log(t("file_skipped", name=name))
-                    skipped_paths.append(path)
-                    continue
-                self.log(f"\n{t('processing', current=done + 1, total=to_do, name=name)}")
-
-                try:
-                    start_sec = parse_timestamp_to_seconds(row.get("start")) or 0.0
-                    duration = get_audio_duration_seconds(path) or 1.0
-                    end_sec = parse_timestamp_to_seconds(row.get("end")) or duration
-                    end_sec = min(end_sec, duration)
-                    segment_duration = end_sec - start_sec if end_sec > start_sec else duration
-
-                    audio = None
-                    if opts.get("save_audio_mp3"):
-                        ext = os.path.splitext(path)[1].lower()
-                        is_audio_source = ext in AUDIO_EXTENSIONS
-                        if is_audio_source:
-                            choice = [None]
-                            def ask_save_mp3():
-                                choice[0] = messagebox.askyesno(
-                                    t("save_audio_mp3"),
-                                    t("save_mp3_confirm", filename=os.path.basename(path))
-                                )
-                            self.root.after(0, ask_save_mp3)
-                            while choice[0] is None and not self.cancel_requested:
-                                time.sleep(0.05)
-                            if choice[0]:
-                                full = AudioSegment.from_file(path)
-                                audio = full[int(start_sec * 1000):int(end_sec * 1000)]
-                        else:
-                            full = AudioSegment.from_file(path)
-                            audio = full[int(start_sec * 1000):int(end_sec * 1000)]
-                    else:
-                        full = None
-
-                    lang_val = opts.get("lang_mode", LANG_AUTO_VALUE)
-                    lang_param = None if lang_val == LANG_AUTO_VALUE else lang_val
-
-                    if start_sec > 0 or end_sec < duration:
-                        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                            tmp_path = tmp.name
-                        try:
-                            seg_audio = AudioSegment.from_file(path)[int(start_sec * 1000):int(end_sec * 1000)]
-                            seg_audio.export(tmp_path, format="wav")
-                            segments_iter, _ = model.transcribe(tmp_path, language=lang_param, vad_filter=True)
-                        finally:
-                            try:
-                                os.unlink(tmp_path)
-                            except OSError:
-                                pass
-                    else:
-                        segments_iter, _ = model.transcribe(path, language=lang_param, vad_filter=True)
-
-                    res = []
-                    last_progress_update = [0.0]
-                    last_log_update = [0.0]
-                    segment_count = [0]
-                    for s in segments_iter:
-                        if self.cancel_requested:
-                            break
-                        res.append(s)
-                        segment_count[0] += 1
-                        now = time.time()
-                        if now - last_progress_update[0] >= PROGRESS_UPDATE_INTERVAL_S:
-                            val = min(100, (s.end / segment_duration) * 100) if (segment_duration and segment_duration > 0) else 100
-                            self.root.after(0, lambda v=val: self._set_progress_value(v))
-                            last_progress_update[0] = now
-                        if now - last_log_update[0] >= LOG_UPDATE_INTERVAL_S or segment_count[0] <= 2:
-                            seg_text = (s.text or "").strip()
-                            self.log(f"   [{format_timestamp(s.start)}] {seg_text}")
-                            last_log_update[0] = now
-
-                    if not self.cancel_requested:
-                        self.root.after(0, lambda: self._set_progress_value(100))
-                        if start_sec > 0 or end_sec < duration:
-                            res = [_SegmentOffset(s.start + start_sec, s.end + start_sec, s.text or "") for s in res]
-                        is_segment = start_sec >= FULL_VIDEO_SEGMENT_EPS_S or (duration - end_sec) >= FULL_VIDEO_SEGMENT_EPS_S
-                        self.save_files(path, res, audio_segment=audio, segment_start_sec=start_sec if is_segment else None, segment_end_sec=end_sec if is_segment else None, output_dir_raw=opts.get("output_dir"))
-                        self.root.after(0, lambda p=path: self._mark_done_by_path(p))
-                        done += 1
-                except OSError:
-                    self.log(t("file_skipped", name=name))
-                    skipped_paths.append(path)
+                    self.api_jobs.finish_unfinished(run_paths, "cancelled", include_queued=True)
+                else:
+                    self.api_jobs.finish_unfinished(run_paths, "failed")
 
             if skipped_paths:
-                paths_copy = list(skipped_paths)
-                self.root.after(0, lambda: self._report_skipped_and_offer_remove(paths_copy))
+                self._ui_events.post("skipped", list(skipped_paths))
             if self.cancel_requested:
                 self.log(f"\n{t('cancelled', count=to_do - done)}")
             else:
@@ -951,6 +946,8 @@ class WhisperGUI:
                 self.log(t("error_no_audio_hint"))
             if os.environ.get("DEBUG"):
                 self.log(traceback.format_exc())
+            if self.api_jobs is not None:
+                self.api_jobs.finish_unfinished(run_paths, "failed", error=err_msg, include_queued=True)
         except Exception as e:
             err_msg = str(e)
             self.log(t("error_occurred", error=err_msg))
@@ -958,12 +955,136 @@ class WhisperGUI:
                 self.log(t("error_no_audio_hint"))
             if os.environ.get("DEBUG"):
                 self.log(traceback.format_exc())
+            if self.api_jobs is not None:
+                self.api_jobs.finish_unfinished(run_paths, "failed", error=err_msg, include_queued=True)
         finally:
-            self.root.after(0, self.reset_ui)
+            self._ui_events.post("reset_ui")
+
+    def _ask_save_mp3(self, path):
+        """Подтверждение сохранения MP3 для аудио-источника: диалог в главном потоке, поток обработки ждёт ответа."""
+        choice = [None]
+        self._ui_events.post("ask_save_mp3", (path, choice))
+        while choice[0] is None and not self.cancel_requested:
+            time.sleep(0.05)
+        return bool(choice[0])
+
+    def _ask_save_mp3_dialog(self, path, choice):
+        """Диалог сохранения MP3 (главный поток, после тика опроса событий); ответ — в choice[0]."""
+        choice[0] = messagebox.askyesno(
+            t("save_audio_mp3"),
+            t("save_mp3_confirm", filename=os.path.basename(path))
+        )
 
-    def _segment_file_suffix(self, start_sec, end_sec):
-        """Суфікс для імен файлів сегмента: HH-MM-SS_HH-MM-SS (через format_timestamp_filename)."""
-        return "_" + format_timestamp_filename(start_sec) + "_" + format_timestamp_filename(end_sec)
+    def _make_pipeline(self):
+        """
+        Конвейер обработки очереди (pipeline.py) с обратными вызовами в интерфейс через канал событий (ui_events.py).
+        При включённом API ход обработки файлов передаётся и в задания JobStore.
+        """
+        # Импорт при первом запуске обработки (обычно модуль уже загружен фоном после показа окна)
+        from pipeline import TranscriptionPipeline
+        from metrics import MetricsLog
+        jobs = self.api_jobs
+        metrics_log = MetricsLog(os.path.join(BASE_DIR, METRICS_LOG_FILE)) if self.metrics_log_enabled else None
+        return TranscriptionPipeline(
+            log=self.log,
+            result_cache=self.result_cache,
+            on_progress=lambda value: self._ui_events.post("progress", value),
+            on_file_done=self._on_pipeline_file_done,
+            ask_save_mp3=self._ask_save_mp3,
+            register_output_paths=self._watch_register_output_paths,
+            is_cancelled=lambda: self.cancel_requested,
+            processed_marker=self._processed_marker(),
+            on_file_start=jobs.file_started if jobs else None,
+            on_file_progress=self._on_pipeline_file_progress,
+            on_segment=jobs.add_segment if jobs else None,
+            on_file_error=jobs.file_failed if jobs else None,
+            metrics_log=metrics_log,
+        )
+
+    def _on_pipeline_file_progress(self, path, value):
+        """Прогресс файла (поток обработки): задания API обновляются сразу, строка очереди — через канал по пути."""
+        if self.api_jobs is not None:
+            self.api_jobs.set_progress(path, value)
+        self._ui_events.post("progress", value, key=path)
+
+    def _on_pipeline_file_done(self, path, outputs):
+        """Файл сохранён (поток обработки): отметка в очереди и завершение заданий API с задержкой от отправки."""
+        self._ui_events.post("file_done", path)
+        if self.api_jobs is None:
+            return
+        for job in self.api_jobs.file_done(path, outputs):
+            self.log(t("api_job_done", id=job.id, name=os.path.basename(path),
+                       latency=f"{job.finished_at - job.submitted_at:.1f}",
+                       wait=f"{job.started_at - job.submitted_at:.1f}"))
+
+    # --- HTTP API ЗАДАНИЙ ---
+
+    def _start_job_server(self, host, port):
+        """Запускает локальный HTTP API заданий (job_server.py); задания ставятся в эту же очередь."""
+        from job_server import JobStore, JobServer
+        self.api_jobs = JobStore()
+        try:
+            self.job_server = JobServer(self.api_jobs, self._submit_api_job,
+                                        host or DEFAULT_API_HOST, port or DEFAULT_API_PORT)
+        except (OSError, OverflowError, TypeError, ValueError) as e:
+            self.api_jobs = None
+            self.log(t("api_start_failed", error=str(e)))
+            return
+        self.job_server.start()
+        self.log(t("api_started", url=self.job_server.url))
+
+    def _submit_api_job(self, job):
+        """Новое задание API (поток HTTP-запроса) — постановка в очередь в главном потоке."""
+        self._ui_events.post("api_job", job)
+
+    def _enqueue_api_job(self, job):
+        """
+        Ставит файл задания в очередь (или снова помечает необработанным) и запускает обработку, если она не идёт.
+        Диапазон строки, уже стоящей в очереди, не меняется: задание с другими start/end завершается с ошибкой.
+        """
+        from job_server import range_seconds
+        name = os.path.basename(job.path)
+        overrides = {k: v for k, v in (("start", job.start), ("end", job.end)) if v}
+        item = next((q for q in self.queue if q.get("path") == job.path), None)
+        if item is not None and any(range_seconds(v) != range_seconds(item.get(k)) for k, v in overrides.items()):
+            error = t("api_job_range_conflict")
+            self.api_jobs.fail(job, error)
+            self.log(t("api_job_rejected", id=job.id, name=name, error=error))
+            return
+        self.log(t("api_job_submitted", id=job.id, name=name))
+        if item is None:
+            item = make_queue_item(job.path, probe=False, **overrides)
+            self.queue.append(item)
+        item["processed"] = False
+        self._refresh_queue_treeview()
+        self._save_queue_to_file()
+        # Длительность и конец нового элемента определяются в фоне, как при восстановлении очереди
+        revalidate_queue_async(self.queue, self.queue_list, self._ui_events, on_update=self._save_queue_to_file,
+                               only_missing=True)
+        self._start_api_jobs()
+
+    def _drop_finished_uploads(self):
+        """Убирает из очереди строки загруженных через API файлов, удалённых после завершения их заданий."""
+        if self.job_server is None:
+            return
+        upload_dir = os.path.normcase(os.path.abspath(self.job_server.upload_dir)) + os.sep
+        kept = [q for q in self.queue
+                if not (os.path.normcase(os.path.abspath(q.get("path") or "")).startswith(upload_dir)
+                        and not os.path.exists(q.get("path")))]
+        if len(kept) != len(self.queue):
+            self.queue[:] = kept
+            self._refresh_queue_treeview()
+            self._save_queue_to_file()
+
+    def _start_api_jobs(self):
+        """Запускает обработку файлов заданий API, ожидающих в очереди (если обработка сейчас не идёт)."""
+        if self.api_jobs is None or self._process_queue_lock.locked():
+            return
+        # Задание, чей файл ещё не поставлен в очередь (событие api_job не разобрано), запустит _enqueue_api_job
+        in_queue = {q.get("path") for q in self.queue}
+        paths = [p for p in self.api_jobs.queued_paths() if p in in_queue]
+        if paths:
+            self.start_thread(mode="paths", target_paths=paths)
 
     def _watch_register_output_paths(self, paths):
         """Пути файлов, которые создаёт транскрибация (txt/srt/mp3), сразу помечаем как «уже виденные»,
@@ -986,42 +1107,6 @@ class WhisperGUI:
         """Эвристика: экспортированное приложением аудио всегда оканчивается на _audio.mp3."""
         return name.lower().endswith("_audio.mp3")
 
-    def save_files(self, path, segments, audio_segment=None, segment_start_sec=None, segment_end_sec=None, output_dir_raw=None):
-        out = self._resolve_output_dir(path, output_dir_raw)
-        marker = self._processed_marker()
-        base = os.path.splitext(os.path.basename(path))[0].replace(marker, "")
-        if segment_start_sec is not None and segment_end_sec is not None:
-            base = base + self._segment_file_suffix(segment_start_sec, segment_end_sec)
-        txt_p = os.path.abspath(os.path.join(out, base + ".txt"))
-        srt_p = os.path.abspath(os.path.join(out, base + ".srt"))
-        out_paths = [txt_p, srt_p]
-        if audio_segment is not None:
-            out_paths.append(os.path.abspath(os.path.join(out, base + "_audio.mp3")))
-        self._watch_register_output_paths(out_paths)
-
-        with open(txt_p, "w", encoding="utf-8") as f:
-            f.write("\n".join([(s.text or "").strip() for s in segments]))
-
-        with open(srt_p, "w", encoding="utf-8") as f:
-            for i, s in enumerate(segments, 1):
-                timestamp = f"{format_timestamp_srt(s.start)} --> {format_timestamp_srt(s.end)}"
-                f.write(f"{i}\n{timestamp}\n{(s.text or '').strip()}\n\n")
-
-        self.log(t("files_created", name=base))
-        self.log(t("txt_file"), None)
-        self.log(txt_p, "link")
-        self.log(t("srt_file"), None)
-        self.log(srt_p, "link")
-
-        if audio_segment is not None:
-            mp3_p = os.path.abspath(os.path.join(out, base + "_audio.mp3"))  # совпадает с out_paths выше
-            try:
-                audio_segment.export(mp3_p, format="mp3")
-                self.log(t("audio_mp3_file"), None)
-                self.log(mp3_p, "link")
-            except Exception as e:
-                self.log(t("audio_mp3_error", error=str(e)))
-
     def mark_done(self, idx, name):
         """Отмечает файл как обработанный в очереди и сохраняет очередь в request_queue.json."""
         if 0 <= idx < len(self.queue):
@@ -1029,12 +1114,25 @@ class WhisperGUI:
             self._refresh_queue_treeview()
             self._save_queue_to_file()
 
-    def _mark_done_by_path(self, path):
-        """Отмечает файл как обработанный по пути (безопасно при изменении очереди)."""
+    def _set_row_progress(self, path, value):
+        """Процент обработки файла path в столбце статуса его строки (до перерисовки таблицы)."""
+        idx = next((i for i, q in enumerate(self.queue) if q.get("path") == path), None)
+        rows = self.queue_list.get_children()
+        if idx is not None and idx < len(rows):
+            self.queue_list.set(rows[idx], "status", f"{value:.0f}%")
+
+    def _mark_done_by_paths(self, paths):
+        """
+        Отмечает файлы как обработанные по путям (безопасно при изменении очереди): вся пачка файлов,
+        готовых за тик опроса событий, — одна перерисовка таблицы и одна запись request_queue.json.
+        """
+        pending = set(paths)
         for q in self.queue:
-            if q.get("path") == path:
+            if q.get("path") in pending:
                 q["processed"] = True
-                break
+                pending.discard(q.get("path"))
+                if not pending:
+                    break
         self._refresh_queue_treeview()
         self._save_queue_to_file()
 
@@ -1074,9 +1172,77 @@ class WhisperGUI:
         ).start()
 
     def log(self, msg, tag=None):
-        def _do_log():
+        """
+        Строка лога из любого потока: только добавление в кольцевой буфер (append в deque потокобезопасен),
+        без обращения к Tk. Если до вывода накопилось больше LOG_MAX_LINES строк, самые старые отбрасываются —
+        ограничение размера лога всё равно удалило бы их из виджета.
+        """
+        text = str(msg)
+        self._log_buffer.append((text if text.endswith("\n") else text + "\n", tag or ""))
+
+    def _poll_ui_events(self):
+        """
+        Раз в UI_POLL_INTERVAL_MS (главный поток): разбор всех событий фоновых потоков из канала (ui_events.py)
+        в порядке поступления — прогресс каждого файла только последний, готовые файлы пачкой — и вывод
+        накопленных строк лога. Модальные диалоги и закрытие окна откладываются через after_idle:
+        их вложенный цикл событий не выполняется внутри тика, и опрос не вызывается повторно из самого себя.
+        """
+        for kind, key, value in self._ui_events.drain():
+            try:
+                self._handle_ui_event(kind, key, value)
+            except Exception as e:
+                self.log(t("error_occurred", error=str(e)))
+        self._flush_log()
+        self.root.after(UI_POLL_INTERVAL_MS, self._poll_ui_events)
+
+    def _handle_ui_event(self, kind, key, value):
+        """Обработчик одного события канала; вызывается только из _poll_ui_events."""
+        if kind == "progress":
+            if key is None:
+                self._set_progress_value(value)
+            else:
+                self._set_row_progress(key, value)
+        elif kind == "file_done":
+            self._mark_done_by_paths(value)
+        elif kind == "skipped":
+            self.root.after_idle(lambda: self._report_skipped_and_offer_remove(value))
+        elif kind == "ask_save_mp3":
+            self.root.after_idle(lambda: self._ask_save_mp3_dialog(*value))
+        elif kind == "reset_ui":
+            self.reset_ui()
+        elif kind == "api_run_finished":
+            self._drop_finished_uploads()
+            self._start_api_jobs()
+        elif kind == "api_job":
+            self._enqueue_api_job(value)
+        elif kind == "probe":
+            value.apply()
+        elif kind == "watch_file":
+            self._add_watch_file_to_queue(value)
+        elif kind == "tray_show":
+            self._tray_show_window()
+        elif kind == "tray_quit":
+            self.root.after_idle(self._tray_quit)
+
+    def _flush_log(self):
+        """
+        Каждый тик _poll_ui_events (главный поток): все накопленные строки выводятся одним insert
+        (подряд идущие строки с одним тегом склеиваются), затем — одно ограничение размера и прокрутка.
+        """
+        chunks = []  # [[текст, тег]]
+        while True:
+            try:
+                text, tag = self._log_buffer.popleft()
+            except IndexError:
+                break
+            if chunks and chunks[-1][1] == tag:
+                chunks[-1][0] += text
+            else:
+                chunks.append([text, tag])
+        if chunks:
             self.log_box.config(state="normal")
-            self.log_box.insert("end", str(msg) + ("" if str(msg).endswith("\n") else "\n"), tag or None)
+            # Пустой тег — строка без тегов (None обрывал бы список аргументов Tcl)
+            self.log_box.insert("end", *[value for chunk in chunks for value in chunk])
             # Ограничение размера лога: удаляем старые строки сверху
             try:
                 index_str = self.log_box.index("end-1c")
@@ -1088,9 +1254,9 @@ class WhisperGUI:
                 self.log_box.delete("1.0", f"{line_count - LOG_MAX_LINES}.0")
             self.log_box.see("end")
             self.log_box.config(state="disabled")
-        self.root.after(0, _do_log)
 
     def clear_log(self):
+        self._log_buffer.clear()
         self.log_box.config(state="normal")
         self.log_box.delete("1.0", "end")
         self.log_box.config(state="disabled")
@@ -1106,6 +1272,8 @@ class WhisperGUI:
         self.start_btn.config(state="normal")
         self.cancel_btn.config(state="disabled")
         self.progress["value"] = 0
+        # Проценты незавершённых файлов (отмена, ошибка) в столбце статуса заменяются обычным статусом
+        self._refresh_queue_treeview()
 
     def cancel_action(self):
         self.cancel_requested = True
@@ -1186,36 +1354,6 @@ class WhisperGUI:
         if event:
             return "break"
 
-    @staticmethod
-    def _sanitize_folder_name(name):
-        """Заменяет символы, недопустимые в имени каталога Windows, на _."""
-        s = re.sub(r'[\\/:*?"<>|]', "_", name)
-        s = s.strip().rstrip(". ")
-        return s if s else "_"
-
-    def _resolve_output_dir(self, path, output_dir_raw=None):
-        """
-        Определяет каталог сохранения для файла path.
-        output_dir_raw — значение из главного потока (опции); если None, читается self.output_dir.get().
-        """
-        raw = (output_dir_raw if output_dir_raw is not None else (self.output_dir.get() or "")).strip()
-        if not raw:
-            return os.path.dirname(path)
-        if os.path.isabs(raw):
-            out = os.path.normpath(raw)
-            try:
-                os.makedirs(out, exist_ok=True)
-            except OSError:
-                return os.path.dirname(path)
-            return out
-        safe_name = self._sanitize_folder_name(raw)
-        out = os.path.join(os.path.dirname(path), safe_name)
-        try:
-            os.makedirs(out, exist_ok=True)
-        except OSError:
-            return os.path.dirname(path)
-        return out
-
     def pick_output_folder(self):
         d = filedialog.askdirectory()
         if d:
@@ -1271,8 +1409,11 @@ class WhisperGUI:
         self._persist_settings()
 
     def prepare_close(self):
-        """Зупинити слідкування, трей та зберегти налаштування перед закриттям (викликається з main.py)."""
+        """Зупинити слідкування, трей, HTTP API та зберегти налаштування перед закриттям (викликається з main.py)."""
         self._watch_stop.set()
+        if self.job_server is not None:
+            self.job_server.stop()
+            self.job_server = None
         if self._tray_icon:
             try:
                 self._tray_icon.stop()
@@ -1280,6 +1421,13 @@ class WhisperGUI:
                 pass
         self._persist_settings()
 
+    def _batch_size_value(self):
+        """Размер батча из IntVar (некорректное значение в поле -> DEFAULT_BATCH_SIZE)."""
+        try:
+            return max(1, int(self.batch_size.get()))
+        except (TypeError, ValueError, tk.TclError):
+            return DEFAULT_BATCH_SIZE
+
     def _model_button_label(self):
         """Текст кнопки выбора модели: текущая модель (короткое имя)."""
         return self.whisper_model.get() or DEFAULT_MODEL
@@ -1309,7 +1457,7 @@ class WhisperGUI:
         win.title(t("model_dialog_title"))
         win.transient(self.root)
         win.grab_set()
-        win.geometry("420x380")
+        win.geometry("420x420")
         win.minsize(360, 300)
         main_f = ttk.Frame(win, padding=10)
         main_f.pack(fill="both", expand=True)
@@ -1325,14 +1473,22 @@ class WhisperGUI:
         lb.config(yscrollcommand=scroll.set)
         scroll.config(command=lb.yview)
 
+        # Модели, уже загруженные в память (кэш WhisperModelSingleton), — выбор такой модели не требует загрузки
+        resident = {}
+        for entry in WhisperModelSingleton.resident_models():
+            resident.setdefault(entry["name"], []).append(
+                f"{entry['device'].upper()} {entry['compute_type']} ~{entry['size_mb']} MB")
         lines = []
         for name in WHISPER_MODELS:
             full_path = find_whisper_model_cache_path(cache_root, name)
             if full_path:
                 size_mb = self._folder_size_mb(full_path)
-                lines.append(f"{name}  —  {t('model_dialog_downloaded')}  ~{size_mb} MB")
+                line = f"{name}  —  {t('model_dialog_downloaded')}  ~{size_mb} MB"
             else:
-                lines.append(f"{name}  —  {t('model_dialog_not_downloaded')}")
+                line = f"{name}  —  {t('model_dialog_not_downloaded')}"
+            if name in resident:
+                line += "  ●  " + t("model_dialog_resident", details=", ".join(resident[name]))
+            lines.append(line)
         lb.delete(0, "end")
         for line in lines:
             lb.insert("end", line)
@@ -1343,13 +1499,35 @@ class WhisperGUI:
         except ValueError:
             pass
 
+        # Движок: последовательный декодер или батчевый (BatchedInferencePipeline) + размер батча
+        engine_f = ttk.Frame(main_f)
+        engine_f.pack(fill="x", pady=(8, 0))
+        ttk.Label(engine_f, text=t("engine_mode_label")).pack(side="left")
+        engine_labels = [t("engine_mode_" + m) for m in ENGINE_MODES]
+        engine_combo = ttk.Combobox(engine_f, state="readonly", width=16, values=engine_labels)
+        engine_combo.current(ENGINE_MODES.index(self.engine_mode.get()) if self.engine_mode.get() in ENGINE_MODES else 0)
+        engine_combo.pack(side="left", padx=5)
+        ttk.Label(engine_f, text=t("batch_size_label")).pack(side="left", padx=(10, 0))
+        batch_var = tk.StringVar(value=str(self._batch_size_value()))
+        ttk.Spinbox(engine_f, from_=1, to=64, width=5, textvariable=batch_var).pack(side="left", padx=5)
+
+        def apply_engine():
+            idx = engine_combo.current()
+            if 0 <= idx < len(ENGINE_MODES):
+                self.engine_mode.set(ENGINE_MODES[idx])
+            try:
+                self.batch_size.set(max(1, int(batch_var.get())))
+            except (TypeError, ValueError):
+                pass
+
         def on_load():
+            apply_engine()
             sel = lb.curselection()
             if not sel:
+                self._persist_settings()
                 return
             chosen = WHISPER_MODELS[sel[0]]
             self.whisper_model.set(chosen)
-            WhisperModelSingleton.reset()
             try:
                 WhisperModelSingleton.get(self.log, self.device_mode.get(), chosen)
             except Exception:
@@ -1359,14 +1537,14 @@ class WhisperGUI:
             self.log(t("model_loaded", model=chosen))
 
         def on_ok():
+            apply_engine()
             sel = lb.curselection()
             if sel:
                 chosen = WHISPER_MODELS[sel[0]]
                 self.whisper_model.set(chosen)
                 self.model_btn.config(text=self._model_button_label())
-                WhisperModelSingleton.reset()
-                self._persist_settings()
                 self.log(t("model_selected", model=chosen))
+            self._persist_settings()
             win.destroy()
 
         def on_cancel():
@@ -1455,6 +1633,8 @@ class WhisperGUI:
             "save_audio_mp3": self.save_audio_mp3.get(),
             "tray_mode": self.tray_mode.get(),
             "whisper_model": self.whisper_model.get(),
+            "engine_mode": self.engine_mode.get(),
+            "batch_size": self._batch_size_value(),
         })
 
     def _watch_loop(self):
@@ -1490,7 +1670,8 @@ class WhisperGUI:
                     if self._watch_stop.is_set():
                         break
                     self.log(t("watch_new_file", name=os.path.basename(path)))
-                    self.root.after(0, lambda p=path: self._add_watch_file_to_queue(p))
+                    prometheus_registry().inc("whisperfast_watch_files_detected_total")
+                    self._ui_events.post("watch_file", path)
             except OSError:
                 pass
             for _ in range(int(WATCH_POLL_INTERVAL / 0.25)):
@@ -1506,7 +1687,9 @@ class WhisperGUI:
             [path],
             self.queue,
             self.queue_list,
-            log_func=self.log
+            log_func=self.log,
+            ui_events=self._ui_events,
+            on_update=self._save_queue_to_file,
         )
         self._save_queue_to_file()
         idx = len(self.queue) - 1
@@ -1536,7 +1719,9 @@ class WhisperGUI:
             file_paths,
             self.queue,
             self.queue_list,
-            log_func=self.log
+            log_func=self.log,
+            ui_events=self._ui_events,
+            on_update=self._save_queue_to_file,
         )
         self._save_queue_to_file()
 
@@ -1556,7 +1741,9 @@ class WhisperGUI:
                 file_paths,
                 self.queue,
                 self.queue_list,
-                log_func=self.log
+                log_func=self.log,
+                ui_events=self._ui_events,
+                on_update=self._save_queue_to_file,
             )
             self._save_queue_to_file()
 
@@ -2,13 +2,21 @@
 Модуль для добавления файлов в очередь обработки.
 Поддерживает добавление одного файла, группы файлов и каталогов (рекурсивно).
 Централизованная логика валидации и обработки всех способов добавления файлов.
+Строки добавляются в таблицу сразу; длительность (ffprobe) определяется пулом потоков в фоне.
 """
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
-from config import VALID_EXTS, AUDIO_EXTENSIONS, VIDEO_EXTENSIONS
+from config import VALID_EXTS, AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, PROBE_MAX_WORKERS
 
 from i18n import t
-from utils import make_queue_item, normalize_queue_path
+from utils import (
+    make_queue_item, normalize_queue_path, apply_queue_item_duration,
+    is_valid_file, get_valid_files_from_directory,
+)
+from media_cache import flush_media_cache, get_media_info, get_cached_media_info
 
 
 def get_file_dialog_filetypes():
@@ -24,21 +32,6 @@ def get_file_dialog_filetypes():
     ]
 
 
-def is_valid_file(file_path):
-    """
-    Проверяет, является ли файл валидным для обработки.
-    
-    Args:
-        file_path: Путь к файлу
-    
-    Returns:
-        True если файл валидный, False иначе
-    """
-    if not os.path.isfile(file_path):
-        return False
-    return file_path.lower().endswith(VALID_EXTS)
-
-
 def validate_and_filter_files(file_paths, existing_files=None):
     """
     Валидирует и фильтрует список файлов.
@@ -132,42 +125,6 @@ def process_dropped_files(dropped_data, tk_root=None):
     return all_files
 
 
-def get_valid_files_from_directory(directory, recursive=True):
-    """
-    Получает список всех валидных файлов из каталога.
-    
-    Args:
-        directory: Путь к каталогу
-        recursive: Если True, обрабатывает вложенные каталоги рекурсивно
-    
-    Returns:
-        Список путей к валидным файлам
-    """
-    valid_files = []
-    
-    if not os.path.isdir(directory):
-        return valid_files
-    
-    try:
-        if recursive:
-            # Рекурсивный обход всех подкаталогов
-            for root, dirs, files in os.walk(directory):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if is_valid_file(file_path):
-                        valid_files.append(file_path)
-        else:
-            # Только файлы в корне каталога
-            for file in os.listdir(directory):
-                file_path = os.path.join(directory, file)
-                if is_valid_file(file_path):
-                    valid_files.append(file_path)
-    except (PermissionError, OSError) as e:
-        if not isinstance(e, PermissionError):
-            print(f"Ошибка при сканировании каталога {directory}: {e}")
-    return valid_files
-
-
 def add_single_file():
     """
     Диалог выбора одного файла.
@@ -250,35 +207,160 @@ def add_directory(recursive=True):
     return valid_files
 
 
-def add_files_to_queue_controller(file_paths, queue, queue_list_or_treeview, log_func=None):
+def queue_row_values(num, item):
+    """Значения колонок таблицы очереди для элемента item (пока длительность определяется — «определяется…»)."""
+    status_text = t("status_processed") if item.get("processed") else t("status_not_processed")
+    end_text = item["end"] if item.get("end") else t("probing_placeholder")
+    return (num, os.path.basename(item["path"]), item["start"], item.get("end_segment_1", ""),
+            item.get("end_segment_2", ""), end_text, status_text)
+
+
+_probe_executor = None
+_probe_executor_lock = threading.Lock()
+
+
+def _get_probe_executor():
+    """Общий ограниченный пул потоков для ffprobe (создаётся при первом использовании)."""
+    global _probe_executor
+    with _probe_executor_lock:
+        if _probe_executor is None:
+            _probe_executor = ThreadPoolExecutor(max_workers=PROBE_MAX_WORKERS, thread_name_prefix="probe")
+        return _probe_executor
+
+
+class _ProbeBatch:
+    """
+    Фоновое определение длительности для элементов одного добавления (или проверки восстановленной очереди).
+    Результаты из потоков копятся в списке; потоки только кладут в канал UI (ui_events.UiEventChannel)
+    событие «probe» с ключом пачки, а главный поток Tk применяет накопленное (apply) раз в тик выборки событий:
+    обновляются только изменившиеся элементы очереди, их ячейки «Конец» и request_queue.json (on_update).
+    revalidate=True — проверка очереди при запуске (свой итоговый лог).
+    """
+
+    def __init__(self, ui_events, queue, treeview, items, on_update=None, log_func=None, revalidate=False):
+        self.ui_events = ui_events
+        self.revalidate = revalidate
+        self.changed = 0
+        self.queue = queue
+        self.treeview = treeview
+        self.on_update = on_update
+        self.log_func = log_func
+        self.total = len(items)
+        self.remaining = len(items)
+        self._items = items
+        self._results = []
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def start(self):
+        executor = _get_probe_executor()
+        for item in self._items:
+            future = executor.submit(get_media_info, item["path"])
+            future.add_done_callback(lambda f, it=item: self._on_done(it, f))
+        self._items = None
+
+    def _on_done(self, item, future):
+        try:
+            info = future.result()
+        except Exception:
+            info = None
+        with self._lock:
+            self._results.append((item, info))
+        # Событие объединяемое: сколько бы результатов ни пришло за тик, apply вызывается один раз
+        self.ui_events.post("probe", self, key=id(self))
+
+    def apply(self):
+        """Применяет накопленные результаты (только главный поток Tk)."""
+        with self._lock:
+            results, self._results = self._results, []
+        if not results:
+            return
+        positions = {id(q): i for i, q in enumerate(self.queue)}
+        children = self.treeview.get_children()
+        changed = 0
+        for item, info in results:
+            duration = info["duration"] if info else 0.0
+            if item.get("end") and item.get("duration") == (duration if duration > 0 else None):
+                continue  # файл не изменился — строку не трогаем
+            apply_queue_item_duration(item, duration)
+            changed += 1
+            idx = positions.get(id(item))
+            if idx is not None and idx < len(children):
+                self.treeview.set(children[idx], "end", item["end"])
+        self.remaining -= len(results)
+        self.changed += changed
+        if changed and self.on_update:
+            self.on_update()
+        if self.remaining <= 0:
+            flush_media_cache()
+            if self.log_func:
+                seconds = f"{time.time() - self._started:.1f}"
+                if self.revalidate:
+                    self.log_func(t("queue_revalidated", count=self.total, changed=self.changed, seconds=seconds))
+                else:
+                    self.log_func(t("probing_done", count=self.total, seconds=seconds))
+
+
+def revalidate_queue_async(queue, treeview, ui_events, on_update=None, log_func=None, only_missing=False):
+    """
+    Фоновая проверка восстановленной очереди: для каждого файла — stat и кэш метаданных,
+    ffprobe только для файлов, изменившихся на диске (или ещё без длительности).
+    Обновляются лишь строки, у которых длительность изменилась.
+    only_missing=True — только элементы без сохранённого конца. Возвращает число проверяемых элементов.
+    """
+    items = [q for q in queue if not q.get("end")] if only_missing else list(queue)
+    if items:
+        _ProbeBatch(ui_events, queue, treeview, items, on_update=on_update, log_func=log_func,
+                    revalidate=not only_missing).start()
+        if only_missing and log_func:
+            log_func(t("probing_started", count=len(items)))
+    return len(items)
+
+
+def add_files_to_queue_controller(file_paths, queue, queue_list_or_treeview, log_func=None, ui_events=None, on_update=None):
     """
     Универсальный контроллер для добавления файлов в очередь.
-    queue — список dict с ключами path, start, end_segment_1, end_segment_2, end.
+    queue — список dict с ключами path, start, end_segment_1, end_segment_2, end, duration.
     queue_list_or_treeview — Treeview: добавляем строки через .insert().
+    Строки вставляются сразу. Длительность известных файлов берётся из кэша метаданных,
+    остальных — определяется в фоне (нужен канал ui_events, см. _ProbeBatch); по мере готовности обновляются ячейки
+    и вызывается on_update (например, сохранение request_queue.json). Без ui_events длительность определяется синхронно.
     Возвращает (added_count, skipped_count), изменяет queue и виджет.
     """
     if not file_paths:
         return 0, 0
 
-    existing_paths = [q["path"] for q in queue] if queue else []
+    existing_paths = {q["path"] for q in queue} if queue else set()
     valid_files, invalid_files, duplicate_files = validate_and_filter_files(file_paths, existing_files=existing_paths)
 
     added_count = 0
+    to_probe = []
     for file_path in valid_files:
         path_norm = normalize_queue_path(file_path) or file_path
-        item = make_queue_item(path_norm)
+        if ui_events is None:
+            item = make_queue_item(path_norm)
+        else:
+            cached = get_cached_media_info(path_norm)
+            if cached is not None:
+                item = make_queue_item(path_norm, duration=cached["duration"])
+            else:
+                item = make_queue_item(path_norm, probe=False)
+                to_probe.append(item)
         queue.append(item)
-        num = len(queue)
-        name = os.path.basename(file_path)
-        status_text = t("status_not_processed")
-        values = (num, name, item["start"], item["end_segment_1"], item["end_segment_2"], item["end"], status_text)
-        queue_list_or_treeview.insert("", "end", values=values)
+        queue_list_or_treeview.insert("", "end", values=queue_row_values(len(queue), item))
         added_count += 1
+    if to_probe:
+        batch = _ProbeBatch(ui_events, queue, queue_list_or_treeview, to_probe, on_update=on_update, log_func=log_func)
+        batch.start()
+    elif added_count:
+        flush_media_cache()
 
     skipped_count = len(invalid_files) + len(duplicate_files)
     if log_func:
         if added_count > 0:
             log_func(t("added_to_queue", count=added_count))
+        if to_probe:
+            log_func(t("probing_started", count=len(to_probe)))
         if duplicate_files:
             log_func(t("skipped_duplicates", count=len(duplicate_files)))
         if invalid_files:
@@ -0,0 +1,447 @@
+"""
+Локальный HTTP API заданий транскрибации (только стандартная библиотека).
+Другие сервисы на этом же компьютере передают файл (путь или загрузку), следят за статусом и прогрессом,
+получают сегменты по мере распознавания и забирают готовые SRT/TXT — без слежения за каталогом.
+Задания попадают в ту же очередь и обрабатываются той же моделью, что и в GUI: приложение передаёт submit
+и обновляет JobStore из обратных вызовов конвейера (pipeline.TranscriptionPipeline).
+
+    POST /jobs                          {"path": "...", "start": "00:01:00,000", "end": "..."} — файл на диске
+                                        (409 — для файла уже идёт задание с другим диапазоном)
+    POST /jobs/upload?filename=a.mp3    тело запроса — содержимое файла (нужен Content-Length); загруженный файл
+                                        удаляется после завершения задания, каталог с результатами — вместе с ним
+    GET  /jobs                          список заданий
+    GET  /jobs/<id>                     статус, прогресс, пути результатов и задержки (ожидание, обработка, всего)
+    GET  /jobs/<id>/segments?from=N     сегменты строками JSON; пока задание не завершено, ответ остаётся открытым
+                                        (wait=0 — только уже готовые); последняя строка — {"status": ...}
+    GET  /jobs/<id>/srt, /jobs/<id>/txt готовый результат
+    GET  /metrics                       счётчики и датчики процесса в текстовом формате Prometheus (metrics.py)
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from config import (
+    BASE_DIR, VALID_EXTS, DEFAULT_API_HOST, DEFAULT_API_PORT, API_UPLOAD_DIR, API_MAX_UPLOAD_MB,
+    API_MAX_FINISHED_JOBS,
+)
+from utils import normalize_queue_path, is_valid_file, parse_timestamp_to_seconds
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+# Сколько секунд поток сегментов ждёт новых данных до повторной проверки соединения и статуса
+_SEGMENT_WAIT_S = 15.0
+_COPY_CHUNK = 1024 * 1024
+
+
+def _round_or_none(value):
+    return None if value is None else round(value, 3)
+
+
+def range_seconds(value):
+    """Граница диапазона задания или строки очереди в секундах (до мс) для сравнения; None — не задана."""
+    seconds = parse_timestamp_to_seconds(value)
+    return None if seconds is None else round(seconds, 3)
+
+
+class JobConflictError(ValueError):
+    """Для файла уже есть незавершённое задание с другим диапазоном (ответ 409)."""
+
+
+class ApiJob:
+    """Задание API: один файл (или диапазон файла) очереди. Поля меняются только под блокировкой JobStore."""
+
+    def __init__(self, job_id, path, start=None, end=None, uploaded=False):
+        self.id = job_id
+        self.path = path
+        self.start = start
+        self.end = end
+        self.uploaded = uploaded
+        self.status = "queued"
+        self.progress = 0.0
+        self.segments = []
+        self.outputs = {}
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self):
+        """Статус для ответа API. Задержки: queue_wait — от отправки до начала, latency — от отправки до результата."""
+        started, finished = self.started_at, self.finished_at
+        return {
+            "id": self.id,
+            "path": self.path,
+            "start": self.start,
+            "end": self.end,
+            "status": self.status,
+            "progress": round(self.progress, 1),
+            "segments": len(self.segments),
+            "outputs": self.outputs,
+            "error": self.error,
+            "submitted_at": _round_or_none(self.submitted_at),
+            "started_at": _round_or_none(started),
+            "finished_at": _round_or_none(finished),
+            "queue_wait_sec": _round_or_none(started - self.submitted_at) if started else None,
+            "processing_sec": _round_or_none(finished - started) if started and finished else None,
+            "latency_sec": _round_or_none(finished - self.submitted_at) if finished else None,
+        }
+
+
+class JobStore:
+    """
+    Задания API в памяти. Обновления приходят по пути файла (как в конвейере): одно обновление относится ко всем
+    незавершённым заданиям этого файла, поэтому задания одного файла с разными диапазонами одновременно не принимаются.
+    Хранится не больше max_finished завершённых заданий (старые удаляются).
+    Загруженный файл удаляется при завершении задания, его каталог (с результатами) — при удалении задания из памяти.
+    """
+
+    def __init__(self, max_finished=API_MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._cond = threading.Condition()
+
+    def create(self, path, start=None, end=None, uploaded=False, job_id=None):
+        """Новое задание. JobConflictError — для path уже есть незавершённое задание с другим диапазоном."""
+        job = ApiJob(job_id or uuid.uuid4().hex[:12], path, start, end, uploaded)
+        wanted = (range_seconds(start), range_seconds(end))
+        with self._cond:
+            for other in self._active(path):
+                if (range_seconds(other.start), range_seconds(other.end)) != wanted:
+                    raise JobConflictError("another job for this file with a different start/end is not finished yet")
+            self._jobs[job.id] = job
+            self._trim()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id=None):
+        """to_dict() одного задания (None, если его нет) или список всех."""
+        with self._cond:
+            if job_id is not None:
+                job = self._jobs.get(job_id)
+                return job.to_dict() if job else None
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def queued_paths(self):
+        """Пути файлов с заданиями, ожидающими обработки (в порядке отправки, без повторов)."""
+        with self._cond:
+            paths = []
+            for job in self._jobs.values():
+                if job.status == "queued" and job.path not in paths:
+                    paths.append(job.path)
+            return paths
+
+    def _active(self, path):
+        return [job for job in self._jobs.values() if job.path == path and not job.finished]
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            job = self._jobs.pop(job_id)
+            if job.uploaded:
+                # Результаты задания больше не доступны через API — каталог загрузки удаляется целиком
+                shutil.rmtree(os.path.dirname(job.path), ignore_errors=True)
+
+    def file_started(self, path):
+        with self._cond:
+            for job in self._active(path):
+                job.status = "running"
+                job.started_at = job.started_at or time.time()
+                job.progress = 0.0
+                job.segments = []
+            self._cond.notify_all()
+
+    def set_progress(self, path, value):
+        with self._cond:
+            for job in self._active(path):
+                job.progress = max(0.0, min(100.0, float(value)))
+
+    def add_segment(self, path, start, end, text):
+        with self._cond:
+            jobs = self._active(path)
+            for job in jobs:
+                job.segments.append({"index": len(job.segments), "start": round(start, 3),
+                                     "end": round(end, 3), "text": (text or "").strip()})
+            if jobs:
+                self._cond.notify_all()
+
+    def _finish(self, jobs, status, outputs=None, error=None):
+        now = time.time()
+        for job in jobs:
+            job.status = status
+            job.finished_at = now
+            job.started_at = job.started_at or now
+            if outputs is not None:
+                job.outputs = outputs
+                job.progress = 100.0
+            if error:
+                job.error = error
+            if job.uploaded:
+                # Исходник больше не нужен (TXT/SRT рядом с ним остаются до удаления задания из памяти)
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
+        self._trim()
+        self._cond.notify_all()
+        return jobs
+
+    def file_done(self, path, outputs):
+        """Файл сохранён: задания завершаются со ссылками на результаты. Возвращает завершённые задания."""
+        with self._cond:
+            return self._finish(self._active(path), "done", outputs=dict(outputs or {}))
+
+    def file_failed(self, path, error):
+        with self._cond:
+            return self._finish(self._active(path), "failed", error=error)
+
+    def fail(self, job, error):
+        """Завершает с ошибкой одно задание (не все задания его файла), если оно ещё не завершено."""
+        with self._cond:
+            return self._finish([] if job.finished else [job], "failed", error=error)
+
+    def finish_unfinished(self, paths, status, error=None, include_queued=False):
+        """
+        После прохода очереди: начатые задания файлов paths, не получившие результата, завершаются со статусом status.
+        include_queued — и ещё не начатые (проход прерван ошибкой до обработки файлов).
+        """
+        with self._cond:
+            jobs = [job for path in set(paths) for job in self._active(path)
+                    if include_queued or job.status == "running"]
+            return self._finish(jobs, status, error=error)
+
+    def wait_segments(self, job, from_index, timeout):
+        """(новые сегменты начиная с from_index, задание завершено) — ждёт до timeout, если новых нет."""
+        with self._cond:
+            if len(job.segments) <= from_index and not job.finished:
+                self._cond.wait(timeout)
+            return list(job.segments[from_index:]), job.finished
+
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = "WhisperFastJobAPI/1.0"
+
+    def log_message(self, format, *args):
+        # Запросы не пишутся в stderr (в GUI его не видно); ошибки отдаются клиенту в JSON
+        pass
+
+    @property
+    def api(self):
+        return self.server.job_server
+
+    def _send_json(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error_json(self, code, message):
+        self._send_json(code, {"error": message})
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        return [p for p in parts.path.split("/") if p], parse_qs(parts.query)
+
+    def do_GET(self):
+        segments, query = self._route()
+        if segments == ["jobs"]:
+            self._send_json(200, self.api.store.snapshot())
+            return
+        if segments == ["metrics"]:
+            self._send_metrics()
+            return
+        if len(segments) < 2 or segments[0] != "jobs":
+            self._send_error_json(404, "not found")
+            return
+        job = self.api.store.get(segments[1])
+        if job is None:
+            self._send_error_json(404, "job not found")
+            return
+        if len(segments) == 2:
+            self._send_json(200, self.api.store.snapshot(job.id))
+        elif segments[2:] == ["segments"]:
+            self._stream_segments(job, query)
+        elif segments[2:] in (["srt"], ["txt"]):
+            self._send_result(job, segments[2])
+        else:
+            self._send_error_json(404, "not found")
+
+    def do_POST(self):
+        segments, query = self._route()
+        try:
+            if segments == ["jobs"]:
+                job = self.api.submit_path(self._read_json())
+            elif segments == ["jobs", "upload"]:
+                job = self.api.submit_upload((query.get("filename") or [""])[0], self.rfile, self._content_length())
+            else:
+                self._send_error_json(404, "not found")
+                return
+        except JobConflictError as e:
+            self._send_error_json(409, str(e))
+            return
+        except ValueError as e:
+            self._send_error_json(400, str(e))
+            return
+        except OSError as e:
+            self._send_error_json(500, str(e))
+            return
+        self._send_json(202, self.api.store.snapshot(job.id))
+
+    def _content_length(self):
+        try:
+            return int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return 0
+
+    def _read_json(self):
+        length = self._content_length()
+        if length <= 0:
+            raise ValueError("request body must be a JSON object")
+        try:
+            data = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("request body must be a JSON object")
+        if not isinstance(data, dict):
+            raise ValueError("request body must be a JSON object")
+        return data
+
+    def _stream_segments(self, job, query):
+        try:
+            index = max(0, int((query.get("from") or ["0"])[0]))
+        except ValueError:
+            index = 0
+        wait = (query.get("wait") or ["1"])[0] not in ("0", "false", "no")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                new, finished = self.api.store.wait_segments(job, index, _SEGMENT_WAIT_S if wait else 0)
+                for seg in new:
+                    self.wfile.write((json.dumps(seg, ensure_ascii=False) + "\n").encode("utf-8"))
+                index += len(new)
+                self.wfile.flush()
+                # Сегменты и статус читаются под одной блокировкой: после завершения новых сегментов не будет
+                if finished or not wait:
+                    break
+            self.wfile.write((json.dumps({"status": job.status}) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_metrics(self):
+        from metrics import render_prometheus
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_result(self, job, kind):
+        outputs = self.api.store.snapshot(job.id)["outputs"]
+        if job.status != "done" or not outputs.get(kind):
+            self._send_json(409, {"error": "result not ready", "status": job.status})
+            return
+        try:
+            with open(outputs[kind], "rb") as f:
+                body = f.read()
+        except OSError as e:
+            self._send_error_json(410, str(e))
+            return
+        content_type = "application/x-subrip" if kind == "srt" else "text/plain"
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class JobServer:
+    """
+    HTTP-сервер API в фоновом потоке. submit(job) вызывается из потока запроса для каждого нового задания —
+    приложение ставит файл в очередь и запускает обработку. OSError при создании — порт занят или адрес недоступен.
+    """
+
+    def __init__(self, store, submit, host=DEFAULT_API_HOST, port=DEFAULT_API_PORT, upload_dir=None):
+        self.store = store
+        self.submit = submit
+        self.upload_dir = upload_dir or os.path.join(BASE_DIR, API_UPLOAD_DIR)
+        self.httpd = ThreadingHTTPServer((host, int(port)), _JobRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.job_server = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def submit_path(self, data):
+        """Задание для файла на диске: {"path", "start"?, "end"?}. ValueError — некорректный запрос."""
+        path = normalize_queue_path(data.get("path"))
+        if not path or not is_valid_file(path):
+            raise ValueError("path must be an existing supported media file")
+        path = os.path.normpath(os.path.abspath(path))
+        start, end = data.get("start"), data.get("end")
+        for value in (start, end):
+            if value is not None and parse_timestamp_to_seconds(value) is None:
+                raise ValueError("start/end must be timestamps like 00:01:30,000")
+        job = self.store.create(path, start, end)
+        self.submit(job)
+        return job
+
+    def submit_upload(self, filename, stream, length):
+        """Задание для загруженного файла: тело запроса сохраняется в upload_dir/<id>/<имя файла>."""
+        name = os.path.basename((filename or "").replace("\\", "/")).strip()
+        if not name or not name.lower().endswith(VALID_EXTS):
+            raise ValueError("filename query parameter with a supported extension is required")
+        if length <= 0:
+            raise ValueError("Content-Length is required")
+        if length > API_MAX_UPLOAD_MB * 1024 * 1024:
+            raise ValueError(f"upload is larger than {API_MAX_UPLOAD_MB} MB")
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.upload_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        path = os.path.join(job_dir, name)
+        remaining = length
+        try:
+            with open(path, "wb") as f:
+                while remaining > 0:
+                    chunk = stream.read(min(_COPY_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            if remaining:
+                raise ValueError("upload was truncated")
+            job = self.store.create(path, uploaded=True, job_id=job_id)
+        except BaseException:
+            # Обрыв, ошибка чтения или записи — каталог задания удаляется целиком
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        self.submit(job)
+        return job
@@ -6,10 +6,23 @@ import json
 import os
 
 try:
-    from config import BASE_DIR, DEFAULT_MODEL
+    from config import (
+        BASE_DIR, DEFAULT_MODEL, DEFAULT_PARALLEL_WORKERS, DEFAULT_ENGINE_MODE, DEFAULT_BATCH_SIZE,
+        DEFAULT_RESULT_CACHE_MAX_MB, DEFAULT_CHUNK_TARGET_S, DEFAULT_API_HOST, DEFAULT_API_PORT,
+        DEFAULT_MODEL_CACHE_MAX_MB, DEFAULT_MODEL_IDLE_UNLOAD_MIN,
+    )
 except ImportError:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DEFAULT_MODEL = "large-v3-turbo"
+    DEFAULT_PARALLEL_WORKERS = 1
+    DEFAULT_ENGINE_MODE = "sequential"
+    DEFAULT_BATCH_SIZE = 8
+    DEFAULT_RESULT_CACHE_MAX_MB = 500
+    DEFAULT_CHUNK_TARGET_S = 600.0
+    DEFAULT_API_HOST = "127.0.0.1"
+    DEFAULT_API_PORT = 8765
+    DEFAULT_MODEL_CACHE_MAX_MB = 6144
+    DEFAULT_MODEL_IDLE_UNLOAD_MIN = 30
 
 # Текущий язык по умолчанию
 _current_language = "EN"
@@ -68,6 +81,22 @@ def load_app_settings():
         "save_audio_mp3": False,
         "tray_mode": "panel",
         "whisper_model": DEFAULT_MODEL,
+        "parallel_workers": DEFAULT_PARALLEL_WORKERS,
+        "engine_mode": DEFAULT_ENGINE_MODE,
+        "batch_size": DEFAULT_BATCH_SIZE,
+        "queue_revalidate_on_start": True,
+        "result_cache_max_mb": DEFAULT_RESULT_CACHE_MAX_MB,
+        "chunk_long_files": False,
+        "chunk_target_sec": DEFAULT_CHUNK_TARGET_S,
+        "preload_model": False,
+        "model_cache_max_mb": DEFAULT_MODEL_CACHE_MAX_MB,
+        "model_idle_unload_min": DEFAULT_MODEL_IDLE_UNLOAD_MIN,
+        "autotune_profiles": {},
+        "metrics_log_enabled": True,
+        "metrics_textfile": "",
+        "api_enabled": False,
+        "api_host": DEFAULT_API_HOST,
+        "api_port": DEFAULT_API_PORT,
     }
     if not os.path.exists(path):
         try:
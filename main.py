@@ -1,7 +1,14 @@
 import warnings
+import importlib.util
 import os
 import sys
 
+# --profile-startup[=отчёт.json]: профиль запуска (startup_profile.py) отсчитывается от начала main.py
+_PROFILE_ARG = next((a for a in sys.argv[1:] if a.split("=", 1)[0].strip().lower() == "--profile-startup"), None)
+if _PROFILE_ARG:
+    import startup_profile
+    startup_profile.start_profiling()
+
 # Блокируем предупреждения до основных импортов
 warnings.filterwarnings("ignore", category=UserWarning, module="pygame")
 warnings.filterwarnings("ignore", message=".*pkg_resources is deprecated.*")
@@ -11,6 +18,26 @@ from tkinter import messagebox
 from installer import install_dependencies, check_system
 
 from i18n import t, set_language
+from config import REQUIRED_MODULES
+from startup_profile import phase as startup_phase, mark as startup_mark
+
+startup_mark("main_imports")
+
+
+def missing_modules(names):
+    """
+    Модули из names, которых нет в окружении. Проверка по метаданным импорта (importlib.util.find_spec):
+    сами библиотеки (torch, faster_whisper) не загружаются — это делается позже, при первом использовании.
+    """
+    importlib.invalidate_caches()  # пакеты, только что установленные pip, должны быть видны
+    missing = []
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                missing.append(name)
+        except (ImportError, ValueError):
+            missing.append(name)
+    return missing
 
 def on_app_closing(root, app=None, WhisperModelSingleton=None):
     """Логика безопасного завершения работы приложения."""
@@ -21,6 +48,21 @@ def on_app_closing(root, app=None, WhisperModelSingleton=None):
             WhisperModelSingleton.unload()
         root.destroy()
 
+def _finish_startup_profile(root, app):
+    """
+    --profile-startup: после первого простоя главного цикла пишет отчёт (JSON), выводит нарушения бюджета
+    и закрывает окно. Возвращает код выхода: 0 — в пределах бюджета, 1 — бюджет превышен.
+    """
+    import startup_profile
+    path = _PROFILE_ARG.split("=", 1)[1].strip() if "=" in _PROFILE_ARG else None
+    path, report = startup_profile.write_report(path or None)
+    print(t("startup_profile_written", path=path, seconds=f"{report['time_to_interactive_s'] or 0:.3f}"))
+    for violation in report["violations"]:
+        print(t("startup_budget_exceeded", reason=violation))
+    app.prepare_close()
+    root.destroy()
+    return 1 if report["violations"] else 0
+
 def main():
     # Python 3.14+: PyTorch / ctranslate2 / faster-whisper часто без колёс на PyPI — установка падает
     if sys.version_info >= (3, 14):
@@ -39,35 +81,32 @@ def main():
             pass
 
     # 0. Проверка версии Python и установка pyaudioop для Python 3.13+
-    python_version = sys.version_info[:2]
-    if python_version >= (3, 13):
-        try:
-            import pyaudioop
-        except ImportError:
-            print(t("python_detected", major=python_version[0], minor=python_version[1]))
-            print(t("installing_pyaudioop"))
-            import subprocess
-            kwargs = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
-            if sys.platform == "win32":
-                kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
-            result = subprocess.run([sys.executable, "-m", "pip", "install", "pyaudioop"], **kwargs)
-            if result.returncode == 0:
-                print(t("pyaudioop_installed"))
-            else:
-                print(t("pyaudioop_warning"))
-                print(t("pyaudioop_manual"))
+    with startup_phase("pyaudioop_check"):
+        python_version = sys.version_info[:2]
+        if python_version >= (3, 13):
+            if missing_modules(["pyaudioop"]):
+                print(t("python_detected", major=python_version[0], minor=python_version[1]))
+                print(t("installing_pyaudioop"))
+                import subprocess
+                kwargs = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+                if sys.platform == "win32":
+                    kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+                result = subprocess.run([sys.executable, "-m", "pip", "install", "pyaudioop"], **kwargs)
+                if result.returncode == 0:
+                    print(t("pyaudioop_installed"))
+                else:
+                    print(t("pyaudioop_warning"))
+                    print(t("pyaudioop_manual"))
     
-    # 1. Проверка наличия критических библиотек перед импортом GUI
+    # 1. Проверка наличия критических библиотек перед импортом GUI (без их импорта)
     def _check_deps():
-        try:
-            import pydub  # noqa: F401
-            import faster_whisper  # noqa: F401
-            import torch  # noqa: F401
-            return True, None
-        except ImportError as e:
-            return False, str(e)
-
-    ok, dep_err = _check_deps()
+        missing = missing_modules(REQUIRED_MODULES)
+        if missing:
+            return False, ", ".join(f"No module named '{name}'" for name in missing)
+        return True, None
+
+    with startup_phase("dependency_check"):
+        ok, dep_err = _check_deps()
     if not ok:
         print(t("missing_components", error=dep_err or ""))
         print(t("starting_installation"))
@@ -86,29 +125,42 @@ def main():
     # 2. Локальный импорт компонентов проекта после проверки зависимостей
     # Это предотвращает ошибку ModuleNotFoundError при старте
     try:
-        from gui import WhisperGUI, BaseTk
-        from model_manager import WhisperModelSingleton
+        with startup_phase("gui_import"):
+            from gui import WhisperGUI, BaseTk
+            from model_manager import WhisperModelSingleton
     except ImportError as e:
         messagebox.showerror(t("import_error"), t("import_error_msg", error=str(e)))
         return
 
     # 3. Инициализация и запуск интерфейса
     try:
-        root = BaseTk()
-        app = WhisperGUI(
-            root,
-            on_close_factory=lambda r, a: lambda: on_app_closing(r, a, WhisperModelSingleton),
-        )
+        with startup_phase("tk_root"):
+            root = BaseTk()
+        with startup_phase("gui_init"):
+            app = WhisperGUI(
+                root,
+                on_close_factory=lambda r, a: lambda: on_app_closing(r, a, WhisperModelSingleton),
+            )
         root.protocol("WM_DELETE_WINDOW", app.on_window_close)
 
         # При аргументе --transcribe автоматически запускаем транскрибацию текущей очереди
         if len(sys.argv) > 1 and sys.argv[1].strip().lower() == "--transcribe":
             root.after(500, app.auto_start_queue)
 
+        # Профиль запуска: отчёт пишется после первого простоя главного цикла, затем приложение закрывается
+        profile_exit = []
+        if _PROFILE_ARG:
+            root.after_idle(lambda: profile_exit.append(_finish_startup_profile(root, app)))
+
         # Запуск главного цикла
         root.mainloop()
+        if profile_exit:
+            return profile_exit[0]
     except Exception as e:
         messagebox.showerror(t("critical_error"), t("critical_error_msg", error=str(e)))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Нужно для процессов-воркеров (worker_pool, метод spawn) в собранном exe
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
\ No newline at end of file
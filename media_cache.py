@@ -0,0 +1,226 @@
+"""
+Постоянный кэш метаданных медиафайлов (длительность, кодек, частота дискретизации, каналы, число потоков,
+хэш содержимого для кэша результатов).
+Ключ — нормализованный путь; запись действительна, пока совпадают размер и mtime файла,
+поэтому повторное добавление или загрузка известного файла стоит одного stat вместо запуска ffprobe.
+Кэш хранится в media_cache.json (BASE_DIR), размер ограничен MEDIA_CACHE_MAX_ENTRIES (вытесняются давно неиспользуемые).
+"""
+import atexit
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from config import BASE_DIR, MEDIA_CACHE_FILE, MEDIA_CACHE_MAX_ENTRIES
+
+# Размер блока чтения при подсчёте хэша содержимого (байт)
+_HASH_CHUNK_BYTES = 1 << 20
+
+
+def probe_media(path):
+    """
+    Метаданные файла через ffprobe: dict с ключами duration, codec, sample_rate, channels, streams.
+    Если ffprobe недоступен или не справился — длительность через pydub (остальные поля None).
+    Возвращает None, если длительность определить не удалось.
+    """
+    try:
+        kwargs = {"capture_output": True, "text": True, "timeout": 30}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-show_entries",
+                "format=duration,nb_streams:stream=codec_type,codec_name,sample_rate,channels",
+                "-of", "json", path
+            ],
+            **kwargs,
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            data = json.loads(result.stdout)
+            fmt = data.get("format") or {}
+            audio = next((s for s in data.get("streams") or [] if s.get("codec_type") == "audio"), {})
+            duration = float(fmt.get("duration") or 0.0)
+            if duration > 0:
+                return {
+                    "duration": duration,
+                    "codec": audio.get("codec_name"),
+                    "sample_rate": int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+                    "channels": audio.get("channels"),
+                    "streams": int(fmt.get("nb_streams") or len(data.get("streams") or [])),
+                }
+    except (FileNotFoundError, subprocess.TimeoutExpired, ValueError, OSError):
+        pass
+    try:
+        from audio_io import import_audio_segment
+        duration = len(import_audio_segment().from_file(path)) / 1000.0
+    except (ImportError, OSError, Exception):
+        return None
+    if duration <= 0:
+        return None
+    return {"duration": duration, "codec": None, "sample_rate": None, "channels": None, "streams": None}
+
+
+class MediaMetadataCache:
+    """Потокобезопасный кэш метаданных с записью на диск по flush() (и при выходе из программы)."""
+
+    def __init__(self, file_path, max_entries):
+        self.file_path = file_path
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._entries = None  # загружается при первом обращении
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Запись на диск — отдельной блокировкой: get/put не ждут диск, а снимки пишутся по порядку
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def get(self, path, st=None):
+        """Запись для path, если размер и mtime не изменились; иначе None. st — готовый os.stat (опционально)."""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        key = self._key(path)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+                # Время использования нужно только для вытеснения: попадание само по себе запись на диск не вызывает
+                entry["used"] = time.time()
+                self.hits += 1
+                return dict(entry)
+            self.misses += 1
+            return None
+
+    def put(self, path, info, st=None):
+        """Записывает поля info для path; поля действующей записи той же версии файла сохраняются."""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return
+        key = self._key(path)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if not entry or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+                entry = {}
+            entry.update(info)
+            entry.update({"size": st.st_size, "mtime_ns": st.st_mtime_ns, "used": time.time()})
+            self._entries[key] = entry
+            self._dirty = True
+            if len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи (с запасом 10%, чтобы не вытеснять на каждом put)."""
+        keep = int(self.max_entries * 0.9)
+        by_use = sorted(self._entries.items(), key=lambda kv: kv[1].get("used", 0.0), reverse=True)
+        self._entries = dict(by_use[:keep])
+
+    def flush(self):
+        """
+        Записывает кэш на диск, если были изменения: через уникальный временный файл в том же каталоге
+        и os.replace, под _write_lock — параллельные flush (потоки, процессы-воркеры) не портят файл.
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty or self._entries is None:
+                    return
+                data = json.dumps(self._entries, ensure_ascii=False)
+                self._dirty = False
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.file_path) + ".",
+                                                suffix=".tmp", dir=os.path.dirname(self.file_path) or None)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.file_path)
+            except OSError:
+                if tmp_path is not None:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+                with self._lock:
+                    self._dirty = True
+
+
+_cache = MediaMetadataCache(os.path.join(BASE_DIR, MEDIA_CACHE_FILE), MEDIA_CACHE_MAX_ENTRIES)
+atexit.register(_cache.flush)
+
+
+def get_media_info(path):
+    """Метаданные файла из кэша или через probe_media (результат кэшируется). None — если определить не удалось."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    info = _cache.get(path, st)
+    if info is not None and "duration" in info:
+        return info
+    info = probe_media(path)
+    if info is not None:
+        _cache.put(path, info, st)
+    return info
+
+
+def get_cached_media_info(path):
+    """Метаданные только из кэша (один stat, без ffprobe); None при промахе."""
+    info = _cache.get(path)
+    return info if info is not None and "duration" in info else None
+
+
+def file_content_hash(path):
+    """SHA-256 содержимого файла (читается блоками по 1 МБ). OSError — если файл не прочитать."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_content_hash(path):
+    """
+    Хэш содержимого файла для кэша результатов: считается один раз на версию файла (размер + mtime)
+    и хранится в записи кэша метаданных. OSError — если файл не прочитать.
+    """
+    st = os.stat(path)
+    info = _cache.get(path, st)
+    if info is not None and info.get("sha256"):
+        return info["sha256"]
+    digest = file_content_hash(path)
+    _cache.put(path, {"sha256": digest}, st)
+    return digest
+
+
+def flush_media_cache():
+    """Сохраняет кэш на диск (вызывается после пакетного добавления файлов и загрузки очереди)."""
+    _cache.flush()
+
+
+def media_cache_stats():
+    """(hits, misses) с момента запуска."""
+    return _cache.hits, _cache.misses
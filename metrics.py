@@ -0,0 +1,309 @@
+"""
+Телеметрия обработки очереди: для каждого файла — время этапов (определение длительности, кэш результатов,
+декодирование, VAD и подготовка признаков, работа модели, запись TXT/SRT, экспорт MP3, контрольные точки) и счётчики
+(секунды звука и речи, сегменты, RTF, пиковая память процесса). Запись на файл — строка в metrics.jsonl рядом
+с request_queue.json (BASE_DIR) с ротацией по размеру; итог запуска — одна строка в логе (TranscriptionPipeline.run).
+Счётчики и датчики процесса для мониторинга — в текстовом формате Prometheus: GET /metrics HTTP API (job_server.py)
+и/или файл для textfile collector node_exporter (metrics_textfile в settings.json).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from config import APP_VERSION, METRICS_LOG_MAX_BYTES, METRICS_LOG_BACKUPS
+from utils import process_memory_mb
+
+# Порядок этапов в записи и в итоговой строке лога
+STAGES = (
+    "probe", "cache_lookup", "model_load", "decode", "vad_features", "model", "write_outputs", "mp3_export", "checkpoint",
+)
+
+
+class FileMetrics:
+    """
+    Замеры одного файла очереди: stage() / add() — время этапов, sample_memory() — пиковая память процесса
+    (опрос в ключевых точках, а не на каждый сегмент). Время файла считается от создания или от mark_started().
+    """
+
+    def __init__(self, path, engine=None, mode="sequential"):
+        self.path = path
+        self.engine = engine
+        self.mode = mode
+        self.stages = {}
+        self.audio_sec = 0.0
+        self.speech_sec = None
+        self.segments = 0
+        self.peak_rss_mb = None
+        self._started = time.perf_counter()
+        self.sample_memory()
+
+    def mark_started(self):
+        """Начало обработки файла (в пуле воркеров — когда воркер взял первую часть, а не когда файл поставлен)."""
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, seconds)
+
+    def sample_memory(self, value=None):
+        """Учитывает текущую память процесса или переданное значение (МБ; например, память воркера)."""
+        value = process_memory_mb() if value is None else value
+        if value is not None and (self.peak_rss_mb is None or value > self.peak_rss_mb):
+            self.peak_rss_mb = value
+
+    def finish(self, status):
+        """Запись для metrics.jsonl; время вне замеренных этапов (лог, обратные вызовы) — этап other."""
+        self.sample_memory()
+        wall = time.perf_counter() - self._started
+        stages = {name: round(self.stages[name], 4) for name in STAGES if name in self.stages}
+        stages.update({name: round(sec, 4) for name, sec in self.stages.items() if name not in stages})
+        stages["other"] = round(max(0.0, wall - sum(self.stages.values())), 4)
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "version": APP_VERSION,
+            "path": self.path,
+            "status": status,
+            "mode": self.mode,
+            "engine": self.engine,
+            "audio_sec": round(self.audio_sec, 3),
+            "speech_sec": None if self.speech_sec is None else round(self.speech_sec, 3),
+            "segments": self.segments,
+            "wall_sec": round(wall, 4),
+            "rtf": round(wall / self.audio_sec, 4) if self.audio_sec > 0 else None,
+            "peak_rss_mb": self.peak_rss_mb,
+            "stages": stages,
+        }
+
+
+class BatchMetrics:
+    """
+    Сумма записей FileMetrics за один запуск (TranscriptionPipeline.run) — для итоговой строки лога.
+    wall_sec — время запуска по часам (от создания до finish), file_sec — сумма времени файлов: в пуле воркеров
+    файлы обрабатываются одновременно, и сумма больше времени запуска (до числа воркеров раз).
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.audio_sec = 0.0
+        self.speech_sec = None  # None — модель не сообщила длительность речи после VAD
+        self.segments = 0
+        self.file_sec = 0.0
+        self.peak_rss_mb = None
+        self._started = time.perf_counter()
+        self._finished = None
+        self.stages = {}
+
+    def add(self, record):
+        self.files += 1
+        self.audio_sec += record["audio_sec"]
+        if record["speech_sec"] is not None:
+            self.speech_sec = (self.speech_sec or 0.0) + record["speech_sec"]
+        self.segments += record["segments"]
+        self.file_sec += record["wall_sec"]
+        if record["peak_rss_mb"] is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, record["peak_rss_mb"])
+        for name, sec in record["stages"].items():
+            self.stages[name] = self.stages.get(name, 0.0) + sec
+
+    def top_stages(self, count=3):
+        """Самые долгие этапы: [(имя, доля 0–100 от суммарного времени файлов)]."""
+        total = sum(self.stages.values()) or 1.0
+        ranked = sorted(self.stages.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [(name, sec * 100.0 / total) for name, sec in ranked if sec > 0]
+
+    def finish(self):
+        """Фиксирует конец запуска для wall_sec."""
+        self._finished = time.perf_counter()
+
+    @property
+    def wall_sec(self):
+        return (self._finished or time.perf_counter()) - self._started
+
+    @property
+    def rtf(self):
+        """Время запуска по часам / секунды звука: в параллельном режиме — с учётом одновременной обработки."""
+        return self.wall_sec / self.audio_sec if self.audio_sec > 0 else None
+
+
+class MetricsLog:
+    """
+    Журнал metrics.jsonl: одна JSON-строка на файл. Если запись превысила бы max_bytes, файл сдвигается
+    в metrics.jsonl.1 (старые — .2 … .backups, последний удаляется). Запись — под блокировкой (потоки GUI и API).
+    """
+
+    def __init__(self, path, max_bytes=METRICS_LOG_MAX_BYTES, backups=METRICS_LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        data = line.encode("utf-8")
+        with self._lock:
+            try:
+                if self.max_bytes and os.path.exists(self.path) \
+                        and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "ab") as f:
+                    f.write(data)
+            except OSError:
+                pass
+
+    def _rotate(self):
+        if not self.backups:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+# Экспозиция в текстовом формате Prometheus: имя -> (тип, описание). Значения копятся в _registry
+# (обработка файлов — TranscriptionPipeline, слежение за каталогом — GUI), модели читаются из WhisperModelSingleton
+PROMETHEUS_METRICS = {
+    "whisperfast_build_info": ("gauge", "Application version (value is always 1)."),
+    "whisperfast_files_total": ("counter", "Queue files finished, by status (done, cached, skipped, cancelled, error)."),
+    "whisperfast_audio_seconds_total": ("counter", "Seconds of audio transcribed (done and cached files)."),
+    "whisperfast_processing_seconds_total": ("counter", "Sum of per-file wall-clock processing seconds; "
+                                             "files processed in parallel overlap, so it can exceed elapsed time."),
+    "whisperfast_segments_total": ("counter", "Transcript segments written."),
+    "whisperfast_last_file_rtf": ("gauge", "Real-time factor of the last transcribed file (processing / audio seconds)."),
+    "whisperfast_watch_files_detected_total": ("counter", "New files found in the watch folder."),
+    "whisperfast_queue_depth": ("gauge", "Queue files not processed yet."),
+    "whisperfast_processing": ("gauge", "1 while the queue is being processed."),
+    "whisperfast_model_loads_total": ("counter", "Whisper model loads."),
+    "whisperfast_model_load_seconds_total": ("counter", "Seconds spent loading Whisper models."),
+    "whisperfast_model_cache_hits_total": ("counter", "Model requests served by an already loaded model."),
+    "whisperfast_model_cache_evictions_total": ("counter", "Models unloaded to fit the memory budget."),
+    "whisperfast_models_resident": ("gauge", "Whisper models currently loaded."),
+    "whisperfast_model_resident_bytes": ("gauge", "Estimated memory of the loaded Whisper models."),
+    "whisperfast_process_resident_bytes": ("gauge", "Resident memory of the application process."),
+}
+
+
+class PrometheusRegistry:
+    """
+    Счётчики и датчики процесса (потокобезопасно). inc / set — значения с метками; set_function — датчик,
+    который вычисляется при каждом render() (например, глубина очереди GUI).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # (имя, ((метка, значение), ...)) -> число
+        self._functions = {}
+
+    def inc(self, name, value=1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def set_function(self, name, func):
+        with self._lock:
+            self._functions[name] = func
+
+    def observe_file(self, record):
+        """Запись FileMetrics.finish(): статус, секунды звука и обработки, сегменты, RTF последнего файла."""
+        self.inc("whisperfast_files_total", status=record["status"])
+        self.inc("whisperfast_processing_seconds_total", record["wall_sec"])
+        if record["status"] in ("done", "cached"):
+            self.inc("whisperfast_audio_seconds_total", record["audio_sec"])
+            self.inc("whisperfast_segments_total", record["segments"])
+        if record["status"] == "done" and record["rtf"] is not None:
+            self.set("whisperfast_last_file_rtf", record["rtf"])
+
+    def _model_values(self):
+        # model_manager не импортируется ради метрик: если его нет в памяти, моделей тоже нет
+        model_manager = sys.modules.get("model_manager")
+        if model_manager is None:
+            return {}
+        stats = model_manager.WhisperModelSingleton.cache_stats()
+        return {
+            "whisperfast_model_loads_total": stats["loads"],
+            "whisperfast_model_load_seconds_total": stats["load_seconds"],
+            "whisperfast_model_cache_hits_total": stats["hits"],
+            "whisperfast_model_cache_evictions_total": stats["evictions"],
+            "whisperfast_models_resident": stats["models"],
+            "whisperfast_model_resident_bytes": stats["resident_mb"] * 1024 * 1024,
+        }
+
+    def samples(self):
+        """[(имя, метки, значение)] — накопленные значения, вычисляемые датчики, модели и память процесса."""
+        with self._lock:
+            samples = [(name, dict(labels), value) for (name, labels), value in self._values.items()]
+            functions = list(self._functions.items())
+        samples.append(("whisperfast_build_info", {"version": APP_VERSION}, 1))
+        for name, func in functions:
+            try:
+                samples.append((name, {}, func()))
+            except Exception:
+                pass
+        samples += [(name, {}, value) for name, value in self._model_values().items()]
+        rss_mb = process_memory_mb()
+        if rss_mb is not None:
+            samples.append(("whisperfast_process_resident_bytes", {}, rss_mb * 1024 * 1024))
+        return samples
+
+    def render(self):
+        """Текстовый формат Prometheus (version 0.0.4): # HELP / # TYPE и строки значений по каждой метрике."""
+        by_name = {}
+        for name, labels, value in self.samples():
+            by_name.setdefault(name, []).append((labels, value))
+        lines = []
+        for name in sorted(by_name, key=lambda n: (n not in PROMETHEUS_METRICS, n)):
+            kind, help_text = PROMETHEUS_METRICS.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(by_name[name], key=lambda item: sorted(item[0].items())):
+                label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(labels.items()))
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+_registry = PrometheusRegistry()
+
+
+def prometheus_registry():
+    """Общий для процесса реестр метрик Prometheus."""
+    return _registry
+
+
+def render_prometheus():
+    return _registry.render()
+
+
+def write_prometheus_textfile(path):
+    """
+    Записывает метрики в файл для textfile collector node_exporter (*.prom): через временный файл и os.replace,
+    чтобы node_exporter не прочитал файл наполовину. OSError пробрасывается.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
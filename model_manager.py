@@ -1,95 +1,332 @@
 import gc
-import torch
-from faster_whisper import WhisperModel
-from config import DEFAULT_MODEL, WHISPER_MODELS
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    DEFAULT_MODEL, WHISPER_MODELS, PRELOAD_WARMUP_S,
+    DEFAULT_MODEL_CACHE_MAX_MB, WHISPER_MODEL_PARAMS_M, COMPUTE_TYPE_BYTES, GPU_WORKER_OVERHEAD_MB,
+)
 
 from i18n import t
+from utils import process_memory_mb
+from autotune import tuned_load_options
+
+
+# torch и faster_whisper импортируются при первом обращении к устройству или модели, а не при импорте модуля:
+# иначе они загружались бы при запуске GUI, до первой транскрибации
+def _cuda_available():
+    import torch
+    return torch.cuda.is_available()
+
+
+def _empty_cuda_cache():
+    """Очистка кэша CUDA; torch не импортируется, если модель ни разу не загружалась."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def _cuda_reserved_mb():
+    """Видеопамять, зарезервированная torch (МБ), или None без CUDA / если torch не загружен."""
+    torch = sys.modules.get("torch")
+    try:
+        if torch is not None and torch.cuda.is_available():
+            return round(torch.cuda.memory_reserved() / (1024 * 1024))
+    except Exception:
+        pass
+    return None
+
+
+def estimate_model_mb(model_name, compute_type):
+    """Оценка памяти модели (МБ): число параметров × байт на параметр для compute_type, +10% на буферы."""
+    params_m = WHISPER_MODEL_PARAMS_M.get(model_name, WHISPER_MODEL_PARAMS_M[DEFAULT_MODEL])
+    return int(params_m * COMPUTE_TYPE_BYTES.get(compute_type, 2) * 1.1)
+
+
+def _cuda_free_mb():
+    """Свободная видеопамять устройства 0 (МБ) или None, если определить не удалось."""
+    try:
+        import torch
+        free, _ = torch.cuda.mem_get_info(0)
+        return int(free / (1024 * 1024))
+    except Exception:
+        return None
+
+
+def gpu_worker_limit(model_name, compute_type, requested):
+    """
+    Сколько воркеров пула (у каждого своя копия модели) помещается в свободную видеопамять.
+    Возвращает (workers, free_mb, need_mb); если свободную память определить не удалось — один воркер (free_mb=None).
+    """
+    need_mb = estimate_model_mb(model_name, compute_type) + GPU_WORKER_OVERHEAD_MB
+    free_mb = _cuda_free_mb()
+    if free_mb is None:
+        return 1, None, need_mb
+    return max(1, min(requested, free_mb // need_mb)), free_mb, need_mb
+
+
+def _warm_up(model, path):
+    """Транскрибация первых PRELOAD_WARMUP_S сек файла path (без VAD, beam_size=1) — прогрев модели."""
+    from audio_io import decode_audio_range
+    audio = decode_audio_range(path, 0.0, PRELOAD_WARMUP_S)
+    segments, _ = model.transcribe(audio, beam_size=1)
+    for _ in segments:
+        pass
+
 
 class WhisperModelSingleton:
     """
-    Класс-синглтон для управления моделью Whisper.
-    Обеспечивает однократную загрузку и безопасную выгрузку из памяти.
+    Класс-синглтон для управления моделями Whisper.
+    Держит в памяти несколько загруженных моделей (ключ — имя, устройство, точность) в пределах бюджета памяти
+    (configure); при нехватке выгружаются давно не использованные (LRU). Обеспечивает безопасную выгрузку из памяти.
     """
-    _model = None
-    _mode = None
-    _model_name = None
+    # (имя, device, compute_type) -> {"model", "mode", "size_mb"}; порядок — от давно использованной к последней
+    _models = OrderedDict()
+    _max_mb = DEFAULT_MODEL_CACHE_MAX_MB
+    _active_key = None
+    _last_used = None  # time.time() последнего обращения (get / touch) или загрузки — для выгрузки после простоя
+    hits = 0
+    misses = 0
+    evictions = 0
+    loads = 0
+    load_seconds = 0.0
+    # Загрузка из фонового потока (preload) и из потока обработки не должна идти одновременно
+    _lock = threading.RLock()
+    # Время загрузки и прогрева заранее загруженной модели (сек); логируется при первом get() как сэкономленное
+    _preload_saved_sec = None
 
-    @classmethod
-    def get(cls, log_func, mode, model_name=None):
-        """
-        Загружает модель, если она еще не в памяти или если сменилось устройство/модель.
-        model_name — короткое имя (tiny, base, large-v3-turbo и т.д.) или None для DEFAULT_MODEL.
-        """
+    @staticmethod
+    def resolve_model_name(model_name=None):
+        """Короткое имя модели из WHISPER_MODELS; пустое или неизвестное имя -> DEFAULT_MODEL."""
         name = (model_name or DEFAULT_MODEL).strip() or DEFAULT_MODEL
-        if name not in WHISPER_MODELS:
-            name = DEFAULT_MODEL
+        return name if name in WHISPER_MODELS else DEFAULT_MODEL
 
+    @staticmethod
+    def resolve_device(mode):
+        """
+        Возвращает (device, compute_type) для режима AUTO / GPU / CPU.
+        Используется также процессами-воркерами (worker_pool), которые загружают свою копию модели.
+        """
         # Определяем устройство (cuda или cpu)
-        device = "cuda" if (mode in ["GPU", "AUTO"] and torch.cuda.is_available()) else "cpu"
+        device = "cuda" if (mode in ["GPU", "AUTO"] and _cuda_available()) else "cpu"
 
         # Определяем точность вычислений
         if device == "cuda":
             try:
+                import torch
                 major, minor = torch.cuda.get_device_capability(0)
             except Exception:
                 major, minor = 0, 0
             compute = "float16" if major >= 7 else "int8"
         else:
             compute = "int8"
+        return device, compute
+
+    @classmethod
+    def resolve_load_options(cls, mode, model_name=None):
+        """
+        (device, compute_type, options) для загрузки модели: resolve_device, а если для модели на этой машине
+        запускалась автонастройка (python -m whisperfast tune) — её compute_type, cpu_threads и num_workers.
+        """
+        device, compute = cls.resolve_device(mode)
+        tuned_compute, options = tuned_load_options(cls.resolve_model_name(model_name), device)
+        return device, tuned_compute or compute, options
+
+    @classmethod
+    def configure(cls, max_mb=None):
+        """Бюджет памяти кэша моделей (МБ; model_cache_max_mb в settings.json). 0 — в памяти только одна модель."""
+        try:
+            cls._max_mb = max(0, int(max_mb if max_mb is not None else DEFAULT_MODEL_CACHE_MAX_MB))
+        except (TypeError, ValueError):
+            cls._max_mb = DEFAULT_MODEL_CACHE_MAX_MB
 
-        if device == "cpu" and mode in ["GPU", "AUTO"] and not torch.cuda.is_available():
+    @classmethod
+    def get(cls, log_func, mode, model_name=None):
+        """
+        Возвращает модель из кэша или загружает её (при нехватке бюджета сначала выгружаются давно не использованные).
+        model_name — короткое имя (tiny, base, large-v3-turbo и т.д.) или None для DEFAULT_MODEL.
+        """
+        with cls._lock:
+            cls._last_used = time.time()
+            return cls._get_locked(log_func, mode, model_name)
+
+    @classmethod
+    def touch(cls):
+        """Отметка активности (обработка очереди, в т. ч. из каталога слежения): откладывает выгрузку по простою."""
+        cls._last_used = time.time()
+
+    @classmethod
+    def unload_if_idle(cls, log_func, idle_sec):
+        """
+        Выгружает все модели, если к ним не обращались idle_sec сек; следующий get() загрузит модель заново.
+        Освобождённая память пишется в лог: оценка размера моделей, изменение памяти процесса и видеопамяти.
+        Если модель сейчас загружается (блокировка занята) — ничего не делает. Возвращает True при выгрузке.
+        """
+        if not cls._lock.acquire(blocking=False):
+            return False
+        try:
+            if not cls._models or cls._last_used is None or time.time() - cls._last_used < idle_sec:
+                return False
+            names = ", ".join(name for name, _, _ in cls._models)
+            estimate_mb = cls.resident_mb()
+            ram_before, vram_before = process_memory_mb(), _cuda_reserved_mb()
+            cls._models.clear()
+            cls._active_key = None
+            cls._preload_saved_sec = None
+            gc.collect()
+            _empty_cuda_cache()
+            ram_after, vram_after = process_memory_mb(), _cuda_reserved_mb()
+        finally:
+            cls._lock.release()
+        log_func(t("model_idle_unloaded", models=names, minutes=int(idle_sec // 60), size_mb=estimate_mb))
+        if ram_before is not None and ram_after is not None:
+            log_func(t("model_memory_freed", before=ram_before, after=ram_after, freed=max(0, ram_before - ram_after)))
+        if vram_before is not None and vram_after is not None:
+            log_func(t("model_vram_freed", freed=max(0, vram_before - vram_after)))
+        return True
+
+    @classmethod
+    def _get_locked(cls, log_func, mode, model_name=None):
+        name = cls.resolve_model_name(model_name)
+        device, compute, load_options = cls.resolve_load_options(mode, name)
+
+        if device == "cpu" and mode in ["GPU", "AUTO"] and not _cuda_available():
             try:
                 log_func(t("cuda_unavailable"))
             except Exception:
                 log_func("⚠ CUDA is not available — running on CPU (including AMD Radeon GPUs).")
 
-        need_load = (
-            cls._model is None
-            or cls._mode != mode
-            or cls._model_name != name
-        )
-        if need_load:
-            if cls._model is not None:
-                cls._model = None
-                cls._mode = None
-                cls._model_name = None
-                gc.collect()
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-            log_func(t("initializing_model", model=name))
-            log_func(t("device_info", device=device.upper(), precision=compute))
-            try:
-                cls._model = WhisperModel(name, device=device, compute_type=compute)
-                cls._mode = mode
-                cls._model_name = name
-                log_func(t("model_ready"))
-            except Exception as e:
-                log_func(t("model_load_error", error=str(e)))
-                raise e
-        return cls._model
+        key = (name, device, compute)
+        entry = cls._models.get(key)
+        if entry is not None:
+            cls._models.move_to_end(key)
+            cls.hits += 1
+            if cls._active_key != key:
+                log_func(t("model_cache_hit", model=name, device=device.upper(), precision=compute))
+            cls._active_key = key
+            if cls._preload_saved_sec is not None:
+                log_func(t("model_preload_used", seconds=f"{cls._preload_saved_sec:.1f}"))
+                cls._preload_saved_sec = None
+            return entry["model"]
+
+        cls.misses += 1
+        cls._preload_saved_sec = None
+        size_mb = estimate_model_mb(name, compute)
+        log_func(t("model_cache_miss", model=name, resident_mb=cls.resident_mb(), max_mb=cls._max_mb))
+        cls._evict_for(log_func, size_mb)
+        log_func(t("initializing_model", model=name))
+        log_func(t("device_info", device=device.upper(), precision=compute))
+        if load_options:
+            log_func(t("model_autotuned", threads=load_options.get("cpu_threads", "—"),
+                       workers=load_options.get("num_workers", "—")))
+        try:
+            from faster_whisper import WhisperModel
+            started = time.time()
+            model = WhisperModel(name, device=device, compute_type=compute, **load_options)
+        except Exception as e:
+            log_func(t("model_load_error", error=str(e)))
+            raise e
+        cls.loads += 1
+        cls.load_seconds += time.time() - started
+        cls._models[key] = {"model": model, "mode": mode, "size_mb": size_mb}
+        cls._active_key = key
+        # Простой отсчитывается от конца загрузки: и предзагруженная, ни разу не использованная модель выгружается
+        cls._last_used = time.time()
+        log_func(t("model_ready"))
+        return model
+
+    @classmethod
+    def _evict_for(cls, log_func, size_mb):
+        """Выгружает давно не использованные модели, пока новая (size_mb) не помещается в бюджет."""
+        evicted = False
+        while cls._models and cls.resident_mb() + size_mb > cls._max_mb:
+            (name, device, compute), entry = cls._models.popitem(last=False)
+            cls.evictions += 1
+            evicted = True
+            if cls._active_key == (name, device, compute):
+                cls._active_key = None
+            log_func(t("model_cache_evict", model=name, device=device.upper(), precision=compute,
+                       size_mb=entry["size_mb"]))
+            entry.clear()
+        if evicted:
+            gc.collect()
+            _empty_cuda_cache()
+
+    @classmethod
+    def resident_mb(cls):
+        """Оценка памяти всех загруженных моделей (МБ)."""
+        return sum(entry.get("size_mb", 0) for entry in list(cls._models.values()))
+
+    @classmethod
+    def resident_models(cls):
+        """
+        Загруженные модели для интерфейса (диалог выбора модели): список словарей name, device, compute_type,
+        size_mb (оценка), active (последняя использованная) — от последней использованной к самой давней.
+        """
+        with cls._lock:
+            return [
+                {"name": name, "device": device, "compute_type": compute, "size_mb": entry["size_mb"],
+                 "active": (name, device, compute) == cls._active_key}
+                for (name, device, compute), entry in reversed(cls._models.items())
+            ]
+
+    @classmethod
+    def cache_stats(cls):
+        """Счётчики кэша моделей: hits, misses, evictions, loads, load_seconds, models, resident_mb, max_mb."""
+        # Без блокировки: метрики (GET /metrics) не должны ждать загрузки модели, которая держит _lock
+        return {"hits": cls.hits, "misses": cls.misses, "evictions": cls.evictions,
+                "loads": cls.loads, "load_seconds": round(cls.load_seconds, 3), "models": len(cls._models),
+                "resident_mb": cls.resident_mb(), "max_mb": cls._max_mb}
+
+    @classmethod
+    def preload(cls, log_func, mode, model_name=None, warmup_path=None):
+        """
+        Загрузка модели заранее (фоновый поток GUI) и короткий прогон на warmup_path (первые PRELOAD_WARMUP_S сек):
+        первый «Старт» не ждёт ни загрузки, ни инициализации вычислений. Возвращает (сек загрузки, сек прогрева).
+        Если модель уже в памяти — (0, 0) и ничего не делается.
+        """
+        with cls._lock:
+            name = cls.resolve_model_name(model_name)
+            if (name,) + cls.resolve_load_options(mode, name)[:2] in cls._models:
+                return 0.0, 0.0
+            started = time.time()
+            model = cls._get_locked(log_func, mode, name)
+            load_sec = time.time() - started
+            warmup_sec = 0.0
+            if warmup_path:
+                started = time.time()
+                try:
+                    _warm_up(model, warmup_path)
+                    warmup_sec = time.time() - started
+                except Exception as e:
+                    log_func(t("model_warmup_failed", error=str(e)))
+            cls._preload_saved_sec = load_sec + warmup_sec
+            cls._last_used = time.time()
+            return load_sec, warmup_sec
 
     @classmethod
     def unload(cls):
         """
-        Полностью освобождает ресурсы: удаляет модель и чистит кэш CUDA.
+        Полностью освобождает ресурсы: удаляет все модели и чистит кэш CUDA.
         """
-        if cls._model is not None:
-            cls._model = None
-            cls._mode = None
-            cls._model_name = None
+        cls._preload_saved_sec = None
+        if cls._models:
+            cls._models.clear()
+            cls._active_key = None
             
             # Принудительный запуск сборщика мусора Python
             gc.collect()
             
             # Очистка зарезервированной видеопамяти
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            _empty_cuda_cache()
             
             print("AI Resources: Unloaded successfully.")
 
     @classmethod
     def reset(cls):
-        """Сброс состояния: при следующем get() модель будет загружена заново."""
-        cls._model = None
-        cls._mode = None
-        cls._model_name = None
\ No newline at end of file
+        """Сброс состояния: все модели забываются, при следующем get() модель будет загружена заново."""
+        cls._preload_saved_sec = None
+        cls._models.clear()
+        cls._active_key = None
@@ -0,0 +1,108 @@
+"""
+Потоковая запись результата транскрибации в TXT и SRT.
+Каждый сегмент дописывается в файлы *.part сразу, как только его выдала модель, поэтому память не растёт
+с числом сегментов, а при сбое или отмене уже распознанный текст остаётся на диске.
+finish() атомарно переименовывает *.part в итоговые файлы (os.replace).
+Состояние писателя (state) сохраняется в контрольной точке задания и позволяет продолжить запись после перезапуска.
+"""
+import os
+import shutil
+
+from utils import format_timestamp_srt
+
+PART_SUFFIX = ".part"
+
+# Файлы пишутся в двоичном режиме (точные позиции для контрольных точек) с системным переводом строки,
+# как при прежней записи в текстовом режиме
+_NL = os.linesep
+
+
+class TranscriptWriter:
+    """
+    Писатель TXT + SRT одного задания. offset_sec прибавляется ко временам сегментов
+    (для отрезка файла модель выдаёт времена относительно его начала).
+    resume_state — state() прерванного писателя: *.part обрезаются до сохранённых позиций и дописываются.
+    """
+
+    def __init__(self, txt_path, srt_path, offset_sec=0.0, resume_state=None):
+        self.txt_path = txt_path
+        self.srt_path = srt_path
+        self.offset_sec = offset_sec
+        self.count = 0
+        self.last_end = None
+        self.finished = False
+        mode = "wb"
+        if resume_state:
+            # Хвост, записанный после последней контрольной точки, отбрасывается, чтобы не было повторов
+            os.truncate(txt_path + PART_SUFFIX, resume_state["txt_bytes"])
+            os.truncate(srt_path + PART_SUFFIX, resume_state["srt_bytes"])
+            self.count = resume_state["count"]
+            self.last_end = resume_state.get("last_end")
+            mode = "ab"
+        self._txt = open(txt_path + PART_SUFFIX, mode)
+        try:
+            self._srt = open(srt_path + PART_SUFFIX, mode)
+        except OSError:
+            self._txt.close()
+            raise
+
+    @property
+    def part_paths(self):
+        return [self.txt_path + PART_SUFFIX, self.srt_path + PART_SUFFIX]
+
+    def write(self, start, end, text):
+        """Дописывает сегмент в оба файла и сбрасывает буферы в ОС."""
+        start += self.offset_sec
+        end += self.offset_sec
+        text = (text or "").strip()
+        self.count += 1
+        txt = (_NL if self.count > 1 else "") + text
+        srt = f"{self.count}{_NL}{format_timestamp_srt(start)} --> {format_timestamp_srt(end)}{_NL}{text}{_NL}{_NL}"
+        self._txt.write(txt.encode("utf-8"))
+        self._srt.write(srt.encode("utf-8"))
+        self._txt.flush()
+        self._srt.flush()
+        self.last_end = end
+
+    def write_all(self, segments):
+        """Записывает все сегменты (объекты с start/end/text)."""
+        for s in segments:
+            self.write(s.start, s.end, s.text)
+
+    def state(self):
+        """Позиции в *.part и число сегментов — для контрольной точки (данные уже сброшены в ОС)."""
+        return {"count": self.count, "last_end": self.last_end,
+                "txt_bytes": self._txt.tell(), "srt_bytes": self._srt.tell()}
+
+    def close(self):
+        """Закрывает файлы, оставляя *.part на диске (частичный результат при отмене или ошибке)."""
+        for f in (self._txt, self._srt):
+            if not f.closed:
+                f.close()
+
+    def discard(self):
+        """Закрывает и удаляет файлы *.part (в них ничего не записано)."""
+        self.close()
+        for part_path in self.part_paths:
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+
+    def publish_partial(self):
+        """Копирует текущее содержимое *.part в итоговые TXT и SRT (частичный результат при отмене); *.part остаются."""
+        for final_path in (self.txt_path, self.srt_path):
+            tmp_path = final_path + ".tmp"
+            shutil.copyfile(final_path + PART_SUFFIX, tmp_path)
+            os.replace(tmp_path, final_path)
+
+    def finish(self):
+        """Сбрасывает данные на диск и атомарно заменяет итоговые TXT и SRT файлами *.part."""
+        for f in (self._txt, self._srt):
+            if not f.closed:
+                f.flush()
+                os.fsync(f.fileno())
+        self.close()
+        os.replace(self.txt_path + PART_SUFFIX, self.txt_path)
+        os.replace(self.srt_path + PART_SUFFIX, self.srt_path)
+        self.finished = True
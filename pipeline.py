@@ -0,0 +1,834 @@
+"""
+Обработка очереди без tkinter: транскрибация файлов (одной моделью или пулом воркеров),
+кэш результатов, контрольные точки и сохранение TXT/SRT/MP3, телеметрия по файлам (metrics.py).
+Используется GUI (WhisperGUI.process_queue) и консольным режимом (whisperfast.py batch);
+взаимодействие с интерфейсом — только через обратные вызовы TranscriptionPipeline.
+"""
+import os
+import re
+import time
+from contextlib import nullcontext
+
+from config import (
+    LANG_AUTO_VALUE, AUDIO_EXTENSIONS, DEFAULT_MODEL,
+    PROGRESS_UPDATE_INTERVAL_S, LOG_UPDATE_INTERVAL_S, FULL_VIDEO_SEGMENT_EPS_S,
+    WORKER_STATUS_LOG_INTERVAL_S, CHECKPOINT_INTERVAL_S,
+)
+from utils import (
+    format_timestamp, format_timestamp_filename, get_audio_duration_seconds, parse_timestamp_to_seconds,
+    normalize_queue_path,
+)
+from media_cache import get_content_hash
+from model_manager import WhisperModelSingleton, gpu_worker_limit
+from audio_io import DecodedAudio
+from transcriber import open_segments, is_partial_range, resolve_engine, VAD_OPTIONS
+from worker_pool import TranscriptionWorkerPool
+from result_cache import TranscriptionResultCache, make_result_key
+from chunking import plan_chunks, stitch_segments
+from output_writers import TranscriptWriter
+from checkpoints import load_checkpoint, save_checkpoint, remove_checkpoint
+from metrics import FileMetrics, BatchMetrics, prometheus_registry
+from i18n import t
+
+
+class _SegmentOffset:
+    """Сегмент с полями start, end, text (для смещения времени при обработке куска файла)."""
+    __slots__ = ("start", "end", "text")
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class TranscriptionPipeline:
+    """
+    Транскрибация списка элементов очереди (dict как в request_queue.json) с сохранением результатов.
+    Обратные вызовы (все необязательные; вызываются из потока обработки):
+      log(msg, tag=None)            — строка лога (tag="link" — путь к файлу);
+      on_progress(value)            — прогресс 0–100 (текущего файла или всей очереди в пуле воркеров);
+      on_file_start(path)           — началась обработка файла (в пуле — первой его части);
+      on_file_progress(path, value) — прогресс 0–100 конкретного файла;
+      on_segment(path, start, end, text) — распознанный сегмент (времена в секундах от начала файла);
+      on_file_done(path, outputs)   — файл сохранён, outputs — {"txt", "srt"[, "mp3"]};
+      on_file_error(path, error)    — файл не обработан (не читается или ошибка транскрибации);
+      ask_save_mp3(path) -> bool    — сохранять ли MP3 для аудио-источника (по умолчанию — да);
+      register_output_paths(paths)  — пути, которые будут созданы (чтобы слежение за каталогом их пропускало);
+      is_cancelled() -> bool        — запрошена отмена.
+    processed_marker — строка, удаляемая из имени исходного файла в именах результатов.
+    metrics_log — metrics.MetricsLog: запись с временем этапов и счётчиками по каждому файлу (None — не писать).
+    """
+
+    def __init__(self, log=None, result_cache=None, on_progress=None, on_file_done=None, ask_save_mp3=None,
+                 register_output_paths=None, is_cancelled=None, processed_marker="",
+                 on_file_start=None, on_file_progress=None, on_segment=None, on_file_error=None, metrics_log=None):
+        self.log = log or _noop
+        self.result_cache = result_cache or TranscriptionResultCache()
+        self.on_progress = on_progress or _noop
+        self.on_file_done = on_file_done or _noop
+        self.on_file_start = on_file_start or _noop
+        self.on_file_progress = on_file_progress or _noop
+        self.on_segment = on_segment or _noop
+        self.on_file_error = on_file_error or _noop
+        self.ask_save_mp3 = ask_save_mp3 or (lambda path: True)
+        self.register_output_paths = register_output_paths or _noop
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.processed_marker = processed_marker
+        self.metrics_log = metrics_log
+        self._file_metrics = None
+        self._batch_metrics = None
+
+    def run(self, rows, opts):
+        """
+        Обрабатывает элементы rows с опциями opts (как WhisperGUI.start_thread). Возвращает (done, skipped_paths).
+        Несколько файлов (или длинный файл при chunk_long_files) при parallel_workers > 1 идут в пул воркеров
+        (на GPU — не больше, чем копий модели помещается в видеопамять, см. _gpu_worker_limit).
+        Ошибки загрузки модели и пула воркеров пробрасываются вызывающему.
+        """
+        indices = list(range(len(rows)))
+        cache_hits, cache_misses = self.result_cache.hits, self.result_cache.misses
+        self._batch_metrics = BatchMetrics()
+        workers = int(opts.get("parallel_workers") or 1)
+        if workers > 1:
+            workers = self._gpu_worker_limit(workers, opts)
+        # Один файл тоже идёт в пул, если длинные файлы делятся на части между воркерами
+        if workers > 1 and (len(rows) > 1 or opts.get("chunk_long_files")):
+            done, skipped_paths = self._process_queue_parallel(indices, rows, opts, workers)
+        else:
+            done, skipped_paths = self._process_queue_sequential(indices, rows, opts)
+        cache_hits = self.result_cache.hits - cache_hits
+        cache_misses = self.result_cache.misses - cache_misses
+        if cache_hits or cache_misses:
+            self.log(t("result_cache_stats", hits=cache_hits, misses=cache_misses))
+        self._log_batch_metrics()
+        return done, skipped_paths
+
+    def _gpu_worker_limit(self, workers, opts):
+        """
+        Число воркеров с учётом устройства: на GPU каждый воркер загружает полную копию модели, поэтому воркеров
+        не больше, чем копий помещается в свободную видеопамять; при одном — очередь обрабатывается последовательно
+        моделью этого процесса. Причина ограничения пишется в лог.
+        """
+        model_name = WhisperModelSingleton.resolve_model_name(opts.get("whisper_model"))
+        device, compute, _ = WhisperModelSingleton.resolve_load_options(opts.get("device_mode", "AUTO"), model_name)
+        if device != "cuda":
+            return workers
+        limit, free_mb, need_mb = gpu_worker_limit(model_name, compute, workers)
+        if free_mb is None:
+            self.log(t("gpu_workers_memory_unknown", need=need_mb, requested=workers))
+        elif limit < workers:
+            self.log(t("gpu_workers_limited", free=free_mb, need=need_mb, workers=limit, requested=workers))
+        return limit
+
+    def _stage(self, name):
+        """Замер этапа текущего файла (metrics.FileMetrics); без замера файла — пустой контекст."""
+        return self._file_metrics.stage(name) if self._file_metrics is not None else nullcontext()
+
+    def _add_stage(self, name, seconds):
+        if self._file_metrics is not None:
+            self._file_metrics.add(name, seconds)
+
+    def _finish_file_metrics(self, status):
+        """Завершает замер текущего файла: запись в metrics_log и в сумму запуска. status — done/cached/skipped/…"""
+        metrics, self._file_metrics = self._file_metrics, None
+        if metrics is None:
+            return
+        record = metrics.finish(status)
+        prometheus_registry().observe_file(record)
+        if self._batch_metrics is not None:
+            self._batch_metrics.add(record)
+        if self.metrics_log is not None:
+            self.metrics_log.append(record)
+
+    def _log_batch_metrics(self):
+        """Итоговая строка лога по телеметрии запуска: файлы, звук, время, RTF, самые долгие этапы, пиковая память."""
+        batch = self._batch_metrics
+        if batch is None or not batch.files:
+            return
+        batch.finish()
+        self.log(t("metrics_summary", files=batch.files, audio=f"{batch.audio_sec:.1f}",
+                   speech="—" if batch.speech_sec is None else f"{batch.speech_sec:.1f}",
+                   elapsed=f"{batch.wall_sec:.1f}", file_sum=f"{batch.file_sec:.1f}",
+                   rtf="—" if batch.rtf is None else f"{batch.rtf:.3f}",
+                   segments=batch.segments,
+                   stages=", ".join(f"{name} {share:.0f}%" for name, share in batch.top_stages()),
+                   peak="—" if batch.peak_rss_mb is None else batch.peak_rss_mb))
+
+    def _skip_missing_file(self, path, skipped_paths):
+        """Файла нет на диске: как _skip_file, запись телеметрии не создаётся — только счётчик Prometheus."""
+        prometheus_registry().inc("whisperfast_files_total", status="skipped")
+        self._skip_file(path, skipped_paths)
+
+    def _skip_file(self, path, skipped_paths):
+        """Файл не прочитан (нет на диске, ffmpeg/ffprobe не смогли открыть): лог, список пропущенных, on_file_error."""
+        message = t("file_skipped", name=os.path.basename(path))
+        self.log(message)
+        skipped_paths.append(path)
+        self.on_file_error(path, message.strip())
+
+    def _job_time_range(self, path, row):
+        """
+        (start_sec, end_sec, duration) для строки очереди: диапазон [Начало — Конец], ограниченный длительностью файла.
+        Длительность берётся из элемента очереди (уже получена ffprobe при добавлении), ffprobe — только если её нет.
+        Если длительность определить не удалось (0.0), конец не ограничивается; без «Конца» диапазон идёт до конца
+        файла — тогда окно декодируется, и конец берётся по фактической длине аудио (OSError — файл не прочитать).
+        """
+        start_sec = parse_timestamp_to_seconds(row.get("start")) or 0.0
+        duration = row.get("duration")
+        if not duration:
+            with self._stage("probe"):
+                duration = get_audio_duration_seconds(path)
+        duration = duration or 0.0
+        end_sec = parse_timestamp_to_seconds(row.get("end")) or duration
+        if duration:
+            end_sec = min(end_sec, duration)
+        elif not end_sec:
+            audio = DecodedAudio(path, start_sec, None, 0.0)
+            try:
+                audio.pcm()
+            finally:
+                self._add_stage("decode", audio.decode_sec)
+                audio.release()
+            end_sec = duration = audio.end_sec
+        return start_sec, end_sec, duration
+
+    def _confirm_save_mp3(self, path, opts):
+        """
+        Нужно ли сохранять аудио в MP3 (опция «Сохранить Mp3»).
+        Для аудио-источников решение принимает ask_save_mp3 (в GUI — диалог подтверждения).
+        """
+        if not opts.get("save_audio_mp3"):
+            return False
+        ext = os.path.splitext(path)[1].lower()
+        if ext in AUDIO_EXTENSIONS:
+            return bool(self.ask_save_mp3(path))
+        return True
+
+    def _log_file_speed(self, name, span_sec, elapsed_sec, engine):
+        """Строка лога с измеренной скоростью: секунды аудио / секунды работы (во сколько раз быстрее реального времени)."""
+        speed = span_sec / elapsed_sec if elapsed_sec > 0 else 0.0
+        self.log(t("file_speed", name=name, audio=f"{span_sec:.1f}", elapsed=f"{elapsed_sec:.1f}",
+                   speed=f"{speed:.1f}", engine=engine))
+
+    def _log_job_audio(self, decode_sec, peak_bytes):
+        """Строка лога о декодировании аудио задания: время и пиковый объём буферов (DecodedAudio)."""
+        self.log(t("job_audio_stats", decode=f"{decode_sec:.2f}", peak=f"{peak_bytes / (1024 * 1024):.1f}"))
+
+    @staticmethod
+    def _job_output_range(start_sec, end_sec, duration):
+        """(segment_start_sec, segment_end_sec) для имён выходных файлов отрезка или (None, None) для всего файла."""
+        # duration=0.0 (не определена) остаётся только при заданном «Конце» — это отрезок
+        is_segment = (start_sec >= FULL_VIDEO_SEGMENT_EPS_S or not duration
+                      or (duration - end_sec) >= FULL_VIDEO_SEGMENT_EPS_S)
+        return (start_sec, end_sec) if is_segment else (None, None)
+
+    def _save_job_result(self, path, res, mp3_segment, start_sec, end_sec, duration, opts):
+        """Смещает времена сегментов отрезка, сохраняет txt/srt (и mp3) и отмечает файл обработанным."""
+        for s in res:
+            self.on_segment(path, start_sec + s.start, start_sec + s.end, s.text or "")
+        if is_partial_range(start_sec, end_sec, duration):
+            res = [_SegmentOffset(s.start + start_sec, s.end + start_sec, s.text or "") for s in res]
+        seg_start, seg_end = self._job_output_range(start_sec, end_sec, duration)
+        outputs = self.save_files(path, res, audio_segment=mp3_segment, segment_start_sec=seg_start, segment_end_sec=seg_end, output_dir_raw=opts.get("output_dir"))
+        self.on_file_done(path, outputs)
+
+    def _open_job_output(self, path, start_sec, end_sec, duration, opts, ckpt_options):
+        """
+        Потоковый писатель TXT/SRT задания. Если есть подходящая контрольная точка (checkpoints.load_checkpoint),
+        писатель продолжает её файлы *.part. Возвращает (writer, base, mp3_path, resume_sec); resume_sec=None — с начала.
+        Времена сегментов смещаются на момент начала декодирования (start_sec или resume_sec).
+        """
+        seg_start, seg_end = self._job_output_range(start_sec, end_sec, duration)
+        base, txt_p, srt_p, mp3_p = self._output_paths(path, seg_start, seg_end, opts.get("output_dir"))
+        with self._stage("checkpoint"):
+            ckpt = load_checkpoint(path, start_sec, end_sec, ckpt_options, txt_p, srt_p)
+        resume_sec = ckpt["resume_sec"] if ckpt else None
+        self.register_output_paths([txt_p, srt_p])
+        with self._stage("write_outputs"):
+            writer = TranscriptWriter(txt_p, srt_p, offset_sec=start_sec if resume_sec is None else resume_sec,
+                                      resume_state=ckpt["writer"] if ckpt else None)
+        return writer, base, mp3_p, resume_sec
+
+    def _keep_partial_output(self, path, start_sec, end_sec, ckpt_options, writer):
+        """
+        Отмена или ошибка посреди файла: сохраняет контрольную точку для продолжения
+        и публикует уже распознанный текст в итоговые TXT/SRT (файлы *.part остаются для продолжения).
+        """
+        save_checkpoint(path, start_sec, end_sec, ckpt_options, writer)
+        writer.close()
+        if not writer.count:
+            writer.discard()
+            return
+        try:
+            writer.publish_partial()
+        except OSError:
+            return
+        self.log(t("partial_output_saved", count=writer.count, time=format_timestamp(writer.last_end or 0.0)))
+        # Подписи между путями обязательны: соседние строки с одним тегом Tk сливает в один диапазон ссылки
+        self.log(t("txt_file"), None)
+        self.log(writer.txt_path, "link")
+        self.log(t("srt_file"), None)
+        self.log(writer.srt_path, "link")
+
+    def _save_job_result_with_mp3(self, path, res, start_sec, end_sec, duration, opts):
+        """
+        Сохраняет результат, полученный без декодирования в этом потоке (воркер или кэш результатов):
+        окно для MP3 при необходимости декодируется здесь и сразу освобождается. OSError — файл не прочитать.
+        """
+        audio = DecodedAudio(path, start_sec, end_sec, duration)
+        try:
+            mp3_segment = audio.segment() if self._confirm_save_mp3(path, opts) else None
+            # Времена сегментов — относительно start_sec; смещение делает _save_job_result
+            self._save_job_result(path, res, mp3_segment, start_sec, end_sec, duration, opts)
+        finally:
+            self._add_stage("decode", audio.decode_sec)
+            audio.release()
+
+    def _result_cache_context(self, opts):
+        """Общая для запуска часть ключа кэша результатов (модель, устройство, точность, язык); None — кэш выключен."""
+        if not self.result_cache.enabled:
+            return None
+        device, compute, _ = WhisperModelSingleton.resolve_load_options(
+            opts.get("device_mode", "AUTO"), opts.get("whisper_model"))
+        lang_val = opts.get("lang_mode", LANG_AUTO_VALUE)
+        return {
+            "model_name": WhisperModelSingleton.resolve_model_name(opts.get("whisper_model")),
+            "device": device,
+            "compute": compute,
+            "language": None if lang_val == LANG_AUTO_VALUE else lang_val,
+        }
+
+    def _result_cache_key(self, cache_ctx, path, start_sec, end_sec, engine):
+        """Ключ кэша результатов для задания (хэш содержимого берётся из кэша метаданных) или None."""
+        if cache_ctx is None:
+            return None
+        try:
+            content_hash = get_content_hash(path)
+        except OSError:
+            return None
+        return make_result_key(content_hash, start_sec=start_sec, end_sec=end_sec, engine=engine, **cache_ctx)
+
+    def _cached_job_result(self, cache_key, name):
+        """Сегменты из кэша результатов (как объекты с start/end/text) или None при промахе."""
+        if cache_key is None:
+            return None
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+        self.log(t("result_cache_hit", name=name, count=len(cached)))
+        return [_SegmentOffset(st, en, text) for st, en, text in cached]
+
+    def _process_queue_sequential(self, indices, queue_snapshot, opts):
+        """
+        Обработка файлов по одному в текущем потоке одной моделью. Возвращает (done, skipped_paths).
+        Модель загружается при первом файле, которого нет в кэше результатов.
+        """
+        model = None
+        cache_ctx = self._result_cache_context(opts)
+        done = 0
+        to_do = len(indices)
+        skipped_paths = []
+
+        for idx in indices:
+            if self.is_cancelled():
+                break
+            if idx < 0 or idx >= len(queue_snapshot):
+                continue
+            row = queue_snapshot[idx]
+            path = normalize_queue_path(row.get("path"))
+            if not path:
+                continue
+            name = os.path.basename(path)
+            if not os.path.isfile(path):
+                self.log(f"\n{t('processing', current=done + 1, total=to_do, name=name)}")
+                self._skip_missing_file(path, skipped_paths)
+                continue
+            self.log(f"\n{t('processing', current=done + 1, total=to_do, name=name)}")
+            self.on_file_start(path)
+
+            audio = None
+            mp3_audio = None
+            writer = None
+            ckpt_options = None
+            metrics = self._file_metrics = FileMetrics(path)
+            status = "error"
+            try:
+                start_sec, end_sec, duration = self._job_time_range(path, row)
+                segment_duration = end_sec - start_sec if end_sec > start_sec else duration
+                lang_val = opts.get("lang_mode", LANG_AUTO_VALUE)
+                lang_param = None if lang_val == LANG_AUTO_VALUE else lang_val
+                engine = resolve_engine(opts.get("engine_mode"), segment_duration)
+                metrics.engine = engine
+                metrics.audio_sec = max(0.0, end_sec - start_sec)
+
+                with self._stage("cache_lookup"):
+                    cache_key = self._result_cache_key(cache_ctx, path, start_sec, end_sec, engine)
+                    cached = self._cached_job_result(cache_key, name)
+                if cached is not None:
+                    metrics.segments = len(cached)
+                    self._save_job_result_with_mp3(path, cached, start_sec, end_sec, duration, opts)
+                    status = "cached"
+                    done += 1
+                    continue
+
+                if model is None:
+                    with self._stage("model_load"):
+                        model = WhisperModelSingleton.get(self.log, opts.get("device_mode", "AUTO"), opts.get("whisper_model", DEFAULT_MODEL))
+
+                # Сегменты сразу дописываются в *.part; если есть контрольная точка прерванного запуска
+                # с теми же параметрами — продолжаем с конца последнего записанного сегмента
+                device, compute, _ = WhisperModelSingleton.resolve_load_options(
+                    opts.get("device_mode", "AUTO"), opts.get("whisper_model"))
+                ckpt_options = {
+                    "model": WhisperModelSingleton.resolve_model_name(opts.get("whisper_model")),
+                    "device": device, "compute": compute,
+                    "language": lang_param, "engine": engine, "vad": VAD_OPTIONS,
+                }
+                writer, base, mp3_p, resume_sec = self._open_job_output(path, start_sec, end_sec, duration, opts, ckpt_options)
+                decode_start = start_sec
+                if resume_sec is not None:
+                    decode_start = resume_sec
+                    self.log(t("resume_from_checkpoint", time=format_timestamp(resume_sec), count=writer.count))
+
+                # Окно файла декодируется один раз и используется и для MP3, и как вход модели;
+                # при продолжении модели нужна только оставшаяся часть, а MP3 — весь диапазон
+                audio = DecodedAudio(path, decode_start, end_sec, duration)
+                mp3_audio = audio if resume_sec is None else DecodedAudio(path, start_sec, end_sec, duration)
+                mp3_segment = mp3_audio.segment() if self._confirm_save_mp3(path, opts) else None
+                metrics.audio_sec = max(0.0, end_sec - decode_start)
+                t0 = time.time()
+                segments_iter = ()
+                if end_sec - decode_start >= FULL_VIDEO_SEGMENT_EPS_S:
+                    # Декодирование окна (pcm) идёт внутри open_segments; остальное — VAD, признаки, определение языка
+                    decoded_before = audio.decode_sec
+                    open_started = time.perf_counter()
+                    segments_iter, info = open_segments(
+                        model, audio, lang_param, engine=engine, batch_size=opts.get("batch_size"),
+                    )
+                    metrics.add("vad_features",
+                                time.perf_counter() - open_started - (audio.decode_sec - decoded_before))
+                    metrics.speech_sec = getattr(info, "duration_after_vad", None)
+                    metrics.audio_sec = audio.span_sec  # фактическая длина, если окно шло до конца файла
+                    metrics.sample_memory()
+
+                # Для кэша результатов копятся только (start, end, text) и только для полного прохода
+                res = [] if cache_key is not None and resume_sec is None else None
+                resumed_sec = decode_start - start_sec  # уже обработанная часть отрезка
+                last_progress_update = [0.0]
+                last_log_update = [0.0]
+                last_checkpoint = time.time()
+                segment_count = [0]
+                # Время модели — ожидание следующего сегмента от итератора; запись и контрольные точки — отдельно
+                model_started = time.perf_counter()
+                for s in segments_iter:
+                    metrics.add("model", time.perf_counter() - model_started)
+                    if self.is_cancelled():
+                        break
+                    with metrics.stage("write_outputs"):
+                        writer.write(s.start, s.end, s.text)
+                    self.on_segment(path, decode_start + s.start, decode_start + s.end, s.text or "")
+                    if res is not None:
+                        res.append((s.start, s.end, s.text or ""))
+                    segment_count[0] += 1
+                    now = time.time()
+                    if now - last_progress_update[0] >= PROGRESS_UPDATE_INTERVAL_S:
+                        val = min(100, ((resumed_sec + s.end) / segment_duration) * 100) if (segment_duration and segment_duration > 0) else 100
+                        self.on_progress(val)
+                        self.on_file_progress(path, val)
+                        metrics.sample_memory()
+                        last_progress_update[0] = now
+                    if now - last_log_update[0] >= LOG_UPDATE_INTERVAL_S or segment_count[0] <= 2:
+                        seg_text = (s.text or "").strip()
+                        self.log(f"   [{format_timestamp(resumed_sec + s.start)}] {seg_text}")
+                        last_log_update[0] = now
+                    if now - last_checkpoint >= CHECKPOINT_INTERVAL_S:
+                        with metrics.stage("checkpoint"):
+                            save_checkpoint(path, start_sec, end_sec, ckpt_options, writer)
+                        last_checkpoint = now
+                    model_started = time.perf_counter()
+                else:
+                    metrics.add("model", time.perf_counter() - model_started)
+                metrics.segments = segment_count[0]
+
+                if not self.is_cancelled():
+                    self.on_progress(100)
+                    self.on_file_progress(path, 100)
+                    self._log_file_speed(name, audio.span_sec, time.time() - t0, engine)
+                    if res is not None:
+                        with metrics.stage("cache_lookup"):
+                            self.result_cache.put(cache_key, res)
+                    outputs = self._finish_transcript(writer, base, mp3_segment, mp3_p)
+                    with metrics.stage("checkpoint"):
+                        remove_checkpoint(path, start_sec, end_sec)
+                    self.on_file_done(path, outputs)
+                    status = "done"
+                    done += 1
+                else:
+                    status = "cancelled"
+                self._log_job_audio(audio.decode_sec, audio.peak_bytes)
+            except OSError:
+                status = "skipped"
+                self._skip_file(path, skipped_paths)
+            finally:
+                if writer is not None and not writer.finished:
+                    with metrics.stage("checkpoint"):
+                        self._keep_partial_output(path, start_sec, end_sec, ckpt_options, writer)
+                if audio is not None:
+                    metrics.add("decode", audio.decode_sec)
+                    audio.release()
+                if mp3_audio is not None and mp3_audio is not audio:
+                    metrics.add("decode", mp3_audio.decode_sec)
+                    mp3_audio.release()
+                self._finish_file_metrics(status)
+        return done, skipped_paths
+
+    def _process_queue_parallel(self, indices, queue_snapshot, opts, num_workers):
+        """
+        Обработка очереди пулом процессов-воркеров (у каждого своя модель и доля cpu_threads).
+        Если включено chunk_long_files, длинные файлы делятся на части по паузам речи (chunking.plan_chunks):
+        части обрабатываются разными воркерами одновременно и сшиваются со смещением начала части.
+        Результаты сохраняются в этом потоке по мере готовности. Возвращает (done, skipped_paths).
+        """
+        to_do = len(indices)
+        skipped_paths = []
+        lang_val = opts.get("lang_mode", LANG_AUTO_VALUE)
+        lang_param = None if lang_val == LANG_AUTO_VALUE else lang_val
+        chunk_target = float(opts.get("chunk_target_sec") or 0) if opts.get("chunk_long_files") else 0.0
+
+        cache_ctx = self._result_cache_context(opts)
+        jobs = {}
+        done = 0
+        for idx in indices:
+            if self.is_cancelled():
+                return done, skipped_paths
+            if idx < 0 or idx >= len(queue_snapshot):
+                continue
+            row = queue_snapshot[idx]
+            path = normalize_queue_path(row.get("path"))
+            if not path:
+                continue
+            if not os.path.isfile(path):
+                self._skip_missing_file(path, skipped_paths)
+                continue
+            metrics = self._file_metrics = FileMetrics(path, mode="parallel")
+            try:
+                start_sec, end_sec, duration = self._job_time_range(path, row)
+            except OSError:
+                self._finish_file_metrics("skipped")
+                self._skip_file(path, skipped_paths)
+                continue
+            chunked = chunk_target > 0 and (end_sec - start_sec) >= 2 * chunk_target
+            engine = resolve_engine(opts.get("engine_mode"), end_sec - start_sec)
+            metrics.engine = engine
+            metrics.audio_sec = max(0.0, end_sec - start_sec)
+            # Замер продолжается при отправке (кэш результатов) и когда воркер возьмёт файл (_collect_parallel_results)
+            self._file_metrics = None
+            jobs[len(jobs)] = {"path": path, "start_sec": start_sec, "end_sec": end_sec, "duration": duration,
+                               "cache_key": None, "chunked": chunked, "metrics": metrics,
+                               "cache_engine": f"chunked-{engine}" if chunked else engine}
+        if not jobs:
+            return done, skipped_paths
+
+        if not any(job["chunked"] for job in jobs.values()):
+            num_workers = min(num_workers, len(jobs))
+        model_name = WhisperModelSingleton.resolve_model_name(opts.get("whisper_model"))
+        pool = TranscriptionWorkerPool(num_workers, model_name, opts.get("device_mode", "AUTO"))
+        self.log(t("worker_pool_starting", workers=num_workers, threads=pool.cpu_threads, model=model_name))
+        # Воркеры загружают модели, пока здесь хэшируются файлы для кэша и планируются части длинных файлов
+        pool.start()
+        try:
+            tasks, done = self._submit_parallel_tasks(pool, jobs, chunk_target, lang_param, opts, cache_ctx,
+                                                      done, skipped_paths)
+            done = self._collect_parallel_results(pool, jobs, tasks, to_do, done, skipped_paths, num_workers, opts)
+        finally:
+            pool.close()
+        return done, skipped_paths
+
+    def _save_cached_parallel_job(self, job, cached, opts, skipped_paths):
+        """Файл найден в кэше результатов: сохраняется сразу, воркерам не передаётся. Возвращает 1 или 0 (пропущен)."""
+        path = job["path"]
+        self._file_metrics = job["metrics"]
+        self.on_file_start(path)
+        self._file_metrics.segments = len(cached)
+        try:
+            self._save_job_result_with_mp3(path, cached, job["start_sec"], job["end_sec"], job["duration"], opts)
+            self._finish_file_metrics("cached")
+            return 1
+        except OSError:
+            self._finish_file_metrics("skipped")
+            self._skip_file(path, skipped_paths)
+            return 0
+
+    def _submit_parallel_tasks(self, pool, jobs, chunk_target, lang_param, opts, cache_ctx, done, skipped_paths):
+        """
+        Отправляет воркерам задания: файл целиком или его части (для chunked-файлов).
+        Кэш результатов проверяется здесь, по одному файлу, уже после запуска пула: хэширование содержимого
+        не задерживает старт воркеров, а файлы из кэша сохраняются сразу и воркерам не передаются.
+        Возвращает (tasks, done): tasks — dict task_id -> {"job_id", "chunk", "start_sec", "end_sec"}.
+        """
+        tasks = {}
+        for job_id, job in jobs.items():
+            if self.is_cancelled():
+                break
+            with job["metrics"].stage("cache_lookup"):
+                job["cache_key"] = self._result_cache_key(cache_ctx, job["path"], job["start_sec"], job["end_sec"],
+                                                          job["cache_engine"])
+                cached = self._cached_job_result(job["cache_key"], os.path.basename(job["path"]))
+            if cached is not None:
+                done += self._save_cached_parallel_job(job, cached, opts, skipped_paths)
+                continue
+            ranges = [(job["start_sec"], job["end_sec"])]
+            if job["chunked"]:
+                t0 = time.time()
+                try:
+                    ranges = plan_chunks(job["path"], job["start_sec"], job["end_sec"], chunk_target)
+                    self.log(t("chunk_plan", name=os.path.basename(job["path"]), parts=len(ranges),
+                               seconds=f"{time.time() - t0:.1f}"))
+                except OSError:
+                    pass  # окна не декодировались — файл обрабатывается целиком
+            job.update(parts={}, tasks=len(ranges), started_at=None, engine="", decode_sec=0.0, peak_bytes=0,
+                       failed=False)
+            if job["chunked"]:
+                job["metrics"].add("chunk_plan", time.time() - t0)
+            for chunk_idx, (chunk_start, chunk_end) in enumerate(ranges):
+                task_id = len(tasks)
+                tasks[task_id] = {"job_id": job_id, "chunk": chunk_idx, "start_sec": chunk_start, "end_sec": chunk_end}
+                pool.submit(task_id, job["path"], chunk_start, chunk_end, job["duration"], lang_param,
+                            engine_mode=opts.get("engine_mode"), batch_size=opts.get("batch_size"))
+        return tasks, done
+
+    def _finish_parallel_job(self, job, elapsed_sec, opts, skipped_paths):
+        """Сшивает части файла, кэширует и сохраняет результат. Возвращает 1, если файл сохранён, иначе 0."""
+        path = job["path"]
+        name = os.path.basename(path)
+        # Воркеры вернули времена относительно начала своей части — приводим к началу диапазона файла
+        segments = stitch_segments(job["parts"].values(), job["start_sec"])
+        engine = job["engine"] if job["tasks"] == 1 else f"{job['engine']} ×{job['tasks']}"
+        self._log_file_speed(name, job["end_sec"] - job["start_sec"], elapsed_sec, engine)
+        self._log_job_audio(job["decode_sec"], job["peak_bytes"])
+        self._file_metrics = job["metrics"]
+        self._file_metrics.segments = len(segments)
+        if job["cache_key"] is not None:
+            with self._stage("cache_lookup"):
+                self.result_cache.put(job["cache_key"], segments)
+        res = [_SegmentOffset(st, en, text) for st, en, text in segments]
+        # MP3 нужен в этом процессе: окно декодируется здесь отдельно и сразу освобождается
+        try:
+            self._save_job_result_with_mp3(path, res, job["start_sec"], job["end_sec"], job["duration"], opts)
+            self._finish_file_metrics("done")
+            return 1
+        except OSError:
+            self._finish_file_metrics("skipped")
+            self._skip_file(path, skipped_paths)
+            return 0
+
+    def _collect_parallel_results(self, pool, jobs, tasks, to_do, done, skipped_paths, num_workers, opts):
+        """Цикл сообщений пула: лог, прогресс, сохранение готовых файлов. Возвращает обновлённое число done."""
+        pending = set(tasks)
+        progress = {}  # task_id -> % текущей части у воркера
+        worker_tasks = {}  # worker -> task_id
+        failed_workers = 0
+        started = done
+        last_log_update = 0.0
+        last_status_log = time.time()
+        while pending:
+            if self.is_cancelled():
+                pool.cancel()
+                break
+            msg = pool.get_message()
+            now = time.time()
+            if msg is None:
+                if pool.alive_count() == 0:
+                    raise RuntimeError(t("worker_pool_failed"))
+            else:
+                kind = msg["type"]
+                worker = msg.get("worker")
+                task_id = msg.get("job_id")
+                task = tasks.get(task_id)
+                job = jobs[task["job_id"]] if task else None
+                if kind == "worker_ready":
+                    self.log(t("worker_ready", worker=worker, device=msg["device"].upper(),
+                               precision=msg["precision"], threads=msg["cpu_threads"]))
+                elif kind == "worker_error":
+                    failed_workers += 1
+                    self.log(t("worker_failed", worker=worker, error=msg["error"]))
+                    if failed_workers >= num_workers:
+                        raise RuntimeError(t("worker_pool_failed"))
+                elif kind == "started":
+                    worker_tasks[worker] = task_id
+                    progress[task_id] = 0.0
+                    name = os.path.basename(job["path"])
+                    if job["started_at"] is None:
+                        job["started_at"] = now
+                        job["metrics"].mark_started()
+                        started += 1
+                        self.log(f"\n[W{worker}] {t('processing', current=started, total=to_do, name=name)}")
+                        self.on_file_start(job["path"])
+                    if job["tasks"] > 1:
+                        self.log(f"   [W{worker}] " + t("chunk_started", part=task["chunk"] + 1, parts=job["tasks"],
+                                                         start=format_timestamp(task["start_sec"]),
+                                                         end=format_timestamp(task["end_sec"])))
+                elif kind == "progress":
+                    progress[task_id] = msg["value"]
+                    # Прогресс файла: готовые части + текущие доли частей, которые сейчас у воркеров
+                    running = sum(v for tid, v in progress.items() if tasks[tid]["job_id"] == task["job_id"])
+                    self.on_file_progress(job["path"], (len(job["parts"]) * 100 + running) / job["tasks"])
+                    if now - last_log_update >= LOG_UPDATE_INTERVAL_S:
+                        seg_start = msg["start"] + task["start_sec"] - job["start_sec"]
+                        self.log(f"   [W{worker}] [{format_timestamp(seg_start)}] {msg['text'].strip()}")
+                        last_log_update = now
+                elif kind in ("done", "error", "cancelled"):
+                    pending.discard(task_id)
+                    progress.pop(task_id, None)
+                    worker_tasks.pop(worker, None)
+                    path = job["path"]
+                    if kind == "done":
+                        job["parts"][task["chunk"]] = (task["start_sec"], msg["segments"])
+                        job["engine"] = msg["engine"]
+                        job["decode_sec"] += msg["decode_sec"]
+                        job["peak_bytes"] = max(job["peak_bytes"], msg["peak_bytes"])
+                        self._add_worker_metrics(job["metrics"], msg)
+                        if not job["failed"] and len(job["parts"]) == job["tasks"]:
+                            done += self._finish_parallel_job(job, now - job["started_at"], opts, skipped_paths)
+                    elif kind == "error" and not job["failed"]:
+                        # Ошибка в любой части — файл не сохраняется, остальные его части игнорируются
+                        job["failed"] = True
+                        self._file_metrics = job["metrics"]
+                        self._finish_file_metrics("skipped" if msg.get("is_os_error") else "error")
+                        if msg.get("is_os_error"):
+                            self._skip_file(path, skipped_paths)
+                        else:
+                            self.log(t("error_occurred", error=f"{os.path.basename(path)}: {msg['error']}"))
+                            self.on_file_error(path, msg["error"])
+            finished = len(tasks) - len(pending)
+            overall = (finished + sum(progress.values()) / 100.0) / len(tasks) * 100
+            self.on_progress(overall)
+            if worker_tasks and now - last_status_log >= WORKER_STATUS_LOG_INTERVAL_S:
+                status = " | ".join(self._worker_status_text(w, tid, tasks, jobs, progress)
+                                    for w, tid in sorted(worker_tasks.items()))
+                self.log(t("worker_status", status=status))
+                last_status_log = now
+        return done
+
+    @staticmethod
+    def _add_worker_metrics(metrics, msg):
+        """
+        Этапы части файла, выполненной воркером: декодирование, VAD и признаки, модель (остаток времени части),
+        секунды речи и память процесса воркера. Части идут параллельно, поэтому сумма этапов может превышать wall_sec.
+        """
+        decode_sec = msg["decode_sec"]
+        vad_sec = msg.get("vad_sec") or 0.0
+        metrics.add("decode", decode_sec)
+        metrics.add("vad_features", vad_sec)
+        metrics.add("model", msg.get("elapsed", 0.0) - decode_sec - vad_sec)
+        if msg.get("speech_sec") is not None:
+            metrics.speech_sec = (metrics.speech_sec or 0.0) + msg["speech_sec"]
+        metrics.sample_memory(msg.get("rss_mb"))
+
+    @staticmethod
+    def _worker_status_text(worker, task_id, tasks, jobs, progress):
+        task = tasks[task_id]
+        job = jobs[task["job_id"]]
+        text = f"W{worker} {progress.get(task_id, 0.0):.0f}% {os.path.basename(job['path'])}"
+        if job["tasks"] > 1:
+            text += f" [{task['chunk'] + 1}/{job['tasks']}]"
+        return text
+
+    def _segment_file_suffix(self, start_sec, end_sec):
+        """Суфікс для імен файлів сегмента: HH-MM-SS_HH-MM-SS (через format_timestamp_filename)."""
+        return "_" + format_timestamp_filename(start_sec) + "_" + format_timestamp_filename(end_sec)
+
+    def _output_paths(self, path, segment_start_sec=None, segment_end_sec=None, output_dir_raw=None):
+        """(base, txt_p, srt_p, mp3_p) — базовое имя и пути выходных файлов задания."""
+        out = self._resolve_output_dir(path, output_dir_raw)
+        marker = self.processed_marker
+        base = os.path.splitext(os.path.basename(path))[0].replace(marker, "")
+        if segment_start_sec is not None and segment_end_sec is not None:
+            base = base + self._segment_file_suffix(segment_start_sec, segment_end_sec)
+        txt_p = os.path.abspath(os.path.join(out, base + ".txt"))
+        srt_p = os.path.abspath(os.path.join(out, base + ".srt"))
+        mp3_p = os.path.abspath(os.path.join(out, base + "_audio.mp3"))
+        return base, txt_p, srt_p, mp3_p
+
+    def open_transcript_writer(self, path, segment_start_sec=None, segment_end_sec=None, output_dir_raw=None, offset_sec=0.0):
+        """
+        Открывает потоковый писатель TXT/SRT (output_writers.TranscriptWriter) для файла path.
+        Возвращает (writer, base, mp3_p); завершение — _finish_transcript.
+        """
+        base, txt_p, srt_p, mp3_p = self._output_paths(path, segment_start_sec, segment_end_sec, output_dir_raw)
+        self.register_output_paths([txt_p, srt_p])
+        return TranscriptWriter(txt_p, srt_p, offset_sec=offset_sec), base, mp3_p
+
+    def _finish_transcript(self, writer, base, audio_segment=None, mp3_p=None):
+        """
+        Атомарно публикует TXT/SRT писателя, пишет ссылки в лог и при необходимости экспортирует MP3.
+        Возвращает пути созданных файлов: {"txt", "srt"[, "mp3"]}.
+        """
+        with self._stage("write_outputs"):
+            writer.finish()
+        outputs = {"txt": writer.txt_path, "srt": writer.srt_path}
+        self.log(t("files_created", name=base))
+        self.log(t("txt_file"), None)
+        self.log(writer.txt_path, "link")
+        self.log(t("srt_file"), None)
+        self.log(writer.srt_path, "link")
+
+        if audio_segment is not None:
+            self.register_output_paths([mp3_p])
+            try:
+                with self._stage("mp3_export"):
+                    audio_segment.export(mp3_p, format="mp3")
+                outputs["mp3"] = mp3_p
+                self.log(t("audio_mp3_file"), None)
+                self.log(mp3_p, "link")
+            except Exception as e:
+                self.log(t("audio_mp3_error", error=str(e)))
+        return outputs
+
+    def save_files(self, path, segments, audio_segment=None, segment_start_sec=None, segment_end_sec=None, output_dir_raw=None):
+        """
+        Сохраняет готовый список сегментов (кэш, воркеры) в TXT/SRT через тот же потоковый писатель.
+        Возвращает пути созданных файлов (см. _finish_transcript).
+        """
+        writer, base, mp3_p = self.open_transcript_writer(path, segment_start_sec, segment_end_sec, output_dir_raw)
+        try:
+            with self._stage("write_outputs"):
+                writer.write_all(segments)
+        except BaseException:
+            writer.close()
+            raise
+        return self._finish_transcript(writer, base, audio_segment, mp3_p)
+
+    @staticmethod
+    def _sanitize_folder_name(name):
+        """Заменяет символы, недопустимые в имени каталога Windows, на _."""
+        s = re.sub(r'[\\/:*?"<>|]', "_", name)
+        s = s.strip().rstrip(". ")
+        return s if s else "_"
+
+    def _resolve_output_dir(self, path, output_dir_raw=None):
+        """
+        Определяет каталог сохранения для файла path.
+        output_dir_raw — каталог из опций запуска: пусто — рядом с исходным файлом,
+        абсолютный путь — этот каталог, иначе — подкаталог с таким именем рядом с исходным файлом.
+        """
+        raw = (output_dir_raw or "").strip()
+        if not raw:
+            return os.path.dirname(path)
+        if os.path.isabs(raw):
+            out = os.path.normpath(raw)
+            try:
+                os.makedirs(out, exist_ok=True)
+            except OSError:
+                return os.path.dirname(path)
+            return out
+        safe_name = self._sanitize_folder_name(raw)
+        out = os.path.join(os.path.dirname(path), safe_name)
+        try:
+            os.makedirs(out, exist_ok=True)
+        except OSError:
+            return os.path.dirname(path)
+        return out
@@ -0,0 +1,119 @@
+"""
+Кэш результатов транскрибации на диске (каталог result_cache в BASE_DIR).
+Ключ — хэш содержимого файла + модель + устройство и точность + язык + параметры VAD + движок + диапазон;
+значение — список сегментов (start, end, text) с временами относительно начала диапазона.
+При совпадении ключа модель не запускается: сегменты сразу передаются в save_files.
+Размер ограничен result_cache_max_mb (settings.json); при превышении удаляются давно не использованные записи.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import BASE_DIR, RESULT_CACHE_DIR, DEFAULT_RESULT_CACHE_MAX_MB
+from transcriber import VAD_OPTIONS
+
+
+def make_result_key(content_hash, model_name, device, compute, language, start_sec, end_sec, engine):
+    """Ключ записи кэша (dict). Границы диапазона округляются до миллисекунд."""
+    return {
+        "audio": content_hash,
+        "model": model_name,
+        "device": device,
+        "compute": compute,
+        "language": language or "auto",
+        "vad": VAD_OPTIONS,
+        "engine": engine,
+        "start": round(float(start_sec), 3),
+        "end": round(float(end_sec), 3),
+    }
+
+
+class TranscriptionResultCache:
+    """
+    Записи хранятся отдельными JSON-файлами (имя — SHA-256 ключа); время последнего использования — mtime файла.
+    hits / misses — счётчики с момента запуска. max_mb <= 0 выключает кэш.
+    """
+
+    def __init__(self, directory=None, max_mb=DEFAULT_RESULT_CACHE_MAX_MB):
+        self.directory = directory or os.path.join(BASE_DIR, RESULT_CACHE_DIR)
+        try:
+            self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        except (TypeError, ValueError):
+            self.max_bytes = DEFAULT_RESULT_CACHE_MAX_MB * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _entry_path(self, key):
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    def get(self, key):
+        """Список сегментов [(start, end, text), ...] для ключа или None при промахе."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("key") != key:
+                raise ValueError("key mismatch")
+            segments = [(float(s), float(e), text) for s, e, text in data["segments"]]
+            os.utime(path)  # отметка использования для вытеснения LRU
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return segments
+
+    def put(self, key, segments):
+        """Сохраняет сегменты (объекты с start/end/text или кортежи) и при необходимости вытесняет старые записи."""
+        if not self.enabled:
+            return
+        rows = []
+        for s in segments:
+            if isinstance(s, (tuple, list)):
+                rows.append([s[0], s[1], s[2] or ""])
+            else:
+                rows.append([s.start, s.end, s.text or ""])
+        path = self._entry_path(key)
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "created": time.time(), "segments": rows}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._evict()
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи, пока размер кэша больше лимита (с запасом 10%)."""
+        with self._lock:
+            try:
+                entries = []
+                for name in os.listdir(self.directory):
+                    if not name.endswith(".json"):
+                        continue
+                    st = os.stat(os.path.join(self.directory, name))
+                    entries.append((st.st_mtime, st.st_size, name))
+            except OSError:
+                return
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            target = int(self.max_bytes * 0.9)
+            for _, size, name in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    total -= size
+                except OSError:
+                    pass
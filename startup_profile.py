@@ -0,0 +1,190 @@
+"""
+Профилирование запуска GUI (main.py --profile-startup): время фаз запуска до первого простоя главного цикла Tk,
+тяжёлые модули, загруженные к этому моменту, и разбивка времени импорта (python -X importtime в отдельном процессе).
+Отчёт пишется в JSON; превышение бюджета (STARTUP_BUDGET_S, STARTUP_FORBIDDEN_MODULES в config) даёт код выхода 1,
+поэтому запуск можно использовать как проверку регрессий.
+Пока профилирование не включено (start_profiling), phase() и mark() ничего не делают.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from config import (
+    BASE_DIR, DEFERRED_IMPORT_MODULES, STARTUP_BUDGET_S, STARTUP_FORBIDDEN_MODULES, STARTUP_PROFILE_FILE,
+)
+
+# Метка, до которой считается время до готовности интерфейса (time-to-interactive)
+INTERACTIVE_MARK = "first_idle"
+
+_profiler = None
+
+
+class StartupProfiler:
+    """Фазы (начало и длительность от старта профилирования) и моментальные метки запуска."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.marks = {}
+        self.heavy_modules_at_mark = {}
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @contextmanager
+    def phase(self, name):
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            self.phases.append({"phase": name, "start_s": round(start, 4),
+                                "duration_s": round(self.elapsed() - start, 4)})
+
+    def mark(self, name):
+        """Момент времени и запрещённые для пути запуска модули, уже загруженные к нему."""
+        self.marks[name] = round(self.elapsed(), 4)
+        self.heavy_modules_at_mark[name] = sorted(m for m in STARTUP_FORBIDDEN_MODULES if m in sys.modules)
+
+    def report(self, import_breakdown=None):
+        """Отчёт (dict) с проверкой бюджета: violations пуст, если запуск укладывается в бюджет."""
+        tti = self.marks.get(INTERACTIVE_MARK)
+        heavy = self.heavy_modules_at_mark.get(INTERACTIVE_MARK, [])
+        violations = []
+        if tti is None:
+            violations.append(f"mark '{INTERACTIVE_MARK}' was not reached")
+        elif tti > STARTUP_BUDGET_S:
+            violations.append(f"time to interactive {tti:.3f} s exceeds budget {STARTUP_BUDGET_S:.3f} s")
+        if heavy:
+            violations.append("modules imported before the window was interactive: " + ", ".join(heavy))
+        return {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "time_to_interactive_s": tti,
+            "phases": self.phases,
+            "marks": self.marks,
+            "heavy_modules_at_interactive": heavy,
+            "import_time": import_breakdown,
+            "budget": {"time_to_interactive_s": STARTUP_BUDGET_S, "forbidden_modules": list(STARTUP_FORBIDDEN_MODULES)},
+            "violations": violations,
+        }
+
+
+def start_profiling():
+    global _profiler
+    _profiler = StartupProfiler()
+    return _profiler
+
+
+def active_profiler():
+    return _profiler
+
+
+@contextmanager
+def phase(name):
+    """Фаза запуска для отчёта; без активного профилирования — пустой контекст."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.phase(name):
+        yield
+
+
+def mark(name):
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+def _parse_importtime(stderr):
+    """Строки «import time: self | cumulative | name» -> [(name, self_us, cumulative_us, depth), ...]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # строка заголовка
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def import_time_breakdown(top=20, timeout=300):
+    """
+    Время импорта в отдельном процессе (python -X importtime): путь GUI (import gui) и отложенные модули
+    (DEFERRED_IMPORT_MODULES). Для тяжёлых модулей и верхних пакетов — накопленное время в мс. None при ошибке.
+    """
+    deferred = list(DEFERRED_IMPORT_MODULES)
+    code = ("import gui\n"
+            f"for name in {deferred!r}:\n"
+            "    try:\n"
+            "        __import__(name)\n"
+            "    except Exception:\n"
+            "        pass\n")
+    kwargs = {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)} if sys.platform == "win32" else {}
+    try:
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=timeout, **kwargs)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    rows = _parse_importtime(proc.stderr)
+    if not rows:
+        return None
+    # Модуль появляется в выводе один раз — при первом импорте; накопленное время включает его зависимости
+    cumulative = {name: round(cum / 1000.0, 1) for name, _, cum, _ in rows}
+    heavy = sorted(set(STARTUP_FORBIDDEN_MODULES) | set(deferred) | {"gui"})
+    top_level = {}
+    for name, _, cum, depth in rows:
+        if depth == 0:
+            top_level[name] = round(cum / 1000.0, 1)
+    return {
+        "heavy_modules_ms": {name: cumulative[name] for name in heavy if name in cumulative},
+        "gui_path_ms": cumulative.get("gui"),
+        "top_level_ms": dict(sorted(top_level.items(), key=lambda kv: -kv[1])[:top]),
+        "slowest_self_ms": {name: round(self_us / 1000.0, 1)
+                            for name, self_us, _, _ in sorted(rows, key=lambda r: -r[1])[:top]},
+    }
+
+
+def check_gui_imports(timeout=300):
+    """
+    Проверка бюджета запуска без дисплея: import gui в отдельном процессе (python -X importtime).
+    Возвращает {"gui_import_s", "heavy_modules", "violations"}; violations пуст, если импорт GUI укладывается
+    в STARTUP_BUDGET_S и не тянет модулей из STARTUP_FORBIDDEN_MODULES. Окно не создаётся — time-to-interactive
+    проверяет только main.py --profile-startup, но импорт — основная часть пути запуска.
+    """
+    forbidden = list(STARTUP_FORBIDDEN_MODULES)
+    code = ("import json, sys\n"
+            "import gui\n"
+            f"print(json.dumps(sorted(m for m in {forbidden!r} if m in sys.modules)))\n")
+    kwargs = {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)} if sys.platform == "win32" else {}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BASE_DIR,
+                          capture_output=True, text=True, timeout=timeout, **kwargs)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import gui failed")
+    heavy = json.loads(proc.stdout.strip().splitlines()[-1])
+    cumulative = {name: cum for name, _, cum, _ in _parse_importtime(proc.stderr)}
+    gui_import_s = round(cumulative.get("gui", 0) / 1e6, 4)
+    violations = []
+    if gui_import_s > STARTUP_BUDGET_S:
+        violations.append(f"import gui took {gui_import_s:.3f} s, budget {STARTUP_BUDGET_S:.3f} s")
+    if heavy:
+        violations.append("modules imported by import gui: " + ", ".join(heavy))
+    return {"gui_import_s": gui_import_s, "heavy_modules": heavy, "violations": violations}
+
+
+def write_report(path=None):
+    """Пишет отчёт активного профилирования в JSON (по умолчанию startup_profile.json в BASE_DIR). -> (path, report)."""
+    path = path or os.path.join(BASE_DIR, STARTUP_PROFILE_FILE)
+    report = _profiler.report(import_time_breakdown())
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path, report
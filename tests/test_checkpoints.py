@@ -0,0 +1,86 @@
+"""Контрольные точки (checkpoints.py): проверка перед продолжением и продолжение записи."""
+import os
+
+import pytest
+
+import checkpoints
+from checkpoints import load_checkpoint, remove_checkpoint, save_checkpoint
+from output_writers import PART_SUFFIX, TranscriptWriter
+
+OPTIONS = {"model": "tiny", "device": "cpu", "compute": "int8", "language": None, "engine": "sequential", "vad": {}}
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "_checkpoint_dir", str(tmp_path / "checkpoints"))
+    source = tmp_path / "a.mp3"
+    source.write_bytes(b"\0" * 1024)
+    return str(source), str(tmp_path / "a.txt"), str(tmp_path / "a.srt")
+
+
+def interrupted_writer(job, segments=3):
+    """Писатель, прерванный после segments сегментов, с сохранённой контрольной точкой."""
+    source, txt, srt = job
+    writer = TranscriptWriter(txt, srt)
+    for i in range(segments):
+        writer.write(i * 2.0, i * 2.0 + 1.5, f"s{i}")
+    save_checkpoint(source, 0.0, 60.0, OPTIONS, writer)
+    writer.close()
+    return writer
+
+
+def test_checkpoint_round_trip_and_resume(job):
+    source, txt, srt = job
+    interrupted_writer(job)
+    ckpt = load_checkpoint(source, 0.0, 60.0, dict(OPTIONS), txt, srt)
+    assert ckpt is not None
+    assert ckpt["resume_sec"] == 5.5
+    assert ckpt["writer"]["count"] == 3
+
+    writer = TranscriptWriter(txt, srt, offset_sec=ckpt["resume_sec"], resume_state=ckpt["writer"])
+    writer.write(0.5, 1.0, "s3")
+    writer.finish()
+    remove_checkpoint(source, 0.0, 60.0)
+    with open(txt, "rb") as f:
+        assert f.read().decode("utf-8").split(os.linesep) == ["s0", "s1", "s2", "s3"]
+    assert load_checkpoint(source, 0.0, 60.0, OPTIONS, txt, srt) is None
+
+
+@pytest.mark.parametrize("change", ["options", "device", "output", "range"])
+def test_checkpoint_rejected_when_job_differs(job, change):
+    source, txt, srt = job
+    interrupted_writer(job)
+    options, end = dict(OPTIONS), 60.0
+    if change == "options":
+        options["model"] = "base"
+    elif change == "device":
+        options["compute"] = "float16"
+    elif change == "output":
+        txt = txt.replace("a.txt", "b.txt")
+    else:
+        end = 30.0
+    assert load_checkpoint(source, 0.0, end, options, txt, srt) is None
+
+
+def test_checkpoint_rejected_when_source_changed(job):
+    source, txt, srt = job
+    interrupted_writer(job)
+    with open(source, "ab") as f:
+        f.write(b"edited")
+    assert load_checkpoint(source, 0.0, 60.0, OPTIONS, txt, srt) is None
+    # Устаревшая точка удаляется: возврат прежнего файла её не воскрешает
+    assert not os.listdir(checkpoints._checkpoint_dir)
+
+
+def test_checkpoint_rejected_when_part_truncated(job):
+    source, txt, srt = job
+    interrupted_writer(job)
+    os.truncate(srt + PART_SUFFIX, 5)
+    assert load_checkpoint(source, 0.0, 60.0, OPTIONS, txt, srt) is None
+
+
+def test_no_checkpoint_without_segments(job):
+    source, txt, srt = job
+    interrupted_writer(job, segments=0)
+    assert not os.path.exists(checkpoints._checkpoint_dir) or not os.listdir(checkpoints._checkpoint_dir)
+    assert load_checkpoint(source, 0.0, 60.0, OPTIONS, txt, srt) is None
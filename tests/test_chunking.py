@@ -0,0 +1,51 @@
+"""Разбиение длинного файла на части и сшивание сегментов частей (chunking.py)."""
+import chunking
+from chunking import pick_cut, plan_chunks, silence_gaps, stitch_segments
+
+
+def test_stitch_offsets_segments_by_chunk_start():
+    parts = [
+        (100.0, [(0.5, 2.0, "c")]),
+        (10.0, [(0.0, 1.0, "a"), (40.0, 45.0, "b")]),
+    ]
+    assert stitch_segments(parts, 10.0) == [
+        (0.0, 1.0, "a"),
+        (40.0, 45.0, "b"),
+        (90.5, 92.0, "c"),
+    ]
+
+
+def test_stitch_keeps_times_monotonic_across_chunks():
+    parts = [(0.0, [(0.0, 29.5, "a")]), (30.0, [(0.2, 10.0, "b")]), (60.0, [(1.0, 2.0, "c")])]
+    starts = [s for s, _, _ in stitch_segments(parts, 0.0)]
+    assert starts == sorted(starts) == [0.0, 30.2, 61.0]
+
+
+def test_stitch_empty_parts():
+    assert stitch_segments([(0.0, []), (30.0, [])], 0.0) == []
+
+
+def test_silence_gaps_between_overlapping_speech():
+    speech = [(1.0, 3.0), (2.5, 4.0), (6.0, 7.0)]
+    assert silence_gaps(speech, 10.0) == [(0.0, 1.0), (4.0, 6.0), (7.0, 10.0)]
+
+
+def test_pick_cut_prefers_long_gap_nearest_center():
+    gaps = [(1.0, 1.1), (2.0, 3.0), (8.0, 9.0)]
+    assert pick_cut(gaps, 4.0, min_silence_sec=0.5) == 2.5
+    # Длинных пауз нет — середина самой длинной, без пауз — центр окна
+    assert pick_cut([(1.0, 1.1), (5.0, 5.3)], 0.0, min_silence_sec=1.0) == 5.15
+    assert pick_cut([], 4.0) == 4.0
+
+
+def test_plan_chunks_short_range_not_split(monkeypatch):
+    monkeypatch.setattr(chunking, "find_cut_point", lambda path, target: target)
+    assert plan_chunks("a.mp3", 5.0, 20.0, 600.0) == [(5.0, 20.0)]
+
+
+def test_plan_chunks_bounds_cover_range_and_increase(monkeypatch):
+    # Пауза «нашлась» далеко от цели: вторая граница левее первой и отбрасывается
+    cuts = iter([320.0, 250.0, 910.0])
+    monkeypatch.setattr(chunking, "find_cut_point", lambda path, target: next(cuts))
+    chunks = plan_chunks("a.mp3", 0.0, 1200.0, 300.0)
+    assert chunks == [(0.0, 320.0), (320.0, 910.0), (910.0, 1200.0)]
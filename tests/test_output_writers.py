@@ -0,0 +1,75 @@
+"""Потоковая запись TXT/SRT (output_writers.py): завершение и частичный результат."""
+import os
+
+import pytest
+
+from output_writers import PART_SUFFIX, TranscriptWriter
+
+NL = os.linesep
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "a.txt"), str(tmp_path / "a.srt")
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def test_finish_replaces_final_files_atomically(paths):
+    txt, srt = paths
+    with open(txt, "w") as f:
+        f.write("old transcript")
+    writer = TranscriptWriter(txt, srt, offset_sec=60.0)
+    writer.write(0.0, 1.5, " first ")
+    writer.write(2.0, 3.25, "second")
+    # До finish() итоговые файлы не тронуты, текст копится в *.part
+    assert read(txt) == "old transcript"
+    assert not os.path.exists(srt)
+    writer.finish()
+    assert writer.finished and writer.count == 2
+    assert read(txt) == f"first{NL}second"
+    assert read(srt) == (f"1{NL}00:01:00.000 --> 00:01:01.500{NL}first{NL}{NL}"
+                         f"2{NL}00:01:02.000 --> 00:01:03.250{NL}second{NL}{NL}")
+    assert not os.path.exists(txt + PART_SUFFIX)
+    assert not os.path.exists(srt + PART_SUFFIX)
+
+
+def test_publish_partial_keeps_parts_for_resume(paths):
+    txt, srt = paths
+    writer = TranscriptWriter(txt, srt)
+    writer.write(0.0, 1.0, "kept")
+    writer.close()
+    writer.publish_partial()
+    assert read(txt) == "kept"
+    assert read(srt) == read(srt + PART_SUFFIX)
+    assert os.path.exists(txt + PART_SUFFIX)
+    assert not writer.finished
+
+
+def test_discard_removes_parts(paths):
+    txt, srt = paths
+    writer = TranscriptWriter(txt, srt)
+    writer.discard()
+    assert not os.path.exists(txt + PART_SUFFIX)
+    assert not os.path.exists(srt + PART_SUFFIX)
+    assert not os.path.exists(txt)
+
+
+def test_resume_truncates_tail_after_saved_state(paths):
+    txt, srt = paths
+    writer = TranscriptWriter(txt, srt)
+    writer.write(0.0, 1.0, "one")
+    state = writer.state()
+    writer.write(1.0, 2.0, "lost after checkpoint")
+    writer.close()
+
+    resumed = TranscriptWriter(txt, srt, offset_sec=1.0, resume_state=state)
+    assert resumed.count == 1 and resumed.last_end == 1.0
+    resumed.write(0.0, 1.0, "two")
+    resumed.finish()
+    assert read(txt) == f"one{NL}two"
+    assert read(srt) == (f"1{NL}00:00:00.000 --> 00:00:01.000{NL}one{NL}{NL}"
+                         f"2{NL}00:00:01.000 --> 00:00:02.000{NL}two{NL}{NL}")
@@ -0,0 +1,32 @@
+"""Бюджет запуска GUI (startup_profile.py): проверки, которые выполняются без дисплея."""
+import startup_profile
+from config import STARTUP_BUDGET_S, STARTUP_FORBIDDEN_MODULES
+from startup_profile import INTERACTIVE_MARK, StartupProfiler
+
+
+def test_gui_import_within_budget():
+    result = startup_profile.check_gui_imports()
+    assert result["heavy_modules"] == [], result
+    assert result["violations"] == [], result
+
+
+def test_report_flags_slow_start():
+    profiler = StartupProfiler()
+    profiler.mark(INTERACTIVE_MARK)
+    profiler.marks[INTERACTIVE_MARK] = STARTUP_BUDGET_S + 1.0
+    profiler.heavy_modules_at_mark[INTERACTIVE_MARK] = []
+    violations = profiler.report()["violations"]
+    assert len(violations) == 1 and "exceeds budget" in violations[0]
+
+
+def test_report_flags_heavy_modules():
+    profiler = StartupProfiler()
+    profiler.mark(INTERACTIVE_MARK)
+    profiler.heavy_modules_at_mark[INTERACTIVE_MARK] = [STARTUP_FORBIDDEN_MODULES[0]]
+    report = profiler.report()
+    assert report["heavy_modules_at_interactive"] == [STARTUP_FORBIDDEN_MODULES[0]]
+    assert any(STARTUP_FORBIDDEN_MODULES[0] in v for v in report["violations"])
+
+
+def test_report_requires_interactive_mark():
+    assert StartupProfiler().report()["violations"] == [f"mark '{INTERACTIVE_MARK}' was not reached"]
@@ -0,0 +1,92 @@
+"""Канал событий фоновых потоков к главному потоку (ui_events.py)."""
+import threading
+import time
+
+from ui_events import UiEventChannel
+
+
+def test_progress_coalesced_per_path():
+    channel = UiEventChannel()
+    for value in range(50):
+        channel.post("progress", value, key="a.mp3")
+        channel.post("progress", value * 2, key="b.mp3")
+    channel.post("progress", 7)
+    assert channel.drain() == [("progress", "a.mp3", 49), ("progress", "b.mp3", 98), ("progress", None, 7)]
+    assert len(channel) == 0 and channel.drain() == []
+
+
+def test_file_done_batched_across_progress():
+    channel = UiEventChannel()
+    channel.post("file_done", "a.mp3")
+    channel.post("progress", 30, key="b.mp3")
+    channel.post("file_done", "b.mp3")
+    # Отметка «обработано» отменяет ещё не выбранный прогресс того же файла
+    assert channel.drain() == [("file_done", None, ["a.mp3", "b.mp3"])]
+
+
+def test_order_kept_around_one_off_events():
+    channel = UiEventChannel()
+    channel.post("progress", 10, key="a.mp3")
+    channel.post("file_done", "x.mp3")
+    channel.post("ask_save_mp3", "dialog")
+    channel.post("progress", 20, key="a.mp3")
+    channel.post("file_done", "y.mp3")
+    channel.post("reset_ui")
+    assert channel.drain() == [
+        ("file_done", None, ["x.mp3"]),
+        ("ask_save_mp3", None, "dialog"),
+        ("progress", "a.mp3", 20),
+        ("file_done", None, ["y.mp3"]),
+        ("reset_ui", None, None),
+    ]
+
+
+def test_post_from_many_threads():
+    channel = UiEventChannel()
+
+    def worker(n):
+        for i in range(200):
+            channel.post("progress", i, key=n)
+        channel.post("file_done", n)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    events = channel.drain()
+    assert [e for e in events if e[0] == "progress"] == []
+    assert sorted(sum((e[2] for e in events if e[0] == "file_done"), [])) == list(range(8))
+
+
+def test_probe_results_applied_from_channel(monkeypatch):
+    import input_files
+
+    class Tree:
+        def __init__(self):
+            self.cells = {}
+
+        def get_children(self):
+            return ["r0", "r1"]
+
+        def set(self, row, column, value):
+            self.cells[row, column] = value
+
+    monkeypatch.setattr(input_files, "get_media_info", lambda path: {"duration": 65.0})
+    monkeypatch.setattr(input_files, "flush_media_cache", lambda: None)
+    channel = UiEventChannel()
+    queue = [{"path": "a.mp3", "end": ""}, {"path": "b.mp3", "end": ""}]
+    tree = Tree()
+    updates = []
+    assert input_files.revalidate_queue_async(queue, tree, channel, on_update=lambda: updates.append(1),
+                                              only_missing=True) == 2
+    deadline = time.time() + 5
+    while not all(q["end"] for q in queue) and time.time() < deadline:
+        # Результаты потоков ffprobe приходят объединённым событием и применяются только при выборке
+        for kind, key, batch in channel.drain():
+            assert kind == "probe"
+            batch.apply()
+        time.sleep(0.01)
+    assert [q["end"] for q in queue] == ["00:01:05,000"] * 2
+    assert tree.cells == {("r0", "end"): "00:01:05,000", ("r1", "end"): "00:01:05,000"}
+    assert updates
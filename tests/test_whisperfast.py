@@ -0,0 +1,117 @@
+"""Консольный режим (whisperfast.py): коды выхода batch, строки JSON и отметки в request_queue.json."""
+import io
+import json
+
+import pytest
+
+import pipeline
+import result_cache
+import whisperfast
+from whisperfast import EXIT_FAILED, EXIT_FATAL, EXIT_OK, EXIT_USAGE, JsonLinesReporter
+
+SAVED = {"metrics_log_enabled": False}
+
+
+class FakePipeline:
+    """Вместо TranscriptionPipeline: «обрабатывает» файлы из done_paths, остальные пропускает."""
+    done_paths = None
+    error = None
+
+    def __init__(self, on_file_done=None, **kwargs):
+        self.on_file_done = on_file_done
+
+    def run(self, rows, opts):
+        if self.error is not None:
+            raise self.error
+        done, skipped = 0, []
+        for row in rows:
+            if self.done_paths is None or row["path"] in self.done_paths:
+                self.on_file_done(row["path"], {"txt": row["path"] + ".txt"})
+                done += 1
+            else:
+                skipped.append(row["path"])
+        return done, skipped
+
+
+@pytest.fixture
+def cli(monkeypatch):
+    monkeypatch.setattr(whisperfast.signal, "signal", lambda *args: None)
+    monkeypatch.setattr(pipeline, "TranscriptionPipeline", FakePipeline)
+    monkeypatch.setattr(result_cache, "TranscriptionResultCache", lambda **kwargs: None)
+    monkeypatch.setattr(FakePipeline, "done_paths", None)
+    monkeypatch.setattr(FakePipeline, "error", None)
+
+    def run(*argv):
+        stream = io.StringIO()
+        args = whisperfast.build_parser(SAVED).parse_args(["batch", *argv])
+        code = whisperfast.run_batch(args, SAVED, JsonLinesReporter(stream))
+        return code, [json.loads(line) for line in stream.getvalue().splitlines()]
+    return run
+
+
+@pytest.fixture
+def queue_file(tmp_path):
+    """request_queue.json с двумя файлами (длительность сохранена — без ffprobe)."""
+    paths = []
+    for name in ("a.mp3", "b.mp3"):
+        media = tmp_path / name
+        media.write_bytes(b"\0" * 16)
+        paths.append(str(media))
+    queue = tmp_path / "request_queue.json"
+    queue.write_text(json.dumps([
+        {"path": p, "start": "00:00:00,000", "end": "00:00:10,000", "duration": 10.0, "processed": False}
+        for p in paths
+    ]), encoding="utf-8")
+    return str(queue), paths
+
+
+def test_reporter_writes_one_json_object_per_line():
+    stream = io.StringIO()
+    reporter = JsonLinesReporter(stream)
+    reporter.emit("start", files=["a.mp3"])
+    reporter.emit("finish", exit_code=0)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["event"] for line in lines] == ["start", "finish"]
+    assert lines[0]["files"] == ["a.mp3"] and "time" in lines[0]
+
+
+def test_no_valid_input_is_usage_error(cli, tmp_path):
+    code, events = cli(str(tmp_path / "missing.mp3"))
+    assert code == EXIT_USAGE
+    assert events[-1]["event"] == "finish" and events[-1]["status"] == "no_input"
+
+
+def test_all_done_marks_queue_file(cli, queue_file):
+    queue, paths = queue_file
+    code, events = cli(queue)
+    assert code == EXIT_OK
+    assert [e["path"] for e in events if e["event"] == "file_done"] == paths
+    assert events[-1]["exit_code"] == EXIT_OK
+    with open(queue, encoding="utf-8") as f:
+        assert all(row["processed"] for row in json.load(f))
+
+
+def test_skipped_file_is_partial_and_stays_unprocessed(cli, queue_file):
+    queue, paths = queue_file
+    FakePipeline.done_paths = {paths[0]}
+    code, events = cli(queue)
+    assert code == EXIT_FAILED
+    assert events[-1]["status"] == "partial" and events[-1]["skipped"] == [paths[1]]
+    with open(queue, encoding="utf-8") as f:
+        assert [row["processed"] for row in json.load(f)] == [True, False]
+
+
+def test_only_new_skips_processed_rows(cli, queue_file):
+    queue, paths = queue_file
+    cli(queue)
+    code, events = cli(queue, "--only-new")
+    assert code == EXIT_USAGE
+    assert not any(e["event"] == "file_done" for e in events)
+
+
+def test_pipeline_error_is_fatal(cli, queue_file):
+    FakePipeline.error = RuntimeError("boom")
+    code, events = cli(queue_file[0])
+    assert code == EXIT_FATAL
+    assert [e["event"] for e in events[-2:]] == ["error", "finish"]
+    assert events[-2]["error"] == "boom"
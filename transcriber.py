@@ -0,0 +1,65 @@
+"""
+Транскрибация одного файла (или его диапазона) без зависимости от tkinter.
+Используется как главным процессом (gui.process_queue), так и процессами-воркерами (worker_pool).
+"""
+import weakref
+
+from config import BATCHED_MIN_DURATION_S, DEFAULT_BATCH_SIZE
+
+# Параметры VAD, с которыми запускается модель (входят в ключ кэша результатов)
+VAD_OPTIONS = {"vad_filter": True}
+
+# BatchedInferencePipeline создаётся один раз на загруженную модель
+_batched_pipelines = weakref.WeakKeyDictionary()
+
+
+def is_partial_range(start_sec, end_sec, duration):
+    """True, если [start_sec, end_sec] — не весь файл (нужно декодирование только диапазона)."""
+    return start_sec > 0 or end_sec < duration
+
+
+def batched_engine_available():
+    """True, если установленная версия faster-whisper содержит BatchedInferencePipeline (1.1+)."""
+    try:
+        from faster_whisper import BatchedInferencePipeline  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_engine(engine_mode, span_sec):
+    """
+    Фактический движок для файла: «batched» только если он выбран, доступен
+    и отрезок не короче BATCHED_MIN_DURATION_S; иначе «sequential».
+    """
+    if engine_mode != "batched" or span_sec < BATCHED_MIN_DURATION_S:
+        return "sequential"
+    return "batched" if batched_engine_available() else "sequential"
+
+
+def _batched_pipeline(model):
+    pipeline = _batched_pipelines.get(model)
+    if pipeline is None:
+        from faster_whisper import BatchedInferencePipeline
+        pipeline = BatchedInferencePipeline(model=model)
+        _batched_pipelines[model] = pipeline
+    return pipeline
+
+
+def transcribe_array(model, audio, language=None, engine="sequential", batch_size=None):
+    """Транскрибация уже декодированного массива (float32, 16 кГц, моно) движком engine. -> (segments_iter, info)."""
+    if engine == "batched":
+        return _batched_pipeline(model).transcribe(
+            audio, language=language, batch_size=batch_size or DEFAULT_BATCH_SIZE, **VAD_OPTIONS
+        )
+    return model.transcribe(audio, language=language, **VAD_OPTIONS)
+
+
+def open_segments(model, audio, language=None, engine="sequential", batch_size=None):
+    """
+    Запускает транскрибацию окна задания движком engine (см. resolve_engine).
+    audio — audio_io.DecodedAudio: окно [start_sec, end_sec] декодируется ffmpeg сразу в NumPy-массив
+    (без временного WAV) или берётся из уже декодированного для MP3 аудио.
+    Возвращает (segments_iter, info). Времена сегментов — относительно audio.start_sec.
+    """
+    return transcribe_array(model, audio.pcm(), language, engine, batch_size)
@@ -0,0 +1,72 @@
+"""
+Канал событий от фоновых потоков (обработка очереди, слежение за каталогом, API, трей) к главному потоку Tk.
+Вместо отдельного root.after(0, lambda ...) на каждое обновление потоки кладут типизированные события в один
+канал, а главный поток раз в тик забирает их все (WhisperGUI._poll_ui_events). Без tkinter — модуль не зависит от GUI.
+
+Виды событий:
+  COALESCED_KINDS — до выборки хранится только последнее значение для пары (вид, ключ): прогресс файла (ключ — путь)
+                    или всей очереди (ключ None) сколько угодно раз за тик обновляется одним событием, готовые
+                    длительности пачки ffprobe (input_files._ProbeBatch, ключ — пачка) применяются одним вызовом;
+  BATCHED_KINDS   — события одного вида отдаются одним событием со списком значений (например, отметка
+                    обработанных файлов: одна перерисовка таблицы и одна запись очереди на пачку);
+  остальные       — по одному.
+Порядок: объединяемое событие стоит на месте последнего поступления, пачка — первого, и пачка пополняется,
+только пока после неё не пришло одиночное событие. Относительно одиночных событий порядок строгий; прогресс
+и пачки между собой могут переставляться — событие пачки для пути отменяет ещё не выбранный прогресс этого пути
+(SUPERSEDES), поэтому устаревший процент не перекрывает отметку «обработано».
+Строки лога идут отдельным буфером и выводятся после событий тика.
+"""
+import threading
+from collections import OrderedDict
+
+COALESCED_KINDS = frozenset({"progress", "probe"})
+BATCHED_KINDS = frozenset({"file_done"})
+# Событие пачки со значением v отменяет ожидающее объединяемое событие (вид, ключ v)
+SUPERSEDES = {"file_done": "progress"}
+
+
+class UiEventChannel:
+    """Потокобезопасная очередь событий UI с объединением прогресса и пачками; post() — из любого потока."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._events = OrderedDict()  # номер поступления -> [вид, ключ, значение]
+        self._coalesced = {}  # (вид, ключ) -> номер ожидающего объединяемого события
+        self._open_batches = {}  # (вид, ключ) -> номер пачки, которую ещё можно пополнять
+
+    def post(self, kind, value=None, key=None):
+        """Кладёт событие kind со значением value; key различает объединяемые события (например, путь файла)."""
+        with self._lock:
+            if kind in COALESCED_KINDS:
+                self._drop_coalesced(kind, key)
+                self._coalesced[(kind, key)] = self._seq
+            elif kind in BATCHED_KINDS:
+                if kind in SUPERSEDES:
+                    self._drop_coalesced(SUPERSEDES[kind], value)
+                batch = self._open_batches.get((kind, key))
+                if batch is not None:
+                    self._events[batch][2].append(value)
+                    return
+                self._open_batches[(kind, key)] = self._seq
+                value = [value]
+            else:
+                self._open_batches.clear()
+            self._events[self._seq] = [kind, key, value]
+            self._seq += 1
+
+    def _drop_coalesced(self, kind, key):
+        seq = self._coalesced.pop((kind, key), None)
+        if seq is not None:
+            del self._events[seq]
+
+    def drain(self):
+        """Все накопленные события [(вид, ключ, значение)] в порядке поступления; канал очищается."""
+        with self._lock:
+            events = self._events
+            self._events, self._coalesced, self._open_batches = OrderedDict(), {}, {}
+        return [tuple(event) for event in events.values()]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._events)
@@ -1,14 +1,16 @@
 import os
 import sys
 import glob
-import subprocess
-import pygame
+import json
+
+from media_cache import get_media_info
 
 try:
-    from config import BASE_DIR, DEFAULT_START_TIMESTAMP
+    from config import BASE_DIR, DEFAULT_START_TIMESTAMP, VALID_EXTS
 except ImportError:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DEFAULT_START_TIMESTAMP = "00:00:00,000"
+    VALID_EXTS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg', '.mp4', '.mkv', '.avi', '.mov')
 
 def format_timestamp(seconds):
     h = int(seconds // 3600)
@@ -48,25 +50,45 @@ def normalize_queue_path(path):
     return os.path.normpath(path)
 
 
-def make_queue_item(path, **overrides):
+def make_queue_item(path, probe=True, **overrides):
     """
-    Элемент очереди (dict) с полями path, start, end_segment_1, end_segment_2, end, processed.
+    Элемент очереди (dict) с полями path, start, end_segment_1, end_segment_2, end, duration, processed.
     path должен быть уже нормализованной строкой. overrides подставляются поверх умолчаний.
+    duration (сек) сохраняется в элементе, чтобы обработка не вызывала ffprobe повторно;
+    если она передана в overrides, ffprobe не вызывается.
+    probe=False — не определять длительность сейчас: duration=None, end="" (заполнит apply_queue_item_duration).
     """
-    duration = get_audio_duration_seconds(path) or 0.0
-    end_ts = format_timestamp(duration) if duration > 0 else DEFAULT_START_TIMESTAMP
+    duration = overrides.get("duration") or (get_audio_duration_seconds(path) if probe else 0.0) or 0.0
+    if duration > 0:
+        end_ts = format_timestamp(duration)
+    else:
+        end_ts = DEFAULT_START_TIMESTAMP if probe else ""
     item = {
         "path": path,
         "start": DEFAULT_START_TIMESTAMP,
         "end_segment_1": "",
         "end_segment_2": "",
         "end": end_ts,
+        "duration": duration if duration > 0 else None,
         "processed": False,
     }
     item.update(overrides)
     return item
 
 
+def apply_queue_item_duration(item, duration):
+    """
+    Записывает в элемент очереди длительность, определённую позже (фоновый ffprobe).
+    Поле end заполняется, если пользователь его ещё не задал или оно равно прежней полной длительности
+    (файл изменился на диске).
+    """
+    duration = duration or 0.0
+    old = item.get("duration")
+    item["duration"] = duration if duration > 0 else None
+    if not item.get("end") or (old and item["end"] == format_timestamp(old)):
+        item["end"] = format_timestamp(duration) if duration > 0 else DEFAULT_START_TIMESTAMP
+
+
 def parse_timestamp_to_seconds(s):
     """
     Парсит строку времени в секунды (float).
@@ -90,37 +112,146 @@ def parse_timestamp_to_seconds(s):
 def get_audio_duration_seconds(path):
     """
     Возвращает длительность медиафайла в секундах без полной загрузки в память.
-    Использует ffprobe (идет с FFmpeg). При ошибке — fallback через pydub.
+    Берётся из постоянного кэша метаданных (media_cache); при промахе — ffprobe (идет с FFmpeg),
+    при его ошибке — fallback через pydub. 0.0, если определить не удалось.
+    """
+    info = get_media_info(path)
+    return info["duration"] if info else 0.0
+
+
+def is_valid_file(file_path):
+    """
+    Проверяет, является ли файл валидным для обработки.
+    
+    Args:
+        file_path: Путь к файлу
+    
+    Returns:
+        True если файл валидный, False иначе
     """
+    if not os.path.isfile(file_path):
+        return False
+    return file_path.lower().endswith(VALID_EXTS)
+
+
+def get_valid_files_from_directory(directory, recursive=True):
+    """
+    Получает список всех валидных файлов из каталога.
+    
+    Args:
+        directory: Путь к каталогу
+        recursive: Если True, обрабатывает вложенные каталоги рекурсивно
+    
+    Returns:
+        Список путей к валидным файлам
+    """
+    valid_files = []
+    
+    if not os.path.isdir(directory):
+        return valid_files
+    
     try:
-        kwargs = {"capture_output": True, "text": True, "timeout": 30}
-        if sys.platform == "win32":
-            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", path
-            ],
-            **kwargs,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return float(result.stdout.strip())
-    except (FileNotFoundError, subprocess.TimeoutExpired, ValueError, OSError):
-        pass
+        if recursive:
+            # Рекурсивный обход всех подкаталогов
+            for root, dirs, files in os.walk(directory):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    if is_valid_file(file_path):
+                        valid_files.append(file_path)
+        else:
+            # Только файлы в корне каталога
+            for file in os.listdir(directory):
+                file_path = os.path.join(directory, file)
+                if is_valid_file(file_path):
+                    valid_files.append(file_path)
+    except (PermissionError, OSError) as e:
+        if not isinstance(e, PermissionError):
+            print(f"Ошибка при сканировании каталога {directory}: {e}")
+    return valid_files
+
+
+def load_queue_file(queue_path):
+    """
+    Читает очередь из request_queue.json: список элементов make_queue_item без ffprobe
+    (длительность и конец — из сохранённых полей). Отсутствующие на диске файлы пропускаются.
+    OSError / ValueError — файл не читается или это не JSON.
+    """
+    with open(queue_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        return []
+    queue = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        path = normalize_queue_path(item.get("path"))
+        if not path or not os.path.isfile(path):
+            continue
+        overrides = {
+            "start": item.get("start") or DEFAULT_START_TIMESTAMP,
+            "end_segment_1": item.get("end_segment_1") or "",
+            "end_segment_2": item.get("end_segment_2") or "",
+            "processed": item.get("processed", False),
+        }
+        if item.get("end"):
+            overrides["end"] = item.get("end")
+        if item.get("duration"):
+            overrides["duration"] = item.get("duration")
+        queue.append(make_queue_item(path, probe=False, **overrides))
+    return queue
+
+
+def save_queue_file(queue_path, queue):
+    """Сохраняет очередь в request_queue.json (OSError пробрасывается)."""
+    data = [{"path": q["path"], "start": q["start"], "end_segment_1": q.get("end_segment_1", ""),
+            "end_segment_2": q.get("end_segment_2", ""), "end": q["end"],
+            "duration": q.get("duration"), "processed": q.get("processed", False)} for q in queue]
+    with open(queue_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def process_memory_mb():
+    """Резидентная память текущего процесса (МБ): Linux — /proc/self/statm, Windows — GetProcessMemoryInfo; иначе None."""
     try:
-        from pydub import AudioSegment
-        return len(AudioSegment.from_file(path)) / 1000.0
-    except (ImportError, OSError, Exception):
-        return 0.0
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return round(counters.WorkingSetSize / (1024 * 1024))
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
 
+def bundled_sound_path():
+    """.mp3 из каталога программы, который проигрывается как звук завершения (первый в выдаче glob), или None."""
+    mp3 = glob.glob(os.path.join(BASE_DIR, "*.mp3"))
+    return mp3[0] if mp3 else None
 
 def play_finish_sound():
     try:
+        # pygame импортируется только здесь: консольный режим и запуск GUI его не загружают
+        import pygame
         if not pygame.mixer.get_init():
             pygame.mixer.init()
-        mp3 = glob.glob(os.path.join(BASE_DIR, "*.mp3"))
+        mp3 = bundled_sound_path()
         if mp3:
-            pygame.mixer.music.load(mp3[0])
+            pygame.mixer.music.load(mp3)
         elif sys.platform == "win32":
             pygame.mixer.music.load(r"C:\Windows\Media\Alarm03.wav")
         else:
@@ -0,0 +1,296 @@
+"""
+Консольный (headless) режим без tkinter, pystray и pygame — для серверов без дисплея:
+
+    python -m whisperfast batch <файлы | каталоги | request_queue.json> [опции]
+    python -m whisperfast tune [-m модель] [-d устройство] [--clip файл] — автонастройка (autotune.py)
+
+Транскрибация и сохранение — тот же конвейер, что и в GUI (pipeline.TranscriptionPipeline).
+Ход работы выводится в stdout строками JSON (одно событие на строку, поле "event").
+Параметры по умолчанию берутся из settings.json, опции командной строки их переопределяют.
+Коды выхода: EXIT_OK, EXIT_FAILED (часть файлов не обработана), EXIT_USAGE, EXIT_FATAL, EXIT_CANCELLED.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+from config import (
+    LANG_AUTO_VALUE, DEFAULT_MODEL, WHISPER_MODELS, DEVICE_MODES, ENGINE_MODES,
+    DEFAULT_ENGINE_MODE, DEFAULT_BATCH_SIZE, DEFAULT_PARALLEL_WORKERS,
+    DEFAULT_RESULT_CACHE_MAX_MB, DEFAULT_CHUNK_TARGET_S, AUTOTUNE_CLIP_S, BASE_DIR, METRICS_LOG_FILE,
+)
+from utils import (
+    make_queue_item, normalize_queue_path, is_valid_file, get_valid_files_from_directory,
+    load_queue_file, save_queue_file, bundled_sound_path,
+)
+from i18n import t, set_language
+from lang_manager import load_app_settings
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+EXIT_CANCELLED = 130
+
+
+class JsonLinesReporter:
+    """Пишет события в поток (stdout) строками JSON; потокобезопасно, каждая строка сразу сбрасывается."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class _BatchInput:
+    """Элементы очереди из аргументов командной строки и файлы request_queue.json, откуда они взяты."""
+
+    def __init__(self):
+        self.rows = []
+        self.invalid = []
+        self.queue_files = {}  # путь к request_queue.json -> список элементов (весь, для записи отметок)
+        self._row_queue_file = {}  # id(элемента) -> путь к request_queue.json
+        self._seen = set()
+
+    def _add_row(self, row, queue_file=None):
+        key = os.path.normcase(os.path.abspath(row["path"]))
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.rows.append(row)
+        if queue_file:
+            self._row_queue_file[id(row)] = queue_file
+
+    def add_argument(self, arg, recursive=True):
+        """Файл, каталог (валидные файлы внутри) или request_queue.json. ValueError — .json не прочитан."""
+        path = normalize_queue_path(arg)
+        if path and path.lower().endswith(".json") and os.path.isfile(path):
+            try:
+                queue = load_queue_file(path)
+            except OSError as e:
+                raise ValueError(str(e))
+            self.queue_files[path] = queue
+            for row in queue:
+                self._add_row(row, path)
+        elif path and os.path.isdir(path):
+            for file_path in sorted(get_valid_files_from_directory(path, recursive=recursive)):
+                self._add_row(make_queue_item(os.path.normpath(file_path)))
+        elif path and is_valid_file(path):
+            self._add_row(make_queue_item(path))
+        else:
+            self.invalid.append(arg)
+
+    def mark_done(self, path):
+        """Отмечает обработанный файл в request_queue.json, из которого он взят."""
+        for row in self.rows:
+            if row["path"] != path:
+                continue
+            row["processed"] = True
+            queue_file = self._row_queue_file.get(id(row))
+            if queue_file:
+                try:
+                    save_queue_file(queue_file, self.queue_files[queue_file])
+                except OSError:
+                    pass
+
+
+def _int_setting(saved, key, default, minimum=1):
+    try:
+        return max(minimum, int(saved.get(key, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def build_parser(saved):
+    """Парсер аргументов; значения по умолчанию — из settings.json (saved)."""
+    parser = argparse.ArgumentParser(prog="python -m whisperfast", description=t("cli_description"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help=t("cli_batch_help"), description=t("cli_batch_help"))
+    batch.add_argument("inputs", nargs="+", metavar="PATH", help=t("cli_inputs_help"))
+    batch.add_argument("-o", "--output-dir", default=saved.get("output_dir", "") or "", help=t("cli_output_dir_help"))
+    batch.add_argument("-m", "--model", default=saved.get("whisper_model", DEFAULT_MODEL) or DEFAULT_MODEL,
+                       choices=WHISPER_MODELS)
+    device = saved.get("device_mode", "AUTO")
+    batch.add_argument("-d", "--device", default=device if device in DEVICE_MODES else "AUTO",
+                       type=str.upper, choices=DEVICE_MODES)
+    batch.add_argument("-l", "--language", default="auto", help=t("cli_language_help"))
+    engine = saved.get("engine_mode", DEFAULT_ENGINE_MODE)
+    batch.add_argument("--engine", default=engine if engine in ENGINE_MODES else DEFAULT_ENGINE_MODE,
+                       choices=ENGINE_MODES)
+    batch.add_argument("--batch-size", type=int, default=_int_setting(saved, "batch_size", DEFAULT_BATCH_SIZE))
+    batch.add_argument("-w", "--workers", type=int,
+                       default=_int_setting(saved, "parallel_workers", DEFAULT_PARALLEL_WORKERS),
+                       help=t("cli_workers_help"))
+    batch.add_argument("--chunk-long-files", action=argparse.BooleanOptionalAction,
+                       default=bool(saved.get("chunk_long_files", False)), help=t("cli_chunk_help"))
+    batch.add_argument("--save-mp3", action=argparse.BooleanOptionalAction,
+                       default=bool(saved.get("save_audio_mp3", False)), help=t("tooltip_save_mp3"))
+    batch.add_argument("--only-new", action="store_true", help=t("cli_only_new_help"))
+    batch.add_argument("--no-recursive", action="store_true", help=t("cli_no_recursive_help"))
+
+    tune = sub.add_parser("tune", help=t("cli_tune_help"), description=t("cli_tune_help"))
+    tune.add_argument("-m", "--model", default=batch.get_default("model"), choices=WHISPER_MODELS)
+    tune.add_argument("-d", "--device", default=batch.get_default("device"), type=str.upper, choices=DEVICE_MODES)
+    tune.add_argument("--clip", default=bundled_sound_path(), help=t("cli_tune_clip_help"))
+    tune.add_argument("--seconds", type=float, default=AUTOTUNE_CLIP_S, help=t("cli_tune_seconds_help"))
+    tune.add_argument("--compute-types", nargs="+", metavar="TYPE")
+    tune.add_argument("--threads", nargs="+", type=int, metavar="N")
+    tune.add_argument("--num-workers", nargs="+", type=int, metavar="N")
+    return parser
+
+
+def _pipeline_options(args, saved):
+    """Опции конвейера в том же виде, что собирает WhisperGUI.start_thread."""
+    lang = (args.language or "").strip().lower()
+    try:
+        chunk_target = max(60.0, float(saved.get("chunk_target_sec", DEFAULT_CHUNK_TARGET_S)))
+    except (TypeError, ValueError):
+        chunk_target = DEFAULT_CHUNK_TARGET_S
+    return {
+        "device_mode": args.device,
+        "whisper_model": args.model,
+        "lang_mode": LANG_AUTO_VALUE if lang in ("", "auto", "none") else lang,
+        "save_audio_mp3": args.save_mp3,
+        "output_dir": (args.output_dir or "").strip(),
+        "parallel_workers": max(1, args.workers),
+        "engine_mode": args.engine,
+        "batch_size": max(1, args.batch_size),
+        "chunk_long_files": args.chunk_long_files,
+        "chunk_target_sec": chunk_target,
+    }
+
+
+def run_batch(args, saved, reporter):
+    """Команда batch: собирает файлы, обрабатывает их конвейером и возвращает код выхода."""
+    started = time.time()
+    inputs = _BatchInput()
+    for arg in args.inputs:
+        try:
+            inputs.add_argument(arg, recursive=not args.no_recursive)
+        except ValueError as e:
+            inputs.invalid.append(arg)
+            reporter.emit("input_error", path=arg, error=str(e))
+    for arg in inputs.invalid:
+        reporter.emit("input_skipped", path=arg, message=t("cli_input_invalid", path=arg))
+    rows = [r for r in inputs.rows if not (args.only_new and r.get("processed"))]
+    if not rows:
+        reporter.emit("finish", status="no_input", message=t("cli_no_input"), exit_code=EXIT_USAGE)
+        return EXIT_USAGE
+
+    opts = _pipeline_options(args, saved)
+    reporter.emit("start", files=[r["path"] for r in rows], options=opts)
+
+    cancel = threading.Event()
+
+    def on_sigint(signum, frame):
+        # Первый Ctrl+C — мягкая отмена (частичный результат и контрольная точка сохраняются), второй — прерывание
+        cancel.set()
+        reporter.emit("cancel_requested")
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, on_sigint)
+
+    def on_file_done(path, outputs):
+        inputs.mark_done(path)
+        reporter.emit("file_done", path=path, outputs=outputs)
+
+    # Конвейер (и вместе с ним faster-whisper / torch) импортируется только после разбора аргументов
+    from pipeline import TranscriptionPipeline
+    from result_cache import TranscriptionResultCache
+    from model_manager import WhisperModelSingleton
+    from metrics import MetricsLog
+
+    WhisperModelSingleton.configure(saved.get("model_cache_max_mb"))
+    # Телеметрия по файлам — в тот же metrics.jsonl, что и у GUI
+    metrics_log = MetricsLog(os.path.join(BASE_DIR, METRICS_LOG_FILE)) if saved.get("metrics_log_enabled", True) else None
+
+    pipeline = TranscriptionPipeline(
+        log=lambda msg, tag=None: reporter.emit("log", message=str(msg).strip(), tag=tag),
+        result_cache=TranscriptionResultCache(max_mb=saved.get("result_cache_max_mb", DEFAULT_RESULT_CACHE_MAX_MB)),
+        on_progress=lambda value: reporter.emit("progress", value=round(float(value), 1)),
+        on_file_done=on_file_done,
+        register_output_paths=None,
+        is_cancelled=cancel.is_set,
+        processed_marker=t("processed"),
+        metrics_log=metrics_log,
+    )
+    try:
+        done, skipped_paths = pipeline.run(rows, opts)
+    except KeyboardInterrupt:
+        reporter.emit("finish", status="interrupted", elapsed=round(time.time() - started, 3), exit_code=EXIT_CANCELLED)
+        return EXIT_CANCELLED
+    except Exception as e:
+        reporter.emit("error", error=str(e), traceback=traceback.format_exc() if os.environ.get("DEBUG") else None)
+        reporter.emit("finish", status="error", elapsed=round(time.time() - started, 3), exit_code=EXIT_FATAL)
+        return EXIT_FATAL
+
+    failed = len(rows) - done
+    if cancel.is_set():
+        status, code = "cancelled", EXIT_CANCELLED
+    elif failed or skipped_paths or inputs.invalid:
+        status, code = "partial", EXIT_FAILED
+    else:
+        status, code = "ok", EXIT_OK
+    reporter.emit("finish", status=status, done=done, failed=failed, skipped=list(skipped_paths),
+                  invalid=inputs.invalid, elapsed=round(time.time() - started, 3), exit_code=code)
+    return code
+
+
+def run_tune(args, reporter):
+    """Команда tune: перебор compute_type / cpu_threads / num_workers на эталонном фрагменте, лучшая — в settings.json."""
+    started = time.time()
+    if not args.clip or not os.path.isfile(args.clip):
+        reporter.emit("finish", status="no_input", message=t("cli_tune_no_clip"), exit_code=EXIT_USAGE)
+        return EXIT_USAGE
+    from autotune import run_tuning
+
+    reporter.emit("start", model=args.model, device=args.device, clip=args.clip, seconds=args.seconds)
+    try:
+        best, results = run_tuning(
+            args.model, args.device, args.clip, max(1.0, args.seconds),
+            on_result=lambda result: reporter.emit("tune_result", **result),
+            compute_types=args.compute_types, threads=args.threads, workers=args.num_workers,
+        )
+    except KeyboardInterrupt:
+        reporter.emit("finish", status="interrupted", elapsed=round(time.time() - started, 3), exit_code=EXIT_CANCELLED)
+        return EXIT_CANCELLED
+    except Exception as e:
+        reporter.emit("error", error=str(e), traceback=traceback.format_exc() if os.environ.get("DEBUG") else None)
+        reporter.emit("finish", status="error", elapsed=round(time.time() - started, 3), exit_code=EXIT_FATAL)
+        return EXIT_FATAL
+    if best is None:
+        reporter.emit("finish", status="failed", tried=len(results), elapsed=round(time.time() - started, 3),
+                      exit_code=EXIT_FAILED)
+        return EXIT_FAILED
+    reporter.emit("tune_best", message=t("cli_tune_saved", compute=best["compute_type"], threads=best["cpu_threads"],
+                                         workers=best["num_workers"], speed=best["speed"]), **best)
+    reporter.emit("finish", status="ok", tried=len(results), elapsed=round(time.time() - started, 3), exit_code=EXIT_OK)
+    return EXIT_OK
+
+
+def main(argv=None):
+    saved = load_app_settings()
+    set_language(saved.get("language", "EN"))
+    args = build_parser(saved).parse_args(argv)
+    reporter = JsonLinesReporter()
+    if args.command == "batch":
+        return run_batch(args, saved, reporter)
+    if args.command == "tune":
+        return run_tune(args, reporter)
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    # Нужно для процессов-воркеров (worker_pool, метод spawn) в собранном exe
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Пул процессов-воркеров для параллельной транскрибации очереди.
+Каждый процесс загружает собственную WhisperModel с долей cpu_threads и берёт задания из общей очереди.
+Обмен с главным процессом — через multiprocessing.Queue сообщениями-словарями (поле "type").
+"""
+import multiprocessing as mp
+import os
+import queue
+import time
+
+from config import PROGRESS_UPDATE_INTERVAL_S
+
+
+def split_cpu_threads(num_workers, total_cores=None):
+    """Доля потоков CTranslate2 на одного воркера: ядра делятся поровну, минимум 1."""
+    total = total_cores or os.cpu_count() or 1
+    return max(1, total // max(1, num_workers))
+
+
+def _worker_main(worker_id, model_name, device_mode, cpu_threads, task_q, result_q, cancel_event):
+    """
+    Точка входа процесса-воркера. Загружает модель, затем выполняет задания до получения None.
+    Сообщения: worker_ready / worker_error, started, progress, done, cancelled, error.
+    """
+    try:
+        from faster_whisper import WhisperModel
+        from model_manager import WhisperModelSingleton
+        from audio_io import DecodedAudio
+        from transcriber import open_segments, resolve_engine
+        from utils import process_memory_mb
+        # Точность — с учётом автонастройки; потоки CTranslate2 делятся между воркерами (cpu_threads)
+        device, compute, _ = WhisperModelSingleton.resolve_load_options(device_mode, model_name)
+        model = WhisperModel(model_name, device=device, compute_type=compute, cpu_threads=cpu_threads)
+    except Exception as e:
+        result_q.put({"type": "worker_error", "worker": worker_id, "error": str(e)})
+        return
+    result_q.put({"type": "worker_ready", "worker": worker_id, "device": device, "precision": compute,
+                  "cpu_threads": cpu_threads})
+
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        job_id = task["job_id"]
+        if cancel_event.is_set():
+            result_q.put({"type": "cancelled", "job_id": job_id, "worker": worker_id})
+            continue
+        span = task["end_sec"] - task["start_sec"]
+        engine = resolve_engine(task.get("engine_mode"), span)
+        result_q.put({"type": "started", "job_id": job_id, "worker": worker_id, "engine": engine})
+        audio = DecodedAudio(task["path"], task["start_sec"], task["end_sec"], task["duration"])
+        try:
+            t0 = time.time()
+            segments_iter, info = open_segments(
+                model, audio, task.get("language"), engine=engine, batch_size=task.get("batch_size"),
+            )
+            # Подготовка без декодирования окна: VAD, признаки, определение языка (телеметрия, metrics.py)
+            vad_sec = max(0.0, time.time() - t0 - audio.decode_sec)
+            segments = []
+            last_progress = 0.0
+            for s in segments_iter:
+                if cancel_event.is_set():
+                    break
+                text = s.text or ""
+                segments.append((s.start, s.end, text))
+                now = time.time()
+                if now - last_progress >= PROGRESS_UPDATE_INTERVAL_S:
+                    value = min(100.0, (s.end / span) * 100) if span > 0 else 100.0
+                    result_q.put({"type": "progress", "job_id": job_id, "worker": worker_id,
+                                  "value": value, "start": s.start, "text": text})
+                    last_progress = now
+            if cancel_event.is_set():
+                result_q.put({"type": "cancelled", "job_id": job_id, "worker": worker_id})
+            else:
+                result_q.put({"type": "done", "job_id": job_id, "worker": worker_id, "segments": segments,
+                              "engine": engine, "elapsed": time.time() - t0,
+                              "decode_sec": audio.decode_sec, "peak_bytes": audio.peak_bytes, "vad_sec": vad_sec,
+                              "speech_sec": getattr(info, "duration_after_vad", None),
+                              "rss_mb": process_memory_mb()})
+        except Exception as e:
+            result_q.put({"type": "error", "job_id": job_id, "worker": worker_id, "error": str(e),
+                          "is_os_error": isinstance(e, OSError)})
+        finally:
+            audio.release()
+
+
+class TranscriptionWorkerPool:
+    """
+    N процессов-воркеров, каждый со своей WhisperModel.
+    Используется так: start() -> submit(...) для каждого файла -> get_message() до получения всех результатов -> close().
+    """
+
+    def __init__(self, num_workers, model_name, device_mode, cpu_threads=None):
+        self.num_workers = max(1, int(num_workers))
+        self.model_name = model_name
+        self.device_mode = device_mode
+        self.cpu_threads = cpu_threads or split_cpu_threads(self.num_workers)
+        # spawn: дочерние процессы не наследуют состояние Tk и потоки главного процесса
+        self._ctx = mp.get_context("spawn")
+        self._task_q = self._ctx.Queue()
+        self._result_q = self._ctx.Queue()
+        self._cancel_event = self._ctx.Event()
+        self._processes = []
+
+    def start(self):
+        for worker_id in range(1, self.num_workers + 1):
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.model_name, self.device_mode, self.cpu_threads,
+                      self._task_q, self._result_q, self._cancel_event),
+                daemon=True,
+            )
+            p.start()
+            self._processes.append(p)
+
+    def submit(self, job_id, path, start_sec, end_sec, duration, language=None, engine_mode=None, batch_size=None):
+        self._task_q.put({
+            "job_id": job_id, "path": path, "start_sec": start_sec, "end_sec": end_sec,
+            "duration": duration, "language": language, "engine_mode": engine_mode, "batch_size": batch_size,
+        })
+
+    def get_message(self, timeout=0.25):
+        """Следующее сообщение от воркеров или None по таймауту."""
+        try:
+            return self._result_q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def alive_count(self):
+        return sum(1 for p in self._processes if p.is_alive())
+
+    def cancel(self):
+        """Просит воркеров прервать текущие файлы на ближайшем сегменте и пропустить оставшиеся задания."""
+        self._cancel_event.set()
+
+    def close(self, timeout=5.0):
+        """Останавливает воркеров: отправляет None каждому, ждёт завершения, зависшие процессы завершает принудительно."""
+        for _ in self._processes:
+            try:
+                self._task_q.put(None)
+            except (OSError, ValueError):
+                pass
+        deadline = time.time() + timeout
+        for p in self._processes:
+            p.join(max(0.0, deadline - time.time()))
+        for p in self._processes:
+            if p.is_alive():
+                p.terminate()
+                p.join(1.0)
+        self._processes = []